@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from db import BudgetTracker
+from profiling import current_capture
+
+T = TypeVar("T")
+
+
+class AsyncBudgetTracker:
+    """Awaitable facade over BudgetTracker for use from async route handlers.
+
+    Every call runs on a bounded thread pool so sqlite3 work never blocks the
+    event loop. Any BudgetTracker method can be awaited through the facade,
+    e.g. ``await db.list_accounts()``; the wrapped tracker stays available as
+    ``db.tracker`` for code that already runs off the event loop.
+    """
+
+    def __init__(self, tracker: BudgetTracker, executor: Optional[ThreadPoolExecutor] = None):
+        self.tracker = tracker
+        self._owns_executor = executor is None
+        # One worker per pooled connection: more threads would only queue on the pool
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=tracker._pool.max_size, thread_name_prefix="budget-db"
+        )
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn(*args, **kwargs) on the database thread pool and await its result"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (request-scoped state) into the worker thread
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        capture = current_capture.get()
+        if capture is not None:
+            # The request is being profiled: cover the worker thread too
+            call = functools.partial(capture.run_in_worker, call)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """Drain a blocking iterator one item at a time on the database thread pool"""
+        done = object()
+        while True:
+            item = await self.run(next, iterator, done)
+            if item is done:
+                break
+            yield item
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.tracker, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return call
+
+    def close(self):
+        """Wait for queued calls to finish, then close the tracker"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+        self.tracker.close()
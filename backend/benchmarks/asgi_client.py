@@ -0,0 +1,75 @@
+"""Minimal in-process ASGI client for benchmarks (no HTTP server or socket involved)."""
+import asyncio
+import json
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+async def request(app, method: str, url: str, body=None,
+                  headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+    """Send one request through the ASGI app and return (status, headers, body)"""
+    parts = urlsplit(url)
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode()
+    header_list = [(b"content-type", b"application/json")]
+    header_list += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": header_list,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    body_sent = False
+    # A real client stays connected until the response is complete; reporting a
+    # disconnect earlier makes StreamingResponse cancel its body mid-stream
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    status, response_headers, chunks = 0, {}, []
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        response_complete.set()
+    return status, response_headers, b"".join(chunks)
+
+
+class lifespan:
+    """Async context manager running the app's lifespan startup and shutdown"""
+
+    def __init__(self, app):
+        self.app = app
+        self._context = None
+
+    async def __aenter__(self):
+        self._context = self.app.router.lifespan_context(self.app)
+        await self._context.__aenter__()
+        return self.app
+
+    async def __aexit__(self, *exc):
+        await self._context.__aexit__(*exc)
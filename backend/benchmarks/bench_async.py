@@ -0,0 +1,124 @@
+"""Tail latency under 100+ concurrent clients: inline sqlite3 calls versus the async facade.
+
+Both runs use the real app. "inline" swaps in a facade that runs every call
+directly on the event loop, which is how the routes behaved before
+AsyncBudgetTracker. Clients send on an open-loop schedule, so latency is
+measured from when a request was due and includes any time it spent queued
+behind a blocked event loop. Run from the backend directory:
+
+    python -m benchmarks.bench_async [--clients 128] [--rate 400] [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from async_tracker import AsyncBudgetTracker
+from benchmarks.asgi_client import lifespan, request
+from db import BudgetTracker
+
+# (weight, kind, method, url); "heavy" requests are the long ledger reads
+MIX = [
+    (20, "read", "GET", "/settings/performance"),
+    (15, "read", "GET", "/categories/"),
+    (15, "read", "GET", "/accounts/"),
+    (10, "read", "GET", "/transactions/?limit=20"),
+    (30, "write", "PUT", "/categories/recordTransaction"),
+    (10, "heavy", "GET", "/transactions/export?format=csv&account=account-1&category=category-1"),
+]
+
+
+class InlineBudgetTracker(AsyncBudgetTracker):
+    """The previous behaviour: sqlite3 work runs on, and blocks, the event loop"""
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+def seed(path: str, transactions: int):
+    tracker = BudgetTracker(path)
+    for i in range(4):
+        tracker.add_account(f"account-{i}", 50_000.0)
+    for i in range(12):
+        tracker.add_category(f"category-{i}", 2_000.0)
+    tracker.record_transactions(
+        {"account_name": f"account-{i % 4}", "category": f"category-{i % 12}", "amount": 3.0, "description": "seed"}
+        for i in range(transactions)
+    )
+    tracker.close()
+
+
+async def client(app, rate: float, deadline: float, rng: random.Random, latencies: dict):
+    """Send requests on a Poisson schedule until the deadline"""
+    weights = [m[0] for m in MIX]
+    due = time.perf_counter() + rng.expovariate(rate)
+    while due < deadline:
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _, kind, method, url = rng.choices(MIX, weights)[0]
+        body = None
+        if kind == "write":
+            body = {"account_name": f"account-{rng.randrange(4)}", "category": f"category-{rng.randrange(12)}",
+                    "amount": 1.25, "description": "bench"}
+        status, _, _ = await request(app, method, url, body)
+        assert status == 200, (url, status)
+        latencies[kind].append((time.perf_counter() - due) * 1000)
+        due += rng.expovariate(rate)
+
+
+async def run(app, clients: int, rate: float, seconds: float) -> dict:
+    latencies = {"read": [], "write": [], "heavy": []}
+    rng = random.Random(3)
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(app, rate / clients, deadline, random.Random(rng.random()), latencies) for _ in range(clients)
+    ))
+    latencies["elapsed"] = time.perf_counter() - start
+    return latencies
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(label: str, result: dict):
+    completed = 0
+    for kind in ("read", "write", "heavy"):
+        samples = result[kind]
+        completed += len(samples)
+        print(f"{label:<8} {kind:<6} n={len(samples):<6} p50 {percentile(samples, .5):8.2f} ms  "
+              f"p95 {percentile(samples, .95):8.2f} ms  p99 {percentile(samples, .99):8.2f} ms")
+    print(f"{label:<8} throughput {completed / result['elapsed']:,.0f} req/s")
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.transactions)
+        os.environ["BUDGET_DB_PATH"] = path
+        import main
+
+        async with lifespan(main.app) as app:
+            facade = app.state.tracker
+            app.state.tracker = InlineBudgetTracker(facade.tracker)
+            report("inline", await run(app, args.clients, args.rate, args.seconds))
+            app.state.tracker = facade
+            report("facade", await run(app, args.clients, args.rate, args.seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=128)
+    parser.add_argument("--rate", type=float, default=400, help="offered requests per second, all clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--transactions", type=int, default=200_000)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
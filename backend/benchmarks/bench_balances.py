@@ -0,0 +1,63 @@
+"""Balance history: get_balance_history from checkpoints versus replaying the ledger back from today.
+
+The replay is what a history costs without balance_checkpoints: each point is
+the current balance minus every transaction dated after it, so a point a year
+back sums a year of the account's ledger. Checkpoints bound each point to the
+transactions since the nearest checkpoint. Run from the backend directory:
+
+    python -m benchmarks.bench_balances [--transactions 2000000] [--calls 20]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from benchmarks.bench_rollup import measure
+from benchmarks.generate_ledger import generate
+from db import BudgetTracker
+from ledger_checks import replay_history
+
+
+def checkpoint_size(path: str):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = 'balance_checkpoints'").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=2_000_000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, transactions=args.transactions, progress=None)
+        tracker = BudgetTracker(path, cache_results=False)
+        today = datetime.now()
+
+        # (label, start, interval)
+        cases = [
+            ("last 30 days, daily", today - timedelta(days=30), "day"),
+            ("last year, weekly", today - timedelta(days=365), "week"),
+            ("last year, monthly", today - timedelta(days=365), "month"),
+            ("all history, monthly", today - timedelta(days=365 * 3), "month"),
+        ]
+        print(f"{args.transactions:,} transactions, {checkpoint_size(path) / 1e6:.2f} MB of checkpoints")
+        print(f"{'history':<24} {'points':>6} {'checkpoints p50 ms':>19} {'replay p50 ms':>14}")
+        for label, start, interval in cases:
+            start = start.strftime("%Y-%m-%d")
+            history = tracker.get_balance_history("account-1", start, None, interval)
+            days = [p["date"] for p in history["points"]]
+            assert [p["balance"] for p in history["points"]] == replay_history(tracker, "account-1", days)
+            fast = measure(lambda: tracker.get_balance_history("account-1", start, None, interval), args.calls)[0]
+            slow = measure(lambda: replay_history(tracker, "account-1", days), args.calls)[0]
+            print(f"{label:<24} {len(days):>6} {fast:>19.3f} {slow:>14.3f}")
+
+        rebuild = measure(tracker.rebuild_balance_checkpoints, 3)[0]
+        print(f"\nrebuild_balance_checkpoints: {rebuild:.0f} ms")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Throughput of record_transactions batches versus single-row record_transaction calls.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_batch [--rows 20000] [--batch-size 1000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from db import BudgetTracker
+
+
+def make_rows(count: int):
+    return [
+        {"account_name": f"account-{i % 4}", "category": f"category-{i % 12}",
+         "amount": 10.0 + i % 50, "description": f"row {i}"}
+        for i in range(count)
+    ]
+
+
+def fresh_tracker(tmp: str, name: str) -> BudgetTracker:
+    tracker = BudgetTracker(os.path.join(tmp, name))
+    for i in range(4):
+        tracker.add_account(f"account-{i}", 100_000.0)
+    for i in range(12):
+        tracker.add_category(f"category-{i}", 5_000.0)
+    return tracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        single = fresh_tracker(tmp, "single.db")
+        start = time.perf_counter()
+        for row in rows:
+            single.record_transaction(row["account_name"], row["category"], row["amount"], row["description"])
+        single_elapsed = time.perf_counter() - start
+
+        batched = fresh_tracker(tmp, "batch.db")
+        start = time.perf_counter()
+        for offset in range(0, len(rows), args.batch_size):
+            batched.record_transactions(rows[offset:offset + args.batch_size])
+        batch_elapsed = time.perf_counter() - start
+
+        assert single.list_accounts() == batched.list_accounts()
+        single.close()
+        batched.close()
+
+    print(f"{'record_transaction (single)':<40} {args.rows / single_elapsed:>12,.0f} rows/s")
+    print(f"{f'record_transactions (batch={args.batch_size})':<40} {args.rows / batch_elapsed:>12,.0f} rows/s")
+    print(f"speed-up: {single_elapsed / batch_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
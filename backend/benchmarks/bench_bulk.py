@@ -0,0 +1,102 @@
+"""Bulk edits: delete_transactions and recategorize_transactions, reconciled against the ledger after each.
+
+After every edit the script checks that balances moved by exactly the
+selected amounts, that both rollups and the balance checkpoints still match
+the ledger, that the search index passes its integrity check and that
+balance history equals a full replay. For scale it also times deleting rows
+one at a time, each with its own lookup and aggregate fixes, the way the
+original debug.py did. Run from the backend directory:
+
+    python -m benchmarks.bench_bulk [--transactions 1000000] [--ids 1000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.generate_ledger import generate
+from db import BudgetTracker
+from ledger_checks import balances, reconcile, selected_spend
+
+
+def delete_one_by_one(tracker: BudgetTracker, ids):
+    """Row-at-a-time baseline: look each row up, refund it, fix its aggregates, delete it"""
+    with tracker._connection() as conn:
+        cursor = conn.cursor()
+        for transaction_id in ids:
+            date, month, account_id, category_id, amount = cursor.execute(
+                'SELECT date, month, account_id, category_id, amount FROM transactions WHERE id = ?',
+                (transaction_id,)).fetchone()
+            cursor.execute('UPDATE accounts SET balance = balance + ? WHERE id = ?', (amount, account_id))
+            cursor.execute('UPDATE balance_checkpoints SET balance = balance + ? WHERE account_id = ? AND date > ?',
+                           (amount, account_id, date))
+            cursor.execute('''
+                UPDATE monthly_category_totals SET spent = spent - ?, txn_count = txn_count - 1
+                WHERE month = ? AND category_id = ?
+            ''', (amount, month, category_id))
+            cursor.execute('''
+                UPDATE daily_category_totals SET spent = spent - ?, txn_count = txn_count - 1
+                WHERE day = ? AND category_id = ?
+            ''', (amount, date // 86400, category_id))
+            cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
+        cursor.execute('DELETE FROM monthly_category_totals WHERE txn_count = 0')
+        cursor.execute('DELETE FROM daily_category_totals WHERE txn_count = 0')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--ids", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, transactions=args.transactions, progress=None)
+        tracker = BudgetTracker(path, cache_results=False)
+        month = tracker.financial_month(datetime.now() - timedelta(days=200))
+        with tracker._connection() as conn:
+            max_id = conn.execute('SELECT MAX(id) FROM transactions').fetchone()[0]
+        picks = random.Random(1).sample(range(1, max_id + 1), args.ids * 2)
+        ids, baseline_ids = picks[:args.ids], picks[args.ids:]
+
+        # (label, edit, WHERE over transactions t selecting what it refunds, its parameters)
+        cases = [
+            (f"delete {args.ids} ids", lambda: tracker.delete_transactions(ids),
+             f"t.id IN ({','.join(map(str, ids))})", []),
+            ("delete account month", lambda: tracker.delete_transactions(month=month, account_name="account-1"),
+             "t.month = ? AND t.account_id = (SELECT id FROM accounts WHERE account_name = 'account-1')", [month]),
+            ("recategorize month", lambda: tracker.recategorize_transactions(
+                "category-2", month=tracker.financial_month(), category="category-1"), "false", []),
+            ("recategorize all of one", lambda: tracker.recategorize_transactions("category-4", category="category-3"),
+             "false", []),
+        ]
+        print(f"{args.transactions:,} transactions")
+        print(f"{'edit':<26} {'rows':>8} {'ms':>10}")
+        for label, edit, where, params in cases:
+            before = balances(tracker)
+            refunds = selected_spend(tracker, where, params)
+            start = time.perf_counter()
+            rows = edit()
+            elapsed = (time.perf_counter() - start) * 1000
+            reconcile(tracker, before, refunds)
+            print(f"{label:<26} {rows:>8,} {elapsed:>10.1f}")
+
+        # Some of the baseline's picks may have gone with the month deleted above
+        with tracker._connection() as conn:
+            baseline_ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM transactions WHERE id IN ({','.join(map(str, baseline_ids))})")]
+        before = balances(tracker)
+        refunds = selected_spend(tracker, f"t.id IN ({','.join(map(str, baseline_ids))})", [])
+        start = time.perf_counter()
+        delete_one_by_one(tracker, baseline_ids)
+        elapsed = (time.perf_counter() - start) * 1000
+        reconcile(tracker, before, refunds)
+        print(f"{'delete one by one':<26} {len(baseline_ids):>8,} {elapsed:>10.1f}")
+        print("\nbalances, rollups, checkpoints, search index and history reconcile after every edit")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Concurrent write throughput with and without group commits.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_coalesce [--threads 32] [--writes 500] [--window-ms 2]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from db import BudgetTracker
+
+
+def run(tracker: BudgetTracker, threads: int, writes: int):
+    errors = []
+    latencies = []
+    lock = threading.Lock()
+
+    def writer(worker: int):
+        local = []
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                tracker.record_transaction(f"account-{worker % 4}", f"category-{i % 8}", 1.0, "bench")
+            except ValueError as e:
+                errors.append(str(e))
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=writer, args=(w,)) for w in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return threads * writes / elapsed, latencies[len(latencies) // 2] * 1000, \
+        latencies[int(len(latencies) * 0.99)] * 1000, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=500, help="writes per thread")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            "per-call commit": {},
+            "group commit": {"coalesce_writes": True, "coalesce_window_ms": args.window_ms,
+                             "coalesce_max_batch": args.max_batch},
+        }
+        print(f"{'mode':<16} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for label, options in variants.items():
+            tracker = BudgetTracker(os.path.join(tmp, f"{label}.db"), **options)
+            for i in range(4):
+                tracker.add_account(f"account-{i}", 0.0)
+            for i in range(8):
+                tracker.add_category(f"category-{i}", 0.0)
+            rate, p50, p99, errors = run(tracker, args.threads, args.writes)
+            tracker.close()
+            print(f"{label:<16} {rate:>10,.0f} {p50:>8.2f} {p99:>8.2f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
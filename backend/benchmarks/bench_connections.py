@@ -0,0 +1,84 @@
+"""Per-request latency of BudgetTracker with and without the connection pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_connections [--calls 2000] [--transactions 20000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from db import BudgetTracker
+
+
+class UnpooledTracker(BudgetTracker):
+    """Reproduces the previous behaviour: a fresh rollback-journal connection per call"""
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+
+def seed(tracker: BudgetTracker, transactions: int):
+    for i in range(5):
+        tracker.add_account(f"account-{i}", 10_000.0)
+    for i in range(10):
+        tracker.add_category(f"category-{i}", 2_000.0)
+    for i in range(transactions):
+        tracker.record_transaction(f"account-{i % 5}", f"category-{i % 10}", 1.5, "seed")
+
+
+def measure(fn, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95)],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(BudgetTracker(path), args.transactions)
+
+        trackers = {"unpooled": UnpooledTracker(path, cache_results=False),
+                    "pooled": BudgetTracker(path, cache_results=False)}
+        operations = {
+            "list_accounts": lambda t: t.list_accounts(),
+            "list_categories": lambda t: t.list_categories(),
+            "get_performance_data": lambda t: t.get_performance_data(),
+            "record_transaction": lambda t: t.record_transaction("account-0", "category-0", 1.0, "bench"),
+        }
+
+        print(f"{'operation':<22} {'tracker':<9} {'p50 us':>10} {'p95 us':>10} {'mean us':>10}")
+        for op_name, op in operations.items():
+            for label, tracker in trackers.items():
+                stats = measure(lambda: op(tracker), args.calls)
+                print(f"{op_name:<22} {label:<9} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['mean']:>10.1f}")
+
+        for tracker in trackers.values():
+            tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Streaming export throughput and peak RSS on a large ledger.
+
+The ledger is built in a child process so the parent's peak RSS reflects
+only the export. Run from the backend directory:
+
+    python -m benchmarks.bench_export [--rows 5000000] [--format csv]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime
+
+from db import BudgetTracker, to_epoch
+from routes.transactions import EXPORT_FORMATS
+
+
+def build_ledger(path: str, rows: int):
+    rng = random.Random(11)
+    tracker = BudgetTracker(path)
+    tracker.add_account("bench", 0.0)
+    tracker.add_category("bench", 0.0)
+    batch = 100_000
+    stamps = [to_epoch(datetime(2024, month, 15, 12)) for month in range(1, 13)]
+    with tracker._connection() as conn:
+        account_id = conn.execute("SELECT id FROM accounts WHERE account_name = 'bench'").fetchone()[0]
+        category_id = conn.execute("SELECT id FROM categories WHERE category_name = 'bench'").fetchone()[0]
+        for offset in range(0, rows, batch):
+            conn.executemany('''
+                INSERT INTO transactions (date, month, account_id, category_id, amount, description)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (
+                (stamps[i % 12], f"2024-{1 + i % 12:02d}", account_id, category_id,
+                 rng.randrange(100, 50_000), f"synthetic transaction {i}")
+                for i in range(offset, min(rows, offset + batch))
+            ))
+    tracker.close()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        child = multiprocessing.Process(target=build_ledger, args=(path, args.rows))
+        child.start()
+        child.join()
+
+        tracker = BudgetTracker(path)
+        serialise, _ = EXPORT_FORMATS[args.format]
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        exported_bytes = 0
+        for chunk in serialise(tracker.iter_transactions()):
+            exported_bytes += len(chunk)
+        elapsed = time.perf_counter() - start
+        tracker.close()
+
+    print(f"exported {args.rows:,} rows ({exported_bytes / 2**20:,.0f} MiB {args.format}) in {elapsed:.1f} s "
+          f"-> {args.rows / elapsed:,.0f} rows/s")
+    print(f"peak RSS before export {baseline:.1f} MiB, after {peak_rss_mb():.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Name-keyed ledger (schema v5) versus integer surrogate keys (v6): size, aggregates and renames.
+
+Builds a v5 database with text account/category references, copies it and
+upgrades the copy in place with migration 6, then compares the two.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_keys [--transactions 500000] [--calls 20]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from migrations import MIGRATIONS
+
+NAME_KEYS_VERSION = 5
+INTEGER_KEYS_VERSION = 6
+ACCOUNTS = [f"Everyday Cheque Account {i}" for i in range(6)]
+CATEGORIES = [f"Household Spending Category {i}" for i in range(30)]
+
+AGGREGATES = {
+    NAME_KEYS_VERSION: {
+        "spend by category": '''
+            SELECT category, SUM(amount) FROM transactions GROUP BY category
+        ''',
+        "spend by account": '''
+            SELECT account_name, SUM(amount) FROM transactions GROUP BY account_name
+        ''',
+        "one category, all months": '''
+            SELECT month, SUM(amount) FROM transactions WHERE category = ? GROUP BY month
+        ''',
+    },
+    INTEGER_KEYS_VERSION: {
+        "spend by category": '''
+            SELECT c.category_name, s.spent
+            FROM (SELECT category_id, SUM(amount) AS spent FROM transactions GROUP BY category_id) s
+            JOIN categories c ON c.id = s.category_id
+        ''',
+        "spend by account": '''
+            SELECT a.account_name, s.spent
+            FROM (SELECT account_id, SUM(amount) AS spent FROM transactions GROUP BY account_id) s
+            JOIN accounts a ON a.id = s.account_id
+        ''',
+        "one category, all months": '''
+            SELECT month, SUM(amount) FROM transactions
+            WHERE category_id = (SELECT id FROM categories WHERE category_name = ?)
+            GROUP BY month
+        ''',
+    },
+}
+
+
+def build_name_keyed(path: str, transactions: int):
+    """A database at schema v5, as it looked before surrogate keys"""
+    rng = random.Random(5)
+    conn = sqlite3.connect(path)
+    for migration in MIGRATIONS[:NAME_KEYS_VERSION]:
+        migration(conn.cursor())
+    conn.execute(f'PRAGMA user_version = {NAME_KEYS_VERSION}')
+    conn.executemany('INSERT INTO accounts VALUES (?, 0)', [(name,) for name in ACCOUNTS])
+    conn.executemany('INSERT INTO categories VALUES (?, 500)', [(name,) for name in CATEGORIES])
+    conn.executemany('''
+        INSERT INTO transactions (date, month, account_name, category, amount, description)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        (f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00", f"2024-{1 + i % 12:02d}",
+         rng.choice(ACCOUNTS), rng.choice(CATEGORIES), round(rng.uniform(1, 500), 2), "synthetic")
+        for i in range(transactions)
+    ))
+    conn.execute('''
+        INSERT INTO monthly_category_totals (month, category, spent, txn_count)
+        SELECT month, category, SUM(amount), COUNT(*) FROM transactions GROUP BY month, category
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def upgrade(path: str, version: int):
+    """Apply migrations up to version on a connection configured like a pooled one"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    with conn:
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        for next_version in range(current + 1, version + 1):
+            MIGRATIONS[next_version - 1](conn.cursor())
+            conn.execute(f'PRAGMA user_version = {next_version}')
+    conn.close()
+
+
+def object_sizes(conn: sqlite3.Connection):
+    """Bytes used by each table and index of the ledger"""
+    return dict(conn.execute('''
+        SELECT name, SUM(pgsize) FROM dbstat
+        WHERE name = 'transactions' OR name LIKE 'idx_transactions_%'
+        GROUP BY name
+    ''').fetchall())
+
+
+def timed(fn, calls: int) -> float:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def rename_account(conn: sqlite3.Connection, version: int, old: str, new: str):
+    """A rename that keeps every transaction attached to the account"""
+    with conn:
+        conn.execute('UPDATE accounts SET account_name = ? WHERE account_name = ?', (new, old))
+        if version == NAME_KEYS_VERSION:
+            conn.execute('UPDATE transactions SET account_name = ? WHERE account_name = ?', (new, old))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=500_000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = os.path.join(tmp, "names.db")
+        after = os.path.join(tmp, "ids.db")
+        build_name_keyed(before, args.transactions)
+        shutil.copy(before, after)
+
+        start = time.perf_counter()
+        upgrade(after, INTEGER_KEYS_VERSION)
+        print(f"in-place migration of {args.transactions} rows: {time.perf_counter() - start:.2f} s")
+
+        results = {}
+        for path in (before, after):
+            conn = sqlite3.connect(path)
+            conn.execute('VACUUM')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            row = {"file": os.path.getsize(path), "sizes": object_sizes(conn)}
+            for name, sql in AGGREGATES[version].items():
+                params = (CATEGORIES[0],) if '?' in sql else ()
+                row[name] = timed(lambda: conn.execute(sql, params).fetchall(), args.calls)
+            names = [ACCOUNTS[0], "Renamed account"]
+            row["rename account"] = timed(
+                lambda: (rename_account(conn, version, *names), names.reverse()), args.calls
+            )
+            conn.close()
+            results[version] = row
+
+        old, new = results[NAME_KEYS_VERSION], results[INTEGER_KEYS_VERSION]
+        print(f"\n{'bytes':<34} {'name keys':>12} {'integer keys':>13}")
+        print(f"{'database file':<34} {old['file']:>12,} {new['file']:>13,}")
+        for name in sorted(set(old["sizes"]) | set(new["sizes"])):
+            print(f"{name:<34} {old['sizes'].get(name, 0):>12,} {new['sizes'].get(name, 0):>13,}")
+
+        print(f"\n{'median ms':<34} {'name keys':>12} {'integer keys':>13}")
+        for name in list(AGGREGATES[NAME_KEYS_VERSION]) + ["rename account"]:
+            print(f"{name:<34} {old[name]:>12.2f} {new[name]:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
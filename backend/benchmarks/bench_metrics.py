@@ -0,0 +1,87 @@
+"""Cost of instrumentation: the same calls with metrics off and on.
+
+Method calls run against two trackers on one ledger, built with and without
+instrument=True. Requests go through main.app, bare and wrapped in
+MetricsMiddleware. Result caching is off so every call reaches SQLite. Run
+from the backend directory:
+
+    python -m benchmarks.bench_metrics [--transactions 200000] [--calls 2000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.asgi_client import lifespan, request
+from benchmarks.bench_rollup import measure
+from benchmarks.generate_ledger import generate
+from db import BudgetTracker
+from metrics import MetricsMiddleware, render, request_histogram
+
+
+def method_cases(tracker: BudgetTracker):
+    month = tracker.financial_month()
+    return {
+        "list_accounts": lambda: tracker.list_accounts(),
+        "list_transactions(limit=50)": lambda: tracker.list_transactions(limit=50),
+        "list_transactions(month)": lambda: tracker.list_transactions(month=month, limit=50),
+        "get_performance_data": lambda: tracker.get_performance_data(),
+        "record_transaction": lambda: tracker.record_transaction("account-0", "category-0", 1.25, "bench"),
+    }
+
+
+async def route_timings(app, calls: int):
+    """p50 ms per URL for the bare app and for the app behind MetricsMiddleware, sharing one lifespan"""
+    urls = ["/accounts/", "/transactions/?limit=50", "/settings/performance"]
+    targets = {"off": app, "on": MetricsMiddleware(app, request_histogram())}
+    timings = {url: {} for url in urls}
+    async with lifespan(app):
+        for url in urls:
+            for label, target in targets.items():
+                samples = []
+                for _ in range(calls):
+                    start = time.perf_counter()
+                    await request(target, "GET", url)
+                    samples.append((time.perf_counter() - start) * 1000)
+                samples.sort()
+                timings[url][label] = samples[len(samples) // 2]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, transactions=args.transactions, progress=None)
+
+        print(f"{'method':<30} {'off p50 ms':>11} {'on p50 ms':>11} {'overhead':>9}")
+        plain = BudgetTracker(path, cache_results=False)
+        timed = BudgetTracker(path, cache_results=False, instrument=True)
+        off_cases, on_cases = method_cases(plain), method_cases(timed)
+        for name in off_cases:
+            # Interleaved rounds, best of each, so drift in the machine hits both sides alike
+            rounds = [(measure(off_cases[name], args.calls)[0], measure(on_cases[name], args.calls)[0])
+                      for _ in range(5)]
+            off, on = min(r[0] for r in rounds), min(r[1] for r in rounds)
+            print(f"{name:<30} {off:>11.4f} {on:>11.4f} {(on / off - 1) * 100:>+8.1f}%")
+        scrape = measure(lambda: render(timed), 200)[0]
+        print(f"rendering /metrics for the instrumented tracker: {scrape:.3f} ms p50")
+        plain.close()
+        timed.close()
+
+        os.environ["BUDGET_DB_PATH"] = path
+        os.environ["BUDGET_RESULT_CACHE"] = "0"
+        import main as app_module
+        timings = asyncio.run(route_timings(app_module.app, args.calls))
+        print(f"\n{'route':<30} {'off p50 ms':>11} {'on p50 ms':>11} {'overhead':>9}")
+        for url, p50 in timings.items():
+            print(f"{url:<30} {p50['off']:>11.4f} {p50['on']:>11.4f} {(p50['on'] / p50['off'] - 1) * 100:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cost of request profiling: the same requests with the middleware absent, idle, sampling and profiling.
+
+"idle" is the middleware installed with no request picked, which is what
+every untriggered request pays. "sampling" stack-samples every request, as
+BUDGET_PROFILE_SLOW_MS does, with a threshold nothing reaches. "cProfile"
+profiles every request and writes it to the ring. Run from the backend
+directory:
+
+    python -m benchmarks.bench_profiling [--transactions 200000] [--calls 1000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.asgi_client import lifespan, request
+from benchmarks.generate_ledger import generate
+from profiling import ProfileRing, ProfilingMiddleware
+
+URLS = ["/accounts/", "/transactions/?limit=50", "/settings/performance"]
+
+
+async def timings(app, targets, calls: int):
+    """p50 ms per URL and target, interleaving targets round by round so drift hits all alike"""
+    samples = {url: {label: [] for label in targets} for url in URLS}
+    async with lifespan(app):
+        for url in URLS:
+            for _ in range(calls):
+                for label, target in targets.items():
+                    start = time.perf_counter()
+                    await request(target, "GET", url)
+                    samples[url][label].append((time.perf_counter() - start) * 1000)
+    return {url: {label: sorted(s)[len(s) // 2] for label, s in by_target.items()}
+            for url, by_target in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, transactions=args.transactions, progress=None)
+        os.environ["BUDGET_DB_PATH"] = path
+        os.environ["BUDGET_RESULT_CACHE"] = "0"
+        import main as app_module
+
+        app = app_module.app
+        ring = ProfileRing(os.path.join(tmp, "profiles"), keep=20)
+        targets = {
+            "off": app,
+            "idle": ProfilingMiddleware(app, ring),
+            "sampling": ProfilingMiddleware(app, ring, slow_ms=60_000),
+            "cProfile": ProfilingMiddleware(app, ring, sample_rate=1.0),
+        }
+        results = asyncio.run(timings(app, targets, args.calls))
+
+        print(f"{'p50 ms':<26}" + "".join(f"{label:>11}" for label in targets))
+        for url, by_target in results.items():
+            print(f"{url:<26}" + "".join(f"{by_target[label]:>11.4f}" for label in targets))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Dashboard reads from the monthly rollup versus re-aggregating the ledger.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_rollup [--transactions 1000000] [--calls 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from db import BudgetTracker, financial_month_bounds, to_epoch
+
+CATEGORIES = 20
+MONTHS = 24
+
+
+def fill_ledger(tracker: BudgetTracker, transactions: int):
+    """Bulk-load synthetic transactions straight into the ledger, then rebuild the rollups.
+
+    Returns the time taken by the monthly rebuild.
+    """
+    rng = random.Random(7)
+    tracker.add_account("bench", 0.0)
+    for i in range(CATEGORIES):
+        tracker.add_category(f"category-{i}", 5_000.0)
+    current = tracker.financial_month()
+    year, month = map(int, current.split("-"))
+    months = []
+    for offset in range(MONTHS):
+        m = month - offset
+        y = year + (m - 1) // 12
+        months.append(f"{y:04d}-{(m - 1) % 12 + 1:02d}")
+    # Each row gets a date inside its financial month so the daily rollup is realistic too
+    start_day = tracker.get_financial_month_start_day()
+    spans = []
+    for m in months:
+        start, next_start = financial_month_bounds(m, start_day)
+        spans.append((to_epoch(start), to_epoch(next_start) - to_epoch(start)))
+
+    with tracker._connection() as conn:
+        account_id = conn.execute("SELECT id FROM accounts WHERE account_name = 'bench'").fetchone()[0]
+        category_ids = [row[0] for row in conn.execute('SELECT id FROM categories ORDER BY id')]
+        picks = (rng.randrange(MONTHS) for _ in range(transactions))
+        rows = (
+            (spans[i][0] + rng.randrange(spans[i][1]), months[i], account_id,
+             category_ids[rng.randrange(CATEGORIES)], rng.randrange(100, 50_000), "synthetic")
+            for i in picks
+        )
+        conn.executemany('''
+            INSERT INTO transactions (date, month, account_id, category_id, amount, description)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+    start = time.perf_counter()
+    tracker.rebuild_monthly_totals()
+    elapsed = time.perf_counter() - start
+    tracker.rebuild_daily_totals()
+    return elapsed
+
+
+def ledger_aggregate(tracker: BudgetTracker):
+    """The pre-rollup read path: re-sum the current month from raw transactions"""
+    with tracker._connection() as conn:
+        return conn.execute('''
+            SELECT category_id, SUM(amount) FROM transactions WHERE month = ? GROUP BY category_id
+        ''', (tracker.financial_month(),)).fetchall()
+
+
+def measure(fn, calls: int):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = BudgetTracker(os.path.join(tmp, "bench.db"), cache_results=False)
+        rebuild = fill_ledger(tracker, args.transactions)
+        print(f"rebuild_monthly_totals over {args.transactions} rows: {rebuild * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        mismatches = tracker.verify_monthly_totals()
+        print(f"verify_monthly_totals: {(time.perf_counter() - start) * 1000:.1f} ms, {len(mismatches)} mismatches")
+
+        cases = {
+            "ledger GROUP BY (before)": lambda: ledger_aggregate(tracker),
+            "list_categories (rollup)": tracker.list_categories,
+            "get_performance_data (rollup)": tracker.get_performance_data,
+            "record_transaction": lambda: tracker.record_transaction("bench", "category-0", 1.0, "bench"),
+        }
+        print(f"{'operation':<32} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, fn in cases.items():
+            p50, p95 = measure(fn, args.calls)
+            print(f"{name:<32} {p50:>9.3f} {p95:>9.3f}")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
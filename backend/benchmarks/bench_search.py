@@ -0,0 +1,85 @@
+"""Description search: the FTS5-backed search_transactions versus LIKE '%term%' over the ledger.
+
+Both sides return the same 50-row page with the same filters; LIKE walks the
+ledger newest first and stops at the 50th match, so it is cheapest when the
+term is common and pays for a full pass when it is rare. Descriptions come
+from benchmarks.generate_ledger (merchant names plus a four-digit reference).
+Run from the backend directory:
+
+    python -m benchmarks.bench_search [--transactions 2000000] [--calls 20]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+
+from benchmarks.bench_rollup import measure
+from benchmarks.generate_ledger import generate
+from db import BudgetTracker
+
+
+def like_search(tracker: BudgetTracker, term: str, month=None, account_name=None, category=None, limit=50):
+    """What finding a description costs without the index"""
+    where, params = tracker._transaction_filters(month, month, account_name, category)
+    where = where.replace(' WHERE ', ' AND ', 1)
+    with tracker._connection() as conn:
+        return conn.execute(f'''
+            SELECT t.id, t.date, t.month, a.account_name, c.category_name, t.amount, t.description
+            FROM transactions t
+            JOIN accounts a ON a.id = t.account_id
+            JOIN categories c ON c.id = t.category_id
+            WHERE t.description LIKE ?{where}
+            ORDER BY t.date DESC
+            LIMIT ?
+        ''', [f'%{term}%'] + params + [limit]).fetchall()
+
+
+def index_sizes(path: str):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute('''
+            SELECT CASE WHEN name LIKE 'transactions_fts%' THEN 'transactions_fts (all shadow tables)' ELSE name END,
+                   SUM(pgsize)
+            FROM dbstat
+            WHERE name = 'transactions' OR name LIKE 'transactions_fts%'
+            GROUP BY 1
+        ''').fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=2_000_000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate(path, transactions=args.transactions, progress=None)
+        tracker = BudgetTracker(path, cache_results=False)
+        month = tracker.financial_month()
+
+        # (label, search text, LIKE term, filters)
+        cases = [
+            ("rare reference", "4821", "4821", {}),
+            ("common merchant", "uber", "uber", {}),
+            ("prefix", "starb", "starb", {}),
+            ("two words", "uber eats", "uber eats", {}),
+            ("merchant + filters", "tesco", "tesco",
+             {"month": month, "account_name": "account-1", "category": "category-3"}),
+            ("no match", "zzzz", "zzzz", {}),
+        ]
+        print(f"{args.transactions:,} transactions")
+        print(f"{'search':<22} {'rows':>5} {'FTS5 p50 ms':>12} {'LIKE p50 ms':>12}")
+        for label, text, term, filters in cases:
+            rows = len(tracker.search_transactions(text, **filters)["transactions"])
+            fts = measure(lambda: tracker.search_transactions(text, **filters), args.calls)[0]
+            like = measure(lambda: like_search(tracker, term, **filters), args.calls)[0]
+            print(f"{label:<22} {rows:>5} {fts:>12.3f} {like:>12.3f}")
+        tracker.close()
+
+        print()
+        for name, size in index_sizes(path).items():
+            print(f"{name:<40} {size / 1e6:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Import time of the app and cold/warm start cost of the application tracker.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup [--repeat 20]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from db import BudgetTracker
+from migrations import MIGRATIONS
+
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def time_import(repeat: int) -> float:
+    """Median wall time of `import main` in a fresh interpreter"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=backend_dir, BUDGET_DB_PATH=os.path.join(tmp, "budget.db"))
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=tmp, env=env,
+                                 capture_output=True, text=True, check=True)
+            samples.append(float(out.stdout.strip()))
+    return statistics.median(samples)
+
+
+def time_tracker_start(path: str, repeat: int, fresh: bool) -> float:
+    """Median time to construct (and close) a BudgetTracker"""
+    samples = []
+    for _ in range(repeat):
+        if fresh:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        start = time.perf_counter()
+        BudgetTracker(path).close()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def time_legacy_setup(path: str, repeat: int) -> float:
+    """Median time of the old start-up: four full schema setups, one per module"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(4):
+            with sqlite3.connect(path) as conn:
+                MIGRATIONS[0](conn.cursor())
+                conn.commit()
+            conn.close()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "budget.db")
+        cold = time_tracker_start(path, args.repeat, fresh=True)
+        warm = time_tracker_start(path, args.repeat, fresh=False)
+        legacy = time_legacy_setup(path, args.repeat)
+
+    print(f"{'import main':<36} {time_import(max(3, args.repeat // 4)) * 1000:>8.2f} ms")
+    print(f"{'tracker start, new database':<36} {cold * 1000:>8.2f} ms")
+    print(f"{'tracker start, current database':<36} {warm * 1000:>8.2f} ms")
+    print(f"{'legacy 4x setup_database()':<36} {legacy * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
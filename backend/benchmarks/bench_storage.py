@@ -0,0 +1,88 @@
+"""REAL amounts and TEXT dates (schema v6) versus integer cents and epoch seconds (v7).
+
+Builds a v6 database, copies it and upgrades the copy in place with
+migration 7, then compares file and index sizes, aggregate speed and the
+drift of a float SUM over the whole ledger.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_storage [--transactions 500000] [--calls 20]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.bench_keys import INTEGER_KEYS_VERSION, build_name_keyed, object_sizes, timed, upgrade
+from db import to_epoch
+
+TYPED_VERSION = 7
+QUARTER = (datetime(2024, 4, 1), datetime(2024, 7, 1))
+
+AGGREGATES = {
+    "spend by month": ('''
+        SELECT month, SUM(amount) FROM transactions GROUP BY month
+    ''', None),
+    "one quarter by date range": ('''
+        SELECT COUNT(*), SUM(amount) FROM transactions WHERE date >= ? AND date < ?
+    ''', QUARTER),
+    "last 1000 by date": ('''
+        SELECT id, date, amount FROM transactions ORDER BY date DESC LIMIT 1000
+    ''', None),
+}
+
+
+def bound(version: int, date: datetime):
+    """A date literal in the column's storage format"""
+    return to_epoch(date) if version >= TYPED_VERSION else date.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=500_000)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before = os.path.join(tmp, "real.db")
+        after = os.path.join(tmp, "typed.db")
+        build_name_keyed(before, args.transactions)
+        upgrade(before, INTEGER_KEYS_VERSION)
+        shutil.copy(before, after)
+
+        start = time.perf_counter()
+        upgrade(after, TYPED_VERSION)
+        print(f"in-place migration of {args.transactions} rows: {time.perf_counter() - start:.2f} s")
+
+        results = {}
+        for path in (before, after):
+            conn = sqlite3.connect(path)
+            conn.execute('VACUUM')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            row = {"file": os.path.getsize(path), "sizes": object_sizes(conn)}
+            for name, (sql, dates) in AGGREGATES.items():
+                params = tuple(bound(version, date) for date in dates) if dates else ()
+                row[name] = timed(lambda: conn.execute(sql, params).fetchall(), args.calls)
+            row["total"] = conn.execute('SELECT SUM(amount) FROM transactions').fetchone()[0]
+            conn.close()
+            results[version] = row
+
+        old, new = results[INTEGER_KEYS_VERSION], results[TYPED_VERSION]
+        print(f"\n{'bytes':<34} {'REAL / TEXT':>12} {'cents / epoch':>14}")
+        print(f"{'database file':<34} {old['file']:>12,} {new['file']:>14,}")
+        for name in sorted(set(old["sizes"]) | set(new["sizes"])):
+            print(f"{name:<34} {old['sizes'].get(name, 0):>12,} {new['sizes'].get(name, 0):>14,}")
+
+        print(f"\n{'median ms':<34} {'REAL / TEXT':>12} {'cents / epoch':>14}")
+        for name in AGGREGATES:
+            print(f"{name:<34} {old[name]:>12.2f} {new[name]:>14.2f}")
+
+        print(f"\nledger total: float SUM {old['total']!r}, integer SUM {new['total']} cents, "
+              f"drift {old['total'] - new['total'] / 100:+.10f}")
+
+
+if __name__ == "__main__":
+    main()
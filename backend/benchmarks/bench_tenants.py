@@ -0,0 +1,131 @@
+"""Multi-tenant throughput: requests spread over many tenant databases with a Zipf-skewed access pattern.
+
+Every tenant starts as a copy of one small seeded database. Requests go
+through the real app with X-Tenant-ID set, drawn so the k-th most popular
+tenant is picked with weight 1/k^s; the mix is mostly dashboard reads with
+some writes. Each run swaps in a TenantRegistry with a different descriptor
+cap, from one open tenant (every request reopens) to all of them fitting.
+Run from the backend directory:
+
+    python -m benchmarks.bench_tenants [--tenants 10000] [--requests 20000] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.asgi_client import lifespan, request
+from db import BudgetTracker
+from tenants import TenantRegistry
+
+
+def seed_template(path: str):
+    tracker = BudgetTracker(path)
+    for i in range(3):
+        tracker.add_account(f"account-{i}", 1_000.0)
+    for i in range(8):
+        tracker.add_category(f"category-{i}", 500.0)
+    tracker.record_transactions(
+        {"account_name": f"account-{i % 3}", "category": f"category-{i % 8}", "amount": 2.5, "description": f"seed {i}"}
+        for i in range(200)
+    )
+    # Closing the last connection checkpoints the WAL, leaving one file to copy
+    tracker.close()
+
+
+def open_files() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+async def run(app, tenants, requests: int, concurrency: int, skew: float, seed: int):
+    """Send requests from `concurrency` workers; returns (elapsed s, sorted latencies ms, peak open files)"""
+    weights = list(itertools.accumulate(1 / k ** skew for k in range(1, len(tenants) + 1)))
+    rng = random.Random(seed)
+    picks = iter(rng.choices(tenants, cum_weights=weights, k=requests))
+    kinds = iter(rng.choices(["accounts", "categories", "record"], weights=[8, 1, 1], k=requests))
+    latencies, peak = [], open_files()
+
+    async def worker():
+        nonlocal peak
+        for tenant, kind in zip(picks, kinds):
+            headers = {"X-Tenant-ID": tenant}
+            start = time.perf_counter()
+            if kind == "record":
+                status, _, body = await request(app, "PUT", "/categories/recordTransaction", {
+                    "account_name": "account-0", "category": "category-0", "amount": 1.25, "description": "bench",
+                }, headers=headers)
+            else:
+                status, _, body = await request(app, "GET", f"/{kind}/", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status != 200:
+                raise RuntimeError(f"{tenant} {kind} returned {status}: {body[:200]!r}")
+            if len(latencies) % 500 == 0:
+                peak = max(peak, open_files())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), max(peak, open_files())
+
+
+async def benchmark(app, directory: str, tenants, caps, args):
+    rows = []
+    async with lifespan(app):
+        app.state.tenants.close()
+        for max_files in caps:
+            registry = TenantRegistry(directory, max_files=max_files, pool_size=args.pool_size)
+            app.state.tenants = registry
+            baseline = open_files()
+            elapsed, latencies, peak = await run(app, tenants, args.requests, args.concurrency, args.skew, args.seed)
+            stats = registry.stats()
+            registry.close()
+            rows.append((max_files, registry.max_open, args.requests / elapsed,
+                         latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)],
+                         stats["hits"] / (stats["hits"] + stats["opens"]), stats["opens"], peak - baseline))
+        # The lifespan closes whatever registry it finds
+        app.state.tenants = TenantRegistry(directory, max_files=8)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent s")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--max-files", default="5,100,1000,5000,50000", help="comma-separated descriptor caps")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, "tenants")
+        os.makedirs(directory)
+        template = os.path.join(tmp, "template.db")
+        seed_template(template)
+        start = time.perf_counter()
+        tenants = [f"tenant-{i}" for i in range(args.tenants)]
+        for tenant in tenants:
+            shutil.copyfile(template, os.path.join(directory, f"{tenant}.db"))
+        print(f"{args.tenants:,} tenants of {os.path.getsize(template) / 1e3:.0f} KB copied in "
+              f"{time.perf_counter() - start:.1f} s; {args.requests:,} requests, {args.concurrency} concurrent, "
+              f"Zipf s={args.skew}")
+
+        os.environ["BUDGET_TENANT_DIR"] = directory
+        import main as app_module
+
+        caps = [int(cap) for cap in args.max_files.split(",")]
+        rows = asyncio.run(benchmark(app_module.app, directory, tenants, caps, args))
+
+        print(f"{'max files':>10} {'max open':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'hit rate':>9} {'opens':>7} {'peak fds':>9}")
+        for max_files, max_open, throughput, p50, p99, hit_rate, opens, peak in rows:
+            print(f"{max_files:>10,} {max_open:>9,} {throughput:>9.0f} {p50:>8.2f} {p99:>8.2f} "
+                  f"{hit_rate:>9.1%} {opens:>7,} {peak:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""24-month category trends: the rollup-backed get_trends versus aggregating the ledger.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_trends [--transactions 5000000] [--calls 50]
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.bench_rollup import MONTHS, fill_ledger, measure
+from db import BudgetTracker
+from trends import month_range
+
+
+def per_month_requests(tracker: BudgetTracker, months):
+    """What a chart costs today: one ledger aggregate per month"""
+    with tracker._connection() as conn:
+        return [
+            conn.execute('''
+                SELECT category_id, SUM(amount) FROM transactions WHERE month = ? GROUP BY category_id
+            ''', (month,)).fetchall()
+            for month in months
+        ]
+
+
+def ledger_single_pass(tracker: BudgetTracker, months):
+    """One GROUP BY month, category over the ledger range, without the rollup"""
+    with tracker._connection() as conn:
+        return conn.execute('''
+            SELECT month, category_id, SUM(amount) FROM transactions
+            WHERE month BETWEEN ? AND ?
+            GROUP BY month, category_id
+        ''', (months[0], months[-1])).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=5_000_000)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracker = BudgetTracker(os.path.join(tmp, "bench.db"), cache_results=False)
+        fill_ledger(tracker, args.transactions)
+        months = month_range(tracker.financial_month(), MONTHS)
+
+        cases = {
+            f"{MONTHS} per-month ledger queries": lambda: per_month_requests(tracker, months),
+            "ledger GROUP BY month, category": lambda: ledger_single_pass(tracker, months),
+            "get_trends (rollup)": lambda: tracker.get_trends(MONTHS),
+        }
+        print(f"{args.transactions} transactions, {MONTHS} months")
+        print(f"{'operation':<34} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, fn in cases.items():
+            p50, p95 = measure(fn, args.calls)
+            print(f"{name:<34} {p50:>9.3f} {p95:>9.3f}")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
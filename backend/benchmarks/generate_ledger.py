@@ -0,0 +1,154 @@
+"""Fill a budget database with a synthetic ledger spread across financial months.
+
+Rows are generated inside SQLite from a recursive CTE, so tens of millions
+load without building Python tuples. Dates rise with the row id, as in a real
+ledger, which keeps every date-ordered index insert near the right-hand edge.
+Other values come from multiplicative hashes of the row number and --seed, so
+the same arguments produce the same ledger.
+Running it again on the same database appends to it. Run from the backend
+directory:
+
+    python -m benchmarks.generate_ledger [--db budget.db] [--accounts 5] [--categories 20]
+        [--transactions 1000000] [--months 24] [--seed 1]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Dict
+
+from db import _FINANCIAL_MONTH_SQL, BudgetTracker, financial_month_bounds, to_cents, to_epoch
+from trends import month_range
+
+OPENING_BALANCE = 10_000.0
+CATEGORY_LIMIT = 2_000.0
+CHUNK_ROWS = 1_000_000
+
+# Descriptions are a merchant plus a four-digit reference, so searches see a
+# small shared vocabulary and a long tail of rare terms, as in a bank statement
+MERCHANTS = [
+    "UBER TRIP", "UBER EATS", "TESCO STORES", "SAINSBURYS", "AMAZON MARKETPLACE", "NETFLIX", "SPOTIFY",
+    "SHELL FUEL", "BP FUEL", "STARBUCKS", "COSTA COFFEE", "PRET A MANGER", "DELIVEROO", "JUST EAT",
+    "TFL TRAVEL", "TRAINLINE", "APPLE ITUNES", "GOOGLE PLAY", "BOOTS PHARMACY", "ARGOS", "IKEA",
+    "JOHN LEWIS", "MARKS SPENCER", "WAITROSE", "ALDI", "LIDL", "ASDA", "CO-OP FOOD", "GREGGS",
+    "MCDONALDS", "KFC", "NANDOS", "PIZZA EXPRESS", "VIRGIN MEDIA", "BRITISH GAS", "THAMES WATER",
+    "COUNCIL TAX", "PUREGYM", "ODEON CINEMA", "STEAM GAMES",
+]
+
+# Dates step evenly through the span with up to one step of jitter. The rest
+# are Knuth-style multiplicative hashes of the row number, one multiplier per
+# column; the high bits pick accounts and categories, which are better mixed
+GENERATE_SQL = f'''
+    WITH RECURSIVE
+        n(i) AS (SELECT ? UNION ALL SELECT i + 1 FROM n WHERE i < ?),
+        g AS (
+            SELECT i,
+                   ? + CAST((i - ?) * ? AS INTEGER) + ((i * 2654435761 + ?) % 4294967296) % ? AS date,
+                   (((i * 2246822519 + ?) % 4294967296) >> 16) % ? AS account_key,
+                   (((i * 3266489917 + ?) % 4294967296) >> 16) % ? AS category_key,
+                   100 + ((i * 668265263 + ?) % 4294967296) % 50000 AS amount,
+                   (((i * 1597334677 + ?) % 4294967296) >> 16) % ? AS merchant_key,
+                   ((i * 3812015801 + ?) % 4294967296) % 10000 AS reference
+            FROM n
+        )
+    INSERT INTO transactions (date, month, account_id, category_id, amount, description)
+    SELECT g.date, {_FINANCIAL_MONTH_SQL}, a.id, c.id, g.amount, m.name || ' ' || printf('%04d', g.reference)
+    FROM g
+    JOIN temp.generated_accounts a ON a.key = g.account_key
+    JOIN temp.generated_categories c ON c.key = g.category_key
+    JOIN temp.generated_merchants m ON m.key = g.merchant_key
+'''
+
+
+def key_tables(conn, accounts: int, categories: int):
+    """Temp tables mapping the hashed keys 0..n-1 to account and category ids, and to merchants"""
+    for table, source, name, count in (("generated_accounts", "accounts", "account", accounts),
+                                       ("generated_categories", "categories", "category", categories)):
+        conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS {table} (key INTEGER PRIMARY KEY, id INTEGER)')
+        conn.execute(f'DELETE FROM temp.{table}')
+        conn.executemany(f'INSERT INTO temp.{table} SELECT ?, id FROM {source} WHERE {name}_name = ?',
+                         [(k, f"{name}-{k}") for k in range(count)])
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS generated_merchants (key INTEGER PRIMARY KEY, name TEXT)')
+    conn.execute('DELETE FROM temp.generated_merchants')
+    conn.executemany('INSERT INTO temp.generated_merchants VALUES (?, ?)', enumerate(MERCHANTS))
+
+
+def generate(path: str, accounts: int = 5, categories: int = 20, transactions: int = 1_000_000,
+             months: int = 24, seed: int = 1, progress=print) -> Dict:
+    """Add accounts, categories and transactions dated over the last `months` financial months"""
+    tracker = BudgetTracker(path, cache_results=False)
+    try:
+        start_day = tracker.get_financial_month_start_day()
+        first_month = month_range(tracker.financial_month(), months)[0]
+        first = to_epoch(financial_month_bounds(first_month, start_day)[0])
+        span = max(to_epoch(datetime.now()) - first, 1)
+        step = span / max(transactions, 1)
+        shift = f'-{start_day - 1} days'
+
+        with tracker._connection() as conn:
+            conn.executemany('INSERT OR IGNORE INTO accounts (account_name, balance) VALUES (?, ?)',
+                             [(f"account-{k}", to_cents(OPENING_BALANCE)) for k in range(accounts)])
+            conn.executemany('INSERT OR IGNORE INTO categories (category_name, monthly_limit) VALUES (?, ?)',
+                             [(f"category-{k}", to_cents(CATEGORY_LIMIT)) for k in range(categories)])
+
+        start = time.perf_counter()
+        with tracker._connection() as conn:
+            offset = conn.execute('SELECT COALESCE(MAX(id), 0) FROM transactions').fetchone()[0]
+        for low in range(1, transactions + 1, CHUNK_ROWS):
+            high = min(low + CHUNK_ROWS - 1, transactions)
+            with tracker._connection() as conn:
+                conn.execute('PRAGMA cache_size = -262144')
+                key_tables(conn, accounts, categories)
+                conn.execute(GENERATE_SQL, (
+                    offset + low, offset + high,
+                    first, offset + 1, step, seed, max(int(step), 1),
+                    seed, accounts,
+                    seed, categories,
+                    seed,
+                    seed, len(MERCHANTS),
+                    seed,
+                    shift,
+                ))
+            if progress:
+                rate = high / (time.perf_counter() - start)
+                progress(f"{high:,}/{transactions:,} transactions ({rate:,.0f} rows/s)")
+
+        # Balances start from the opening balance and follow the whole ledger
+        with tracker._connection() as conn:
+            conn.executemany('''
+                UPDATE accounts SET balance = ? - COALESCE(
+                    (SELECT SUM(amount) FROM transactions WHERE account_id = accounts.id), 0)
+                WHERE account_name = ?
+            ''', [(to_cents(OPENING_BALANCE), f"account-{k}") for k in range(accounts)])
+        monthly_rows = tracker.rebuild_monthly_totals()
+        daily_rows = tracker.rebuild_daily_totals()
+        checkpoint_rows = tracker.rebuild_balance_checkpoints()
+        if progress:
+            progress(f"rebuilt rollups: {monthly_rows:,} monthly and {daily_rows:,} daily rows; "
+                     f"{checkpoint_rows:,} balance checkpoints")
+        return {
+            "transactions": transactions,
+            "accounts": accounts,
+            "categories": categories,
+            "months": months,
+            "seed": seed,
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+    finally:
+        tracker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="budget.db", help="path to the SQLite database")
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=24, help="financial months to spread dates over")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    result = generate(args.db, args.accounts, args.categories, args.transactions, args.months, args.seed)
+    print(f"generated {result['transactions']:,} transactions in {result['seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
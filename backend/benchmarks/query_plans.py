@@ -0,0 +1,227 @@
+"""Fail if any BudgetTracker query falls back to a full SCAN of transactions.
+
+Every public BudgetTracker method is exercised against a seeded database
+while a trace callback on every connection it opens, pooled or dedicated,
+records the SQL it runs. Each statement that touches the transactions table
+is then run through EXPLAIN QUERY PLAN, and a method expected to query the
+table that issued nothing seen fails too.
+
+Run from the backend directory (exit status 1 on a regression):
+
+    python -m benchmarks.query_plans
+"""
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from db import BudgetTracker
+
+# A plan line like "SCAN transactions" reads every row of the table. Index
+# scans ("SCAN transactions USING COVERING INDEX ...") are reported separately
+# and only tolerated for methods that are whole-ledger passes by design. Plan
+# lines name the table by its alias when the statement gives it one
+TRANSACTIONS = re.compile(r'\btransactions\b')
+ALIAS = re.compile(
+    r'\btransactions\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|SET|GROUP|ORDER|LIMIT|USING|LEFT|INNER|CROSS|UNION|'
+    r'INDEXED|NOT|DEFAULT|VALUES)\b)(\w+)', re.IGNORECASE)
+
+
+def scan_patterns(sql: str) -> Tuple["re.Pattern[str]", "re.Pattern[str]"]:
+    """(table scan, index scan) plan-line patterns for transactions under every name the statement uses"""
+    names = "|".join(re.escape(name) for name in {"transactions", *ALIAS.findall(sql)})
+    return re.compile(rf'^SCAN (?:{names})$'), re.compile(rf'^SCAN (?:{names}) USING')
+
+# Methods allowed to walk a whole index (never the table itself)
+FULL_PASS_METHODS = {
+    "rebuild_monthly_totals", "verify_monthly_totals", "rebucket_transactions", "rebuild_balance_checkpoints",
+}
+
+# Methods allowed to read the table itself. The daily rollup groups by day
+# and category, and the covering (date, category_id, amount) index that would
+# avoid this would break the (date, id) order keyset pagination walks
+TABLE_PASS_METHODS = {"rebuild_daily_totals", "verify_daily_totals"}
+
+# Keyset-paginated methods may walk an index because LIMIT stops them after
+# one page, but must read rows in index order: a sort step would make every
+# page cost as much as materialising the whole filtered set
+SORTED = re.compile(r'USE TEMP B-TREE FOR ORDER BY')
+PAGED_METHODS = {"list_transactions"}
+
+# Streamed methods must not sort either: a sort materialises every matching
+# row before the first one can be sent
+STREAMED_METHODS = {"iter_transactions"}
+
+# Methods whose exercises must issue statements on transactions. One that
+# captures none has moved its queries somewhere the trace cannot see, which
+# would otherwise pass the check silently
+EXPECTED_METHODS = {
+    "update_account", "delete_account", "delete_category", "record_transaction", "record_transactions",
+    "list_transactions", "iter_transactions", "search_transactions", "recategorize_transactions",
+    "delete_transactions", "get_balance_history", "rebucket_transactions", "rebuild_monthly_totals",
+    "verify_monthly_totals", "rebuild_daily_totals", "verify_daily_totals", "rebuild_balance_checkpoints",
+    "verify_balances",
+}
+
+
+class CheckedStatement(NamedTuple):
+    method: str
+    sql: str
+    details: List[str]
+    # Plan lines that break the method's rules; empty when the plan is fine
+    bad: List[str]
+
+
+def seed(tracker: BudgetTracker):
+    for i in range(3):
+        tracker.add_account(f"account-{i}", 1000.0)
+    for i in range(5):
+        tracker.add_category(f"category-{i}", 500.0)
+    for i in range(500):
+        tracker.record_transaction(f"account-{i % 3}", f"category-{i % 5}", 2.0, f"seed {i}")
+    tracker.add_account("empty-account", 0.0)
+    tracker.add_category("empty-category", 0.0)
+    with tracker._connection() as conn:
+        conn.execute('ANALYZE')
+
+
+def exercises() -> List[Tuple[str, Callable[[BudgetTracker], object]]]:
+    """One call per public BudgetTracker method"""
+    return [
+        ("get_financial_month_start_day", lambda t: t.get_financial_month_start_day()),
+        ("financial_month", lambda t: t.financial_month()),
+        ("get_financial_month_dates", lambda t: t.get_financial_month_dates()),
+        ("days_remaining_in_financial_month", lambda t: t.days_remaining_in_financial_month()),
+        ("get_performance_data", lambda t: t.get_performance_data()),
+        ("list_accounts", lambda t: t.list_accounts()),
+        ("list_categories", lambda t: t.list_categories()),
+        ("add_account", lambda t: t.add_account("new-account", 10.0)),
+        ("update_account", lambda t: t.update_account("new-account", "renamed-account", 20.0)),
+        ("delete_account", lambda t: t.delete_account("empty-account")),
+        ("add_category", lambda t: t.add_category("new-category", 10.0)),
+        ("update_category", lambda t: t.update_category("new-category", 20.0)),
+        ("delete_category", lambda t: t.delete_category("empty-category")),
+        ("record_transaction", lambda t: t.record_transaction("account-0", "category-0", 1.0, "check")),
+        ("record_transactions", lambda t: t.record_transactions([
+            {"account_name": "account-1", "category": "category-1", "amount": 1.0, "description": "batch"},
+        ])),
+        ("set_financial_month_start_day", lambda t: t.set_financial_month_start_day(25)),
+        ("list_transactions", lambda t: t.list_transactions(limit=10)),
+        ("list_transactions", lambda t: t.list_transactions(
+            month=t.financial_month(), limit=10, cursor=t.list_transactions(limit=10)["nextCursor"])),
+        ("list_transactions", lambda t: t.list_transactions(account_name="account-1", category="category-1", limit=10)),
+        ("iter_transactions", lambda t: list(t.iter_transactions(start_month="2000-01", end_month="2000-03"))),
+        ("iter_transactions", lambda t: list(t.iter_transactions(
+            start_month=t.financial_month(), end_month=t.financial_month()))),
+        ("iter_transactions", lambda t: list(t.iter_transactions(account_name="account-1"))),
+        ("iter_transactions", lambda t: list(t.iter_transactions(category="category-1"))),
+        ("search_transactions", lambda t: t.search_transactions("seed 1")),
+        ("search_transactions", lambda t: t.search_transactions(
+            "se", month=t.financial_month(), account_name="account-1", category="category-1")),
+        ("recategorize_transactions", lambda t: t.recategorize_transactions("category-2", ids=[1, 2, 3])),
+        ("recategorize_transactions", lambda t: t.recategorize_transactions(
+            "category-3", month=t.financial_month(), category="category-2")),
+        ("delete_transactions", lambda t: t.delete_transactions([4, 5, 6])),
+        ("delete_transactions", lambda t: t.delete_transactions(month=t.financial_month(), account_name="account-2")),
+        ("get_trends", lambda t: t.get_trends(24)),
+        ("get_balance_history", lambda t: t.get_balance_history("account-1")),
+        ("get_balance_history", lambda t: t.get_balance_history("account-2", "2000-01-01", None, "month")),
+        ("rebucket_transactions", lambda t: t.rebucket_transactions(chunk_size=100)),
+        ("rebuild_monthly_totals", lambda t: t.rebuild_monthly_totals()),
+        ("verify_monthly_totals", lambda t: t.verify_monthly_totals()),
+        ("rebuild_daily_totals", lambda t: t.rebuild_daily_totals()),
+        ("verify_daily_totals", lambda t: t.verify_daily_totals()),
+        ("rebuild_balance_checkpoints", lambda t: t.rebuild_balance_checkpoints()),
+        ("verify_balances", lambda t: t.verify_balances()),
+    ]
+
+
+def capture_statements(tracker: BudgetTracker) -> Dict[str, List[str]]:
+    """Run every exercise and return the SQL each one issued, keyed by method"""
+    captured: Dict[str, List[str]] = {}
+    current: List[str] = []
+    pool = tracker._pool
+    opener = pool._open
+
+    def traced_open() -> sqlite3.Connection:
+        conn = opener()
+        conn.set_trace_callback(current.append)
+        return conn
+
+    # Every connection opened from here on, pooled or dedicated, is traced,
+    # as is the one the tracker already pooled (pool_size=1 keeps it to one)
+    pool._open = traced_open
+    conn = pool.acquire()
+    conn.set_trace_callback(current.append)
+    pool.release(conn)
+
+    for name, call in exercises():
+        current.clear()
+        call(tracker)
+        captured.setdefault(name, []).extend(sql for sql in current if TRANSACTIONS.search(sql))
+    return captured
+
+
+def plan(conn: sqlite3.Connection, sql: str) -> List[str]:
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+
+
+def check_plans() -> Tuple[List[CheckedStatement], List[str]]:
+    """Plan every captured statement; returns them and the expected methods that captured none"""
+    checked: List[CheckedStatement] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.db")
+        seed_tracker = BudgetTracker(path)
+        seed(seed_tracker)
+        seed_tracker.close()
+
+        tracker = BudgetTracker(path, pool_size=1, cache_results=False)
+        captured = capture_statements(tracker)
+        tracker.close()
+
+        conn = sqlite3.connect(path)
+        for method, statements in captured.items():
+            for sql in statements:
+                statement = sql.lstrip().upper()
+                if statement.startswith('INSERT') and 'SELECT' not in statement:
+                    continue
+                if not statement.startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH', 'INSERT', 'CREATE TEMP TABLE')):
+                    continue
+                if statement.startswith('CREATE TEMP TABLE'):
+                    # Later statements read the temp table, so it must exist here too
+                    conn.execute(f'DROP TABLE IF EXISTS temp.{statement.split()[3]}')
+                    details = plan(conn, sql)
+                    conn.execute(sql)
+                else:
+                    details = plan(conn, sql)
+                table_scan, index_scan = scan_patterns(sql)
+                bad = [d for d in details if table_scan.match(d)] if method not in TABLE_PASS_METHODS else []
+                if method not in FULL_PASS_METHODS | PAGED_METHODS | TABLE_PASS_METHODS:
+                    bad += [d for d in details if index_scan.match(d)]
+                if method in PAGED_METHODS | STREAMED_METHODS:
+                    bad += [d for d in details if SORTED.search(d)]
+                checked.append(CheckedStatement(method, sql, details, bad))
+        conn.close()
+    missing = sorted(method for method in EXPECTED_METHODS if not captured.get(method))
+    return checked, missing
+
+
+def main() -> int:
+    checked, missing = check_plans()
+    for statement in checked:
+        status = "FAIL" if statement.bad else "ok"
+        print(f"[{status:>4}] {statement.method}: {' '.join(statement.sql.split())[:90]}")
+        for detail in statement.details:
+            print(f"         {detail}")
+    for method in missing:
+        print(f"[FAIL] {method}: no statement on transactions was captured")
+
+    failures = sum(1 for statement in checked if statement.bad)
+    print(f"\n{failures} statement(s) scan the transactions table" if failures else "\nno transactions scans")
+    return 1 if failures or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""Latency and throughput of every public BudgetTracker method and every HTTP route.
+
+Works on a copy of --db (see benchmarks.generate_ledger), or on a fresh
+synthetic ledger of --transactions rows when --db is not given, so runs
+never change the source database. Methods are called directly; routes go
+through main.app with the in-process ASGI client. Results are printed and
+written as JSON, and --compare prints the p50 change against an earlier
+run. Run from the backend directory:
+
+    python -m benchmarks.suite [--db budget.db | --transactions 200000] [--calls 100]
+        [--heavy-calls 5] [--only substring] [--no-cache]
+        [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.asgi_client import lifespan, request
+from benchmarks.generate_ledger import generate
+from db import BudgetTracker
+
+IMPORT_CSV = b"Date,Amount,Description\n2024-01-05,-12.50,Coffee\n2024-01-06,-40.00,Fuel\n"
+
+
+class Case:
+    """One benchmarked call; setup runs before every call and is not timed"""
+
+    def __init__(self, kind: str, name: str, call: Callable, setup: Optional[Callable] = None, heavy: bool = False):
+        self.kind = kind
+        self.name = name
+        self.call = call
+        self.setup = setup
+        self.heavy = heavy
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+
+def summarise(samples: List[float]) -> Dict:
+    """Percentiles in ms and sequential throughput for a list of per-call seconds"""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "calls": len(ordered),
+        "p50_ms": round(percentile(50), 4),
+        "p95_ms": round(percentile(95), 4),
+        "p99_ms": round(percentile(99), 4),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "ops_per_s": round(len(ordered) / sum(ordered), 1) if sum(ordered) else None,
+    }
+
+
+#   METHOD CASES
+def method_cases(tracker: BudgetTracker) -> List[Case]:
+    """One case per public BudgetTracker method, each safe to repeat"""
+    account = tracker.list_accounts()[0]["name"]
+    category = tracker.list_categories()[0]["name"]
+    month = tracker.financial_month()
+    start_day = tracker.get_financial_month_start_day()
+    counter = itertools.count()
+    names = [account, f"{account} (renamed)"]
+
+    def rename_account():
+        tracker.update_account(names[0], names[1], 10_000.0)
+        names.reverse()
+
+    def deep_cursor():
+        page = tracker.list_transactions(limit=50)
+        for _ in range(20):
+            page = tracker.list_transactions(limit=50, cursor=page["nextCursor"])
+        return page["nextCursor"]
+
+    cursor = deep_cursor()
+    description = tracker.list_transactions(limit=1)["transactions"][0]["description"].split()[0]
+    doomed: Dict[str, str] = {}
+
+    def make_doomed(kind: str):
+        doomed[kind] = f"bench-{kind}-{next(counter)}"
+        if kind == "account":
+            tracker.add_account(doomed[kind], 0.0)
+        else:
+            tracker.add_category(doomed[kind], 0.0)
+
+    def fill_bulk():
+        """100 fresh rows in bench-bulk-from, the category both bulk edits select"""
+        for name in ("bench-bulk-from", "bench-bulk-to"):
+            try:
+                tracker.add_category(name, 0.0)
+            except ValueError:
+                pass
+        tracker.record_transactions(
+            {"account_name": names[0], "category": "bench-bulk-from", "amount": 1.25, "description": "bench"}
+            for _ in range(100)
+        )
+
+    cases = [
+        ("setup_database", lambda: tracker.setup_database()),
+        ("store_version", lambda: tracker.store_version()),
+        ("cache_stats", lambda: tracker.cache_stats()),
+        ("pool_stats", lambda: tracker.pool_stats()),
+        ("get_financial_month_start_day", lambda: tracker.get_financial_month_start_day()),
+        ("set_financial_month_start_day", lambda: tracker.set_financial_month_start_day(start_day)),
+        ("financial_month", lambda: tracker.financial_month()),
+        ("get_financial_month_dates", lambda: tracker.get_financial_month_dates()),
+        ("days_remaining_in_financial_month", lambda: tracker.days_remaining_in_financial_month()),
+        ("get_performance_data", lambda: tracker.get_performance_data()),
+        ("get_trends", lambda: tracker.get_trends(12)),
+        ("get_balance_history", lambda: tracker.get_balance_history(account)),
+        ("get_balance_history[year by month]", lambda: tracker.get_balance_history(
+            account, (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d"), None, "month")),
+        ("list_accounts", lambda: tracker.list_accounts()),
+        ("list_categories", lambda: tracker.list_categories()),
+        ("list_transactions", lambda: tracker.list_transactions(limit=50)),
+        ("list_transactions[deep page]", lambda: tracker.list_transactions(limit=50, cursor=cursor)),
+        ("list_transactions[month]", lambda: tracker.list_transactions(month=month, limit=50)),
+        ("search_transactions", lambda: tracker.search_transactions(description)),
+        ("search_transactions[filters]",
+         lambda: tracker.search_transactions(description, month=month, account_name=account, category=category)),
+        ("list_transactions[account+category]",
+         lambda: tracker.list_transactions(account_name=account, category=category, limit=50)),
+        ("add_account", lambda: tracker.add_account(f"bench-account-{next(counter)}", 0.0)),
+        ("update_account", rename_account),
+        ("add_category", lambda: tracker.add_category(f"bench-category-{next(counter)}", 100.0)),
+        ("update_category", lambda: tracker.update_category(category, 2_000.0)),
+        ("record_transaction", lambda: tracker.record_transaction(names[0], category, 1.25, "bench")),
+        ("record_transactions[100]", lambda: tracker.record_transactions(
+            {"account_name": names[0], "category": category, "amount": 1.25, "description": "bench"}
+            for _ in range(100)
+        )),
+    ]
+    result = [Case("method", name, call) for name, call in cases]
+    result += [
+        Case("method", "delete_account", lambda: tracker.delete_account(doomed["account"]),
+             setup=lambda: make_doomed("account")),
+        Case("method", "delete_category", lambda: tracker.delete_category(doomed["category"]),
+             setup=lambda: make_doomed("category")),
+        Case("method", "delete_transactions[100 by filter]",
+             lambda: tracker.delete_transactions(category="bench-bulk-from"), setup=fill_bulk),
+        Case("method", "recategorize_transactions[100 by filter]",
+             lambda: tracker.recategorize_transactions("bench-bulk-to", category="bench-bulk-from"), setup=fill_bulk),
+        Case("method", "iter_transactions[month]",
+             lambda: sum(1 for _ in tracker.iter_transactions(start_month=month, end_month=month)), heavy=True),
+        Case("method", "verify_monthly_totals", lambda: tracker.verify_monthly_totals(), heavy=True),
+        Case("method", "rebuild_monthly_totals", lambda: tracker.rebuild_monthly_totals(), heavy=True),
+        Case("method", "verify_daily_totals", lambda: tracker.verify_daily_totals(), heavy=True),
+        Case("method", "rebuild_daily_totals", lambda: tracker.rebuild_daily_totals(), heavy=True),
+        Case("method", "rebucket_transactions", lambda: tracker.rebucket_transactions(), heavy=True),
+        Case("method", "rebuild_balance_checkpoints", lambda: tracker.rebuild_balance_checkpoints(), heavy=True),
+        Case("method", "verify_balances", lambda: tracker.verify_balances(), heavy=True),
+    ]
+    return result
+
+
+def unbenchmarked_methods(cases: List[Case]) -> List[str]:
+    covered = {case.name.split("[")[0] for case in cases}
+    public = {name for name, _ in inspect.getmembers(BudgetTracker, inspect.isfunction) if not name.startswith("_")}
+    return sorted(public - covered - {"close"})
+
+
+#   ROUTE CASES
+def route_cases(app, account: str, category: str, start_day: int) -> List[Case]:
+    """One case per HTTP route, each safe to repeat"""
+    counter = itertools.count()
+    state: Dict[str, str] = {}
+
+    def call(method: str, url, body=None, raw: bool = False):
+        async def send():
+            status, _, payload = await request(app, method, url() if callable(url) else url,
+                                               body() if callable(body) else body)
+            if status >= 400:
+                raise RuntimeError(f"{method} {url} returned {status}: {payload[:200]!r}")
+            return payload if raw else json.loads(payload or b"null")
+        return send
+
+    async def start_job(kind: str):
+        if kind == "import":
+            payload = await call("POST", f"/imports/?account={account}&category={category}", IMPORT_CSV)()
+        else:
+            payload = await call("POST", "/settings/rebucket")()
+        state[kind] = payload["id"]
+
+    async def doomed(kind: str):
+        state[kind] = f"bench-route-{kind}-{next(counter)}"
+        if kind == "account":
+            await call("PUT", "/accounts/addAccount", {"account_name": state[kind], "account_balance": 0})()
+        else:
+            await call("PUT", "/categories/addCategory", {"category_name": state[kind], "category_limit": 0})()
+
+    async def fill_bulk():
+        for name in ("bench-route-bulk-from", "bench-route-bulk-to"):
+            # 400 once the category exists
+            await request(app, "PUT", "/categories/addCategory", {"category_name": name, "category_limit": 0})
+        await call("PUT", "/categories/recordTransactions",
+                   {"transactions": [{**transaction, "category": "bench-route-bulk-from"}] * 100})()
+
+    transaction = {"account_name": account, "category": category, "amount": 1.25, "description": "bench"}
+    return [
+        Case("route", "GET /accounts/", call("GET", "/accounts/")),
+        Case("route", "GET /accounts/balance-history", call(
+            "GET", f"/accounts/balance-history?account={account}&interval=week")),
+        Case("route", "PUT /accounts/addAccount", call(
+            "PUT", "/accounts/addAccount",
+            lambda: {"account_name": f"bench-route-account-{next(counter)}", "account_balance": 0})),
+        Case("route", "PUT /accounts/update", call(
+            "PUT", "/accounts/update",
+            lambda: {"old_name": account, "new_name": account, "amount": 10_000})),
+        Case("route", "PUT /accounts/deleteAccount", call(
+            "PUT", "/accounts/deleteAccount", lambda: {"account_name": state["account"]}),
+            setup=lambda: doomed("account")),
+        Case("route", "GET /categories/", call("GET", "/categories/")),
+        Case("route", "GET /categories/trends", call("GET", "/categories/trends?months=12")),
+        Case("route", "PUT /categories/addCategory", call(
+            "PUT", "/categories/addCategory",
+            lambda: {"category_name": f"bench-route-category-{next(counter)}", "category_limit": 10})),
+        Case("route", "PUT /categories/updateCategory", call(
+            "PUT", "/categories/updateCategory", {"cat_name": category, "limit": 2_000})),
+        Case("route", "PUT /categories/deleteCategory", call(
+            "PUT", "/categories/deleteCategory", lambda: {"category_name": state["category"]}),
+            setup=lambda: doomed("category")),
+        Case("route", "PUT /categories/recordTransaction", call("PUT", "/categories/recordTransaction", transaction)),
+        Case("route", "PUT /categories/recordTransactions", call(
+            "PUT", "/categories/recordTransactions", {"transactions": [transaction] * 100})),
+        Case("route", "GET /settings/financial-month-start", call("GET", "/settings/financial-month-start")),
+        # The unchanged start day never starts a re-bucketing job
+        Case("route", "PUT /settings/financial-month-start", call(
+            "PUT", "/settings/financial-month-start", {"start_day": start_day})),
+        Case("route", "GET /settings/performance", call("GET", "/settings/performance")),
+        Case("route", "GET /settings/cache", call("GET", "/settings/cache")),
+        Case("route", "GET /metrics", call("GET", "/metrics", raw=True)),
+        Case("route", "POST /settings/rebucket", call("POST", "/settings/rebucket"), heavy=True),
+        Case("route", "GET /settings/rebucket/{job_id}", call(
+            "GET", lambda: f"/settings/rebucket/{state['rebucket']}"), setup=lambda: start_job("rebucket")),
+        Case("route", "POST /imports/", call("POST", f"/imports/?account={account}&category={category}", IMPORT_CSV)),
+        Case("route", "GET /imports/{job_id}", call(
+            "GET", lambda: f"/imports/{state['import']}"), setup=lambda: start_job("import")),
+        Case("route", "GET /transactions/", call("GET", "/transactions/?limit=50")),
+        Case("route", "GET /transactions/search", call("GET", f"/transactions/search?q=uber&account={account}")),
+        Case("route", "PUT /transactions/delete", call(
+            "PUT", "/transactions/delete", {"category": "bench-route-bulk-from"}), setup=fill_bulk),
+        Case("route", "PUT /transactions/recategorize", call(
+            "PUT", "/transactions/recategorize",
+            {"category": "bench-route-bulk-from", "new_category": "bench-route-bulk-to"}), setup=fill_bulk),
+        Case("route", "GET /transactions/export", call(
+            "GET", f"/transactions/export?format=csv&account={account}&category={category}", raw=True), heavy=True),
+    ]
+
+
+def uncovered_routes(app, cases: List[Case]) -> List[str]:
+    covered = {case.name for case in cases}
+    routes = []
+    for route in app.routes:
+        for method in sorted(getattr(route, "methods", None) or []):
+            if method != "HEAD" and route.path not in ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"):
+                routes.append(f"{method} {route.path}")
+    return sorted(set(routes) - covered)
+
+
+#   RUNNING
+async def drain_jobs(app):
+    while any(job.finished is None for job in list(app.state.jobs._jobs.values())):
+        await asyncio.sleep(0.01)
+
+
+def run_sync(case: Case, calls: int) -> Dict:
+    samples = []
+    for _ in range(calls):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        case.call()
+        samples.append(time.perf_counter() - start)
+    return summarise(samples)
+
+
+async def run_async(case: Case, calls: int) -> Dict:
+    samples = []
+    for _ in range(calls):
+        if case.setup:
+            await case.setup()
+        start = time.perf_counter()
+        await case.call()
+        samples.append(time.perf_counter() - start)
+    return summarise(samples)
+
+
+def report(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]]):
+    header = f"{'case':<58} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}"
+    print(header + (f" {'p50 vs base':>12}" if baseline else ""))
+    for key, row in results.items():
+        line = (f"{key:<58} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+                f"{row['ops_per_s'] or 0:>10,.1f}")
+        if baseline and key in baseline and baseline[key]["p50_ms"]:
+            line += f" {(row['p50_ms'] / baseline[key]['p50_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="database to benchmark (a copy is used); default: a fresh synthetic ledger")
+    parser.add_argument("--transactions", type=int, default=200_000, help="ledger size when --db is not given")
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--heavy-calls", type=int, default=5, help="calls for whole-ledger cases")
+    parser.add_argument("--only", help="run only cases whose name contains this substring")
+    parser.add_argument("--no-cache", action="store_true", help="disable the per-store-version result cache")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare p50 latency against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        if args.db:
+            # Checkpoint first so the copy holds every committed write
+            with sqlite3.connect(args.db) as source:
+                source.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            shutil.copy(args.db, path)
+        else:
+            generate(path, transactions=args.transactions, progress=None)
+
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+        results: Dict[str, Dict] = {}
+
+        def selected(cases: List[Case]) -> List[Case]:
+            return [case for case in cases if not args.only or args.only in case.key]
+
+        tracker = BudgetTracker(path, cache_results=not args.no_cache)
+        try:
+            cases = method_cases(tracker)
+            for case in selected(cases):
+                results[case.key] = run_sync(case, args.heavy_calls if case.heavy else args.calls)
+            missing_methods = unbenchmarked_methods(cases)
+            account = tracker.list_accounts()[0]["name"]
+            category = tracker.list_categories()[0]["name"]
+            start_day = tracker.get_financial_month_start_day()
+        finally:
+            tracker.close()
+
+        os.environ["BUDGET_DB_PATH"] = path
+        os.environ["BUDGET_RESULT_CACHE"] = "0" if args.no_cache else "1"
+        import main as app_module
+
+        async def run_routes():
+            async with lifespan(app_module.app) as app:
+                cases = route_cases(app, account, category, start_day)
+                for case in selected(cases):
+                    results[case.key] = await run_async(case, args.heavy_calls if case.heavy else args.calls)
+                    # Import and re-bucketing jobs finish before the next case is timed
+                    await drain_jobs(app)
+                return uncovered_routes(app, cases)
+
+        missing_routes = asyncio.run(run_routes())
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    report(results, baseline)
+    for label, missing in (("methods", missing_methods), ("routes", missing_routes)):
+        if missing:
+            print(f"warning: {label} without a benchmark case: {', '.join(missing)}")
+
+    output = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "transactions": rows,
+            "cache": not args.no_cache,
+            "calls": args.calls,
+            "heavyCalls": args.heavy_calls,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"\nwrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
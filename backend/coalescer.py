@@ -0,0 +1,121 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, List, Optional, Tuple
+
+# An operation runs against the shared cursor of the current group transaction
+WriteOp = Callable[..., object]
+
+
+class WriteCoalescer:
+    """Group-commits write operations submitted from many threads.
+
+    A single writer thread takes the first pending operation, then keeps
+    collecting for up to window_ms or until max_batch operations are queued,
+    and runs them all inside one SQLite transaction. Each operation gets its
+    own SAVEPOINT, so one failing operation is rolled back on its own and only
+    its caller sees the error. Callers block until their group has committed,
+    or fail at once should the writer thread ever stop.
+    """
+
+    def __init__(self, pool, window_ms: float = 2.0, max_batch: int = 64,
+                 before_commit: Optional[Callable[[sqlite3.Cursor], None]] = None):
+        self.pool = pool
+        self.before_commit = before_commit
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[WriteOp, tuple, Future]]" = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="budget-db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, op: WriteOp, *args):
+        """Run op(cursor, *args) in the next group commit and return its result or raise its error"""
+        if self._stopped:
+            raise RuntimeError("Write coalescer is closed")
+        future: Future = Future()
+        self._queue.put((op, args, future))
+        while True:
+            try:
+                return future.result(timeout=1.0)
+            except FutureTimeout:
+                # A group may legitimately take long; only a dead writer means it never will
+                if not self._thread.is_alive():
+                    raise RuntimeError("Write coalescer writer thread has stopped")
+
+    def _collect(self, first) -> Tuple[List, bool]:
+        """Gather a group starting with first; returns (group, stop_requested)"""
+        group = [first]
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_batch:
+            try:
+                # Anything already queued joins the group even once the window has passed
+                remaining = deadline - time.monotonic()
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            group, stop = self._collect(first)
+            try:
+                self._commit(group)
+            except Exception as e:
+                # Never let one group take the writer down with it
+                for _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                break
+
+    def _commit(self, group: List):
+        outcomes = []
+        conn = None
+        try:
+            # Inside the try: a pool timeout fails this group, not the writer
+            conn = self.pool.acquire()
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for op, args, future in group:
+                cursor.execute('SAVEPOINT coalesced_op')
+                try:
+                    outcomes.append((future, op(cursor, *args), None))
+                    cursor.execute('RELEASE coalesced_op')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO coalesced_op')
+                    cursor.execute('RELEASE coalesced_op')
+                    outcomes.append((future, None, e))
+            if self.before_commit is not None and any(error is None for _, _, error in outcomes):
+                self.before_commit(cursor)
+            conn.commit()
+        except Exception as e:
+            # The group as a whole failed (e.g. the commit itself); nothing was written
+            if conn is not None and conn.in_transaction:
+                conn.rollback()
+            outcomes = [(future, None, e) for _, _, future in group]
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        """Commit everything already submitted, then stop the writer thread"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join()
@@ -1,83 +1,449 @@
+import base64
+import calendar
+import json
+import math
+import queue
+import re
 import sqlite3
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from coalescer import WriteCoalescer
+from forecast import project_month_end
+from metrics import TrackerMetrics, instrument_methods
+from migrations import BALANCE_CHECKPOINT_INTERVAL, FILL_LOCAL_BALANCE_CHECKPOINTS_SQL, migrate
+from result_cache import ResultCache
+from trends import month_range, series
+
+
+def financial_month_for(date: datetime, start_day: int) -> str:
+    """Return the YYYY-MM financial month for a date given a month start day"""
+    if date.day >= start_day:
+        # Current date is on or after start day, so we're in the "next" financial month
+        # Roll forward to next calendar month
+        fm = (date.replace(day=1) + timedelta(days=32)).replace(day=1).strftime("%Y-%m")
+    else:
+        # Current date is before start day, so we're still in current calendar month's financial period
+        fm = date.strftime("%Y-%m")
+    
+    return fm
+
+
+def financial_month_bounds(month: str, start_day: int):
+    """(start, next start) of a YYYY-MM financial month, which begins on start_day of the calendar month before"""
+    year, month_number = map(int, month.split("-"))
+    start = (datetime(year, month_number, 1) - timedelta(days=1)).replace(day=start_day)
+    return start, datetime(year, month_number, start_day)
+
+
+# financial_month_for() over an epoch-seconds date column, taking the day shift
+# '-(start_day - 1) days' as its parameter: shifting back lands in the calendar
+# month the financial month started in, and the month after that names it
+_FINANCIAL_MONTH_SQL = "strftime('%Y-%m', date, 'unixepoch', ?, 'start of month', '+1 month')"
+
+
+def _month_span(month: str) -> Optional[Tuple[int, int]]:
+    """(start, end) epoch seconds holding a YYYY-MM financial month under any start day (1-28).
+
+    A month starts no earlier than the 1st of the calendar month before and
+    ends no later than the 28th of its own, so rows still bucketed under an
+    older start day, before a rebucket catches up, fall inside too. None for
+    a malformed month, which no stored month equals anyway.
+    """
+    try:
+        return to_epoch(financial_month_bounds(month, 1)[0]), to_epoch(financial_month_bounds(month, 28)[1])
+    except ValueError:
+        return None
+
+
+# Most points a balance history may have
+MAX_HISTORY_POINTS = 1000
+
+
+# Past financial months whose daily spend curves shape the month-end forecast
+FORECAST_HISTORY_MONTHS = 6
+
+
+#   STORAGE CONVERSIONS
+# Money is stored as integer cents and dates as integer UTC epoch seconds;
+# the API keeps speaking floats and '%Y-%m-%d %H:%M:%S' strings
+
+def to_cents(amount: float) -> int:
+    """Convert an amount to integer cents, rounding half away from zero"""
+    if not math.isfinite(amount):
+        raise ValueError("Amount must be a finite number")
+    return int(Decimal(str(amount)).scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+def to_epoch(date: datetime) -> int:
+    """UTC epoch seconds for a datetime; naive datetimes are taken to be UTC"""
+    return calendar.timegm(date.utctimetuple())
+
+
+def format_epoch(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def format_day(day: int) -> str:
+    """YYYY-MM-DD of an epoch day (epoch seconds // 86400)"""
+    return format_epoch(day * 86400)[:10]
+
+
+def _transaction_dict(row) -> Dict:
+    """API form of an (id, date, month, account_name, category, amount, description) row"""
+    return {
+        "id": row[0],
+        "date": format_epoch(row[1]),
+        "month": row[2],
+        "account_name": row[3],
+        "category": row[4],
+        "amount": from_cents(row[5]),
+        "description": row[6],
+    }
+
+
+def _encode_cursor(date: int, transaction_id: int) -> str:
+    """Opaque pagination token for the position after (date, id)"""
+    return base64.urlsafe_b64encode(json.dumps([date, transaction_id]).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token: str):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        date, transaction_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(date), int(transaction_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def parse_day(day: str) -> datetime:
+    try:
+        return datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Invalid date '{day}', expected YYYY-MM-DD")
+
+
+def _match_expression(text: str) -> str:
+    """FTS5 query requiring every word of the search text, each as a word prefix"""
+    # Quoting each word keeps FTS5 syntax (AND, NEAR, column:, ^) out of user input
+    words = re.findall(r'\w+', text)
+    if not words:
+        raise ValueError("Search text must contain at least one letter or digit")
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class BatchValidationError(ValueError):
+    """Raised when rows of a batch fail validation; nothing from the batch is written"""
+
+    def __init__(self, errors: List[Dict]):
+        super().__init__(f"{len(errors)} invalid row(s) in batch")
+        self.errors = errors
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections for one database file"""
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 30.0,
+                 busy_timeout_ms: int = 5000, cached_statements: int = 256,
+                 factory=sqlite3.Connection, dedicated_slots: Optional[threading.Semaphore] = None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self.factory = factory
+        # Shared by every pool whose dedicated connections count against one budget
+        self.dedicated_slots = dedicated_slots
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        # Only the slow paths count, so a pool hit costs nothing extra
+        self._opened = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._closed = False
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection with WAL journaling and a busy timeout"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=self.factory,
+        )
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        # NORMAL is durable across application crashes when running in WAL mode
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection, opening a new one while the pool is below max_size"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self._size < self.max_size
+            if can_open:
+                self._size += 1
+                self._opened += 1
+            else:
+                self._waits += 1
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise RuntimeError("Timed out waiting for a database connection")
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a borrowed connection to the pool"""
+        if self._closed:
+            self._discard(conn)
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._size -= 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for one unit of work; commits on success, rolls back on error"""
+        conn = self.acquire()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def dedicated(self):
+        """Open a read connection outside the pool for work that lasts as long as a client lets it.
+
+        It never counts against max_size, so a slow download cannot starve
+        the pool's short transactions. With dedicated_slots it first takes a
+        slot, waiting up to timeout for one. Closed on exit.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        slots = self.dedicated_slots
+        if slots is not None and not slots.acquire(timeout=self.timeout):
+            raise RuntimeError("Timed out waiting for a dedicated database connection")
+        try:
+            conn = self._open()
+            try:
+                yield conn
+            finally:
+                conn.close()
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def data_version(self) -> int:
+        """PRAGMA data_version as seen by a dedicated connection that never writes.
+
+        The value changes whenever any other connection, in this process or in
+        another one, commits to the database, which makes it a cheap staleness
+        check for in-process caches.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._watcher = self._open()
+            return self._watcher.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        """Close every idle connection; connections still borrowed are closed on release"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or borrowed"""
+        return self._size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "size": self._size,
+                "idle": self._idle.qsize(),
+                "maxSize": self.max_size,
+                "opened": self._opened,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
+
 
 class BudgetTracker:
-    def __init__(self, db_path='budget.db'):
+    def __init__(self, db_path='budget.db', pool_size: int = 8,
+                 coalesce_writes: bool = False, coalesce_window_ms: float = 2.0,
+                 coalesce_max_batch: int = 64, cache_results: bool = True,
+                 result_cache_size: int = 128, instrument: bool = False,
+                 dedicated_slots: Optional[threading.Semaphore] = None):
         self.db_path = db_path
+        # Opt-in timings for /metrics; when off, connections and methods are the plain ones
+        self.metrics: Optional[TrackerMetrics] = TrackerMetrics() if instrument else None
+        self._pool = ConnectionPool(
+            db_path, max_size=pool_size,
+            factory=self.metrics.connection_factory() if self.metrics else sqlite3.Connection,
+            dedicated_slots=dedicated_slots,
+        )
+        self._coalescer: Optional[WriteCoalescer] = None
+        # Dashboard reads are cached per store version; any write invalidates them
+        self._results: Optional[ResultCache] = ResultCache(result_cache_size) if cache_results else None
+        # Settings rarely change but are read on every request; the cache is
+        # reloaded only when PRAGMA data_version shows the database changed
+        self._settings: Dict[str, str] = {}
+        self._settings_version: Optional[int] = None
+        self._settings_lock = threading.Lock()
+        self._store_version = 0
+        self._store_version_seen: Optional[int] = None
+        self._version_lock = threading.Lock()
+        if self.metrics:
+            instrument_methods(self, self.metrics)
         self.setup_database()
+        if coalesce_writes:
+            self._coalescer = WriteCoalescer(
+                self._pool, coalesce_window_ms, coalesce_max_batch, before_commit=self._bump_store_version
+            )
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection for one transaction; commits on success, rolls back on error.
+
+        A unit of work that changed any rows also bumps the store version in
+        the same commit.
+        """
+        with self._pool.connection() as conn:
+            changes = conn.total_changes
+            yield conn
+            if conn.total_changes != changes:
+                self._bump_store_version(conn.cursor())
+
+    def _bump_store_version(self, cursor: sqlite3.Cursor):
+        cursor.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'store_version'")
+
+    def _cached(self, key, compute):
+        """Serve a read result from the result cache for the current store version"""
+        if self._results is None:
+            return compute()
+        return self._results.get_or_compute(key, self.store_version(), compute)
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the result cache"""
+        if self._results is None:
+            return {"enabled": False}
+        return self._results.stats()
+
+    def pool_stats(self) -> Dict:
+        """Connection pool size and contention counters"""
+        return self._pool.stats()
+
+    def store_version(self) -> int:
+        """Counter bumped by every committed write, from this or any other process.
+
+        Re-read from the database only when PRAGMA data_version shows that
+        something was committed, so polling it is nearly free.
+        """
+        data_version = self._pool.data_version()
+        with self._version_lock:
+            if data_version == self._store_version_seen:
+                return self._store_version
+        with self._pool.connection() as conn:
+            version = conn.execute("SELECT value FROM store_meta WHERE key = 'store_version'").fetchone()[0]
+        with self._version_lock:
+            self._store_version, self._store_version_seen = version, data_version
+        return version
+
+    def _write(self, op, *args):
+        """Run op(cursor, *args) in its own transaction, or in a group commit when coalescing"""
+        if self._coalescer is not None:
+            return self._coalescer.submit(op, *args)
+        with self._connection() as conn:
+            return op(conn.cursor(), *args)
 
 #   DATABASE SETUP
     def setup_database(self):
-        """Initialize database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Settings table for user preferences
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            ''')
-            
-            # Set default financial month start day if not exists
-            cursor.execute('''
-                INSERT OR IGNORE INTO settings (key, value) VALUES ('financial_month_start_day', '25')
-            ''')
-            
-            # Bank accounts table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS accounts (
-                    account_name TEXT PRIMARY KEY,
-                    balance REAL NOT NULL
-                )
-            ''')
-            
-            # Budget categories table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS categories (
-                    category_name TEXT PRIMARY KEY,
-                    monthly_limit REAL NOT NULL
-                )
-            ''')
-            
-            # Transactions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    month TEXT NOT NULL,
-                    account_name TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    description TEXT,
-                    FOREIGN KEY (account_name) REFERENCES accounts(account_name),
-                    FOREIGN KEY (category) REFERENCES categories(category_name)
-                )
-            ''')
-            conn.commit()
+        """Bring the database schema up to date; a no-op on a current database"""
+        with self._connection() as conn:
+            migrate(conn)
 
 #   SETTINGS MANAGEMENT
+    def _get_setting(self, key: str, default: str) -> str:
+        """Read a setting through the in-process cache"""
+        version = self._pool.data_version()
+        with self._settings_lock:
+            if version == self._settings_version:
+                return self._settings.get(key, default)
+
+        # Read the version before the rows so a concurrent write can only make
+        # the cache newer than its tag, never older
+        with self._connection() as conn:
+            settings = dict(conn.execute('SELECT key, value FROM settings').fetchall())
+        with self._settings_lock:
+            self._settings = settings
+            self._settings_version = version
+        return settings.get(key, default)
+
+    def _invalidate_settings(self):
+        with self._settings_lock:
+            self._settings_version = None
+
     def get_financial_month_start_day(self) -> int:
         """Get the user's financial month start day"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT value FROM settings WHERE key = ?', ('financial_month_start_day',))
-            result = cursor.fetchone()
-            return int(result[0]) if result else 25
+        return int(self._get_setting('financial_month_start_day', '25'))
 
     def set_financial_month_start_day(self, day: int):
         """Set the user's financial month start day (1-28)"""
         if not 1 <= day <= 28:
             raise ValueError("Financial month start day must be between 1 and 28")
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO settings (key, value) VALUES ('financial_month_start_day', ?)
-            ''', (str(day),))
-            conn.commit()
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO settings (key, value) VALUES ('financial_month_start_day', ?)
+                ''', (str(day),))
+        finally:
+            self._invalidate_settings()
 
 #   DETERMINE FINANCIAL MONTH
     def financial_month(self, date: Optional[datetime] = None) -> str:
@@ -85,17 +451,7 @@ class BudgetTracker:
         if date is None:
             date = datetime.now()
         
-        start_day = self.get_financial_month_start_day()
-        
-        if date.day >= start_day:
-            # Current date is on or after start day, so we're in the "next" financial month
-            # Roll forward to next calendar month
-            fm = (date.replace(day=1) + timedelta(days=32)).replace(day=1).strftime("%Y-%m")
-        else:
-            # Current date is before start day, so we're still in current calendar month's financial period
-            fm = date.strftime("%Y-%m")
-        
-        return fm
+        return financial_month_for(date, self.get_financial_month_start_day())
 
     def get_financial_month_dates(self, date: Optional[datetime] = None) -> Dict[str, datetime]:
         """Get the start and end dates of the current financial month"""
@@ -103,18 +459,11 @@ class BudgetTracker:
             date = datetime.now()
         
         start_day = self.get_financial_month_start_day()
-        
-        if date.day >= start_day:
-            # Financial month started this calendar month
-            start_date = date.replace(day=start_day, hour=0, minute=0, second=0, microsecond=0)
-            # End date is start_day - 1 of next calendar month
-            next_month = (date.replace(day=1) + timedelta(days=32)).replace(day=1)
-            end_date = next_month.replace(day=start_day - 1, hour=23, minute=59, second=59)
-        else:
-            # Financial month started last calendar month
-            prev_month = (date.replace(day=1) - timedelta(days=1))
-            start_date = prev_month.replace(day=start_day, hour=0, minute=0, second=0, microsecond=0)
-            end_date = date.replace(day=start_day - 1, hour=23, minute=59, second=59)
+        start_date, next_start = financial_month_bounds(financial_month_for(date, start_day), start_day)
+        start_date = start_date.replace(tzinfo=date.tzinfo)
+        # The month ends the second before the next one starts, which for a
+        # start day of 1 is the last day of the calendar month
+        end_date = next_start.replace(tzinfo=date.tzinfo) - timedelta(seconds=1)
         
         return {
             'start': start_date,
@@ -135,69 +484,130 @@ class BudgetTracker:
 
     def get_performance_data(self) -> Dict:
         """Get comprehensive performance data for the current financial month"""
+        # daysRemaining changes daily, so the day is part of the cache key
+        current_month = self.financial_month()
+        return self._cached(("performance", current_month, datetime.now().date()), self._compute_performance_data)
+
+    def _compute_performance_data(self) -> Dict:
         current_month = self.financial_month()
+        # Resolve settings-derived values before borrowing a connection so one
+        # request never holds more than one pooled connection at a time
+        last_month_date = datetime.now() - timedelta(days=35)
+        last_month_str = self.financial_month(last_month_date)
+        days_remaining = self.days_remaining_in_financial_month()
+        start_day = self.get_financial_month_start_day()
+        today = to_epoch(datetime.now()) // 86400
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Get categories with spending
-            cursor.execute('SELECT category_name, monthly_limit FROM categories')
+            cursor.execute('SELECT id, category_name, monthly_limit FROM categories')
             categories = cursor.fetchall()
             
             cursor.execute('''
-                SELECT category, SUM(amount) as spent
-                FROM transactions
+                SELECT category_id, spent
+                FROM monthly_category_totals
                 WHERE month = ?
-                GROUP BY category
             ''', (current_month,))
             spending = dict(cursor.fetchall())
             
             # Get last month's total spending
-            last_month_date = datetime.now() - timedelta(days=35)
-            last_month_str = self.financial_month(last_month_date)
-            
             cursor.execute('''
-                SELECT SUM(amount) FROM transactions WHERE month = ?
+                SELECT SUM(spent) FROM monthly_category_totals WHERE month = ?
             ''', (last_month_str,))
             last_month_result = cursor.fetchone()
-            last_month_spent = last_month_result[0] if last_month_result[0] else 0
+            last_month_spent = from_cents(last_month_result[0]) if last_month_result[0] else 0
             
             # Calculate totals
-            total_budget = sum(cat[1] for cat in categories)
-            total_spent = sum(spending.values())
+            total_budget = from_cents(sum(cat[2] for cat in categories))
+            total_spent = from_cents(sum(spending.values()))
             
-            # Build category details
-            category_details = [
-                {
-                    "name": cat[0],
-                    "limit": cat[1],
-                    "spent": spending.get(cat[0], 0)
-                }
-                for cat in categories
-            ]
-            
-            return {
-                "totalBudget": total_budget,
-                "totalSpent": total_spent,
-                "categories": category_details,
-                "daysRemaining": self.days_remaining_in_financial_month(),
-                "lastMonthSpent": last_month_spent,
-                "financialMonthStartDay": self.get_financial_month_start_day(),
-                "currentFinancialMonth": current_month
+            day_ranges, curves, total = self._daily_curves(cursor, current_month, start_day)
+
+        # Month-end projections from the daily curves of this and past months;
+        # past months without any spending (before the ledger began) are ignored
+        history = [i for i in range(FORECAST_HISTORY_MONTHS) if any(total[i])]
+        first_day, end_day = day_ranges[-1]
+        elapsed = min(max(today - first_day + 1, 1), end_day - first_day)
+        projected = {
+            category_id: project_month_end(months[-1], [months[i] for i in history], elapsed)
+            for category_id, months in curves.items()
+        }
+        total_projected = project_month_end(total[-1], [total[i] for i in history], elapsed)
+        
+        # Build category details
+        category_details = [
+            {
+                "name": cat[1],
+                "limit": from_cents(cat[2]),
+                "spent": from_cents(spending.get(cat[0], 0)),
+                "projected": from_cents(round(projected.get(cat[0], 0)))
             }
+            for cat in categories
+        ]
+        
+        return {
+            "totalBudget": total_budget,
+            "totalSpent": total_spent,
+            "categories": category_details,
+            "daysRemaining": days_remaining,
+            "lastMonthSpent": last_month_spent,
+            "financialMonthStartDay": start_day,
+            "currentFinancialMonth": current_month,
+            "projectedSpent": from_cents(round(total_projected)),
+            "dailyBurnRate": from_cents(round(sum(total[-1][:elapsed]) / elapsed)),
+            "forecastMethod": "curve" if history else "linear",
+            "forecastHistoryMonths": len(history)
+        }
+
+    def _daily_curves(self, cursor: sqlite3.Cursor, current_month: str, start_day: int):
+        """Daily spend in cents for the current and past financial months, read from the daily rollup.
+
+        Returns the (first, end) epoch days of each month, oldest first, then
+        {category_id: [daily spend list per month]} and the same lists summed
+        over all categories.
+        """
+        day_ranges = []
+        for month in month_range(current_month, FORECAST_HISTORY_MONTHS + 1):
+            start, next_start = financial_month_bounds(month, start_day)
+            day_ranges.append((to_epoch(start) // 86400, to_epoch(next_start) // 86400))
+        month_starts = [first for first, _ in day_ranges]
+
+        curves: Dict[int, List[List[int]]] = {}
+        total = [[0] * (end - first) for first, end in day_ranges]
+        cursor.execute('''
+            SELECT day, category_id, spent
+            FROM daily_category_totals
+            WHERE day >= ? AND day < ?
+        ''', (day_ranges[0][0], day_ranges[-1][1]))
+        for day, category_id, spent in cursor:
+            index = bisect_right(month_starts, day) - 1
+            months = curves.get(category_id)
+            if months is None:
+                months = curves[category_id] = [[0] * (end - first) for first, end in day_ranges]
+            months[index][day - day_ranges[index][0]] += spent
+            total[index][day - day_ranges[index][0]] += spent
+        return day_ranges, curves, total
 
 #   Deleting accounts
     def delete_account(self, account_name: str):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM transactions WHERE account_name = ?', (account_name,))
+                cursor.execute('''
+                    SELECT COUNT(*) FROM transactions
+                    WHERE account_id = (SELECT id FROM accounts WHERE account_name = ?)
+                ''', (account_name,))
                 count = cursor.fetchone()[0]
                 if count == 0:
+                    cursor.execute('''
+                        DELETE FROM balance_checkpoints
+                        WHERE account_id = (SELECT id FROM accounts WHERE account_name = ?)
+                    ''', (account_name,))
                     cursor.execute('DELETE FROM accounts WHERE account_name = ?', (account_name,))
                 else:
                     raise ValueError("Account has transactions")
-                conn.commit()
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")        
 
@@ -205,7 +615,7 @@ class BudgetTracker:
     def update_account(self, old_name: str, new_name: str, new_balance: float):
         """Update an existing account name or balance, with duplicate name check"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT account_name FROM accounts WHERE account_name = ? AND account_name != ?",
@@ -215,17 +625,33 @@ class BudgetTracker:
                     raise ValueError("Account name already exists")
 
                 cursor.execute(
-                    "UPDATE accounts SET account_name = ?, balance = ? WHERE account_name = ?",
-                    (new_name, new_balance, old_name)
+                    "UPDATE accounts SET account_name = ?, balance = ? WHERE account_name = ? RETURNING id",
+                    (new_name, to_cents(new_balance), old_name)
                 )
-                conn.commit()
-
-                if cursor.rowcount == 0:
+                account = cursor.fetchone()
+                if account is None:
                     raise ValueError("Account not found")
+                # The balance was set by hand: history jumps to it here
+                self._checkpoint_current_balance(cursor, account[0], to_epoch(datetime.now()) + 1)
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
 #   ADDING ACCOUNTS
+    def _add_account_op(self, cursor: sqlite3.Cursor, account_name: str, account_balance: float):
+        cursor.execute(
+            "SELECT account_name FROM accounts WHERE account_name = ?",
+            (account_name,)
+        )
+        if cursor.fetchone():
+            raise ValueError("Account already exists")
+
+        cursor.execute('''
+            INSERT INTO accounts (account_name, balance) VALUES (?, ?)
+        ''', (account_name, to_cents(account_balance)))
+        cursor.execute('''
+            INSERT INTO balance_checkpoints (account_id, date, balance) VALUES (?, ?, ?)
+        ''', (cursor.lastrowid, to_epoch(datetime.now()), to_cents(account_balance)))
+
     def add_account(self, account_name: str, account_balance: float):
         """Add an account, with duplicate name check""" 
         account_name = account_name.strip()
@@ -233,53 +659,172 @@ class BudgetTracker:
             raise ValueError("Account name cannot be empty.")
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT account_name FROM accounts WHERE account_name = ?",
-                    (account_name,)
-                )
-                if cursor.fetchone():
-                    raise ValueError("Account already exists")
-
-                cursor.execute('''
-                    INSERT INTO accounts (account_name, balance) VALUES (?, ?)
-                ''', (account_name, account_balance))
-                conn.commit()
+            self._write(self._add_account_op, account_name, account_balance)
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
 #   LISTING ACCOUNTS
     def list_accounts(self):
         """Return all accounts as a list of dicts"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT account_name, balance FROM accounts')
             accounts = cursor.fetchall()
-        return [{"name": acc[0], "amount": acc[1]} for acc in accounts]
+        return [{"name": acc[0], "amount": from_cents(acc[1])} for acc in accounts]
+
+#   BALANCE HISTORY
+    def _balance_at(self, cursor: sqlite3.Cursor, account_id: int, at: int,
+                    previous: Optional[tuple] = None) -> tuple:
+        """(balance in cents including every transaction dated at or before `at`, anchor) of an account.
+
+        The anchor is the nearest checkpoint at or before `at`, plus the range
+        sum of transactions since it. Passing the previous result for an
+        earlier `at` with the same checkpoint sums only the gap between them.
+        Before the first checkpoint the first one is walked back instead;
+        the balance is None for an account without checkpoints.
+        """
+        row = cursor.execute('''
+            SELECT date, balance FROM balance_checkpoints
+            WHERE account_id = ? AND date <= ?
+            ORDER BY date DESC LIMIT 1
+        ''', (account_id, at + 1)).fetchone()
+        if row is None:
+            row = cursor.execute('''
+                SELECT date, balance FROM balance_checkpoints
+                WHERE account_id = ? AND date > ?
+                ORDER BY date LIMIT 1
+            ''', (account_id, at + 1)).fetchone()
+            if row is None:
+                return None, None
+            returned = cursor.execute('''
+                SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE account_id = ? AND date > ? AND date < ?
+            ''', (account_id, at, row[0])).fetchone()[0]
+            return row[1] + returned, None
+
+        checkpoint, balance = row
+        since = checkpoint
+        if previous is not None and previous[1] is not None and previous[1][0] == checkpoint:
+            balance, since = previous[0], previous[1][1] + 1
+        spent = cursor.execute('''
+            SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE account_id = ? AND date >= ? AND date <= ?
+        ''', (account_id, since, at)).fetchone()[0]
+        return balance - spent, (checkpoint, at)
+
+    def get_balance_history(self, account_name: str, start: Optional[str] = None, end: Optional[str] = None,
+                            interval: str = "day") -> Dict:
+        """End-of-day balances of an account from start to end (YYYY-MM-DD, local time like every stored date).
+
+        interval is day, week (every seventh day from start) or month (the
+        last day of each financial month, and end). end defaults to today and
+        start to 30 days earlier.
+        """
+        end_day = parse_day(end) if end else datetime.now()
+        end_day = end_day.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_day = parse_day(start) if start else end_day - timedelta(days=30)
+        if start_day > end_day:
+            raise ValueError("Start date must not be after end date")
+        if interval == "day" or interval == "week":
+            step = timedelta(days=1 if interval == "day" else 7)
+            count = (end_day - start_day) // step + 1
+            days = [start_day + i * step for i in range(min(count, MAX_HISTORY_POINTS + 1))]
+            if days[-1] != end_day:
+                days.append(end_day)
+        elif interval == "month":
+            month_start_day = self.get_financial_month_start_day()
+            days, day = [], start_day
+            while day < end_day and len(days) <= MAX_HISTORY_POINTS:
+                next_start = financial_month_bounds(financial_month_for(day, month_start_day), month_start_day)[1]
+                day = min(next_start - timedelta(days=1), end_day)
+                days.append(day)
+                day = next_start
+            if not days or days[-1] != end_day:
+                days.append(end_day)
+        else:
+            raise ValueError("Interval must be day, week or month")
+        if len(days) > MAX_HISTORY_POINTS:
+            raise ValueError(f"A balance history can have at most {MAX_HISTORY_POINTS} points")
+
+        key = ("balance_history", account_name, days[0], days[-1], interval)
+        return self._cached(key, lambda: self._compute_balance_history(account_name, interval, days))
+
+    def _compute_balance_history(self, account_name: str, interval: str, days: List[datetime]) -> Dict:
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            account = cursor.execute('SELECT id FROM accounts WHERE account_name = ?', (account_name,)).fetchone()
+            if account is None:
+                raise ValueError(f"Account '{account_name}' does not exist")
+            points, previous = [], None
+            for day in days:
+                previous = self._balance_at(cursor, account[0], to_epoch(day) + 86399, previous)
+                points.append({
+                    "date": day.strftime("%Y-%m-%d"),
+                    "balance": from_cents(previous[0]) if previous[0] is not None else None,
+                })
+        return {"account": account_name, "interval": interval, "points": points}
+
+    def rebuild_balance_checkpoints(self) -> int:
+        """Recompute every balance checkpoint from current balances and the ledger; returns the number of rows.
+
+        History is replayed back from today's balances, so balances that were
+        set by hand in the past no longer show up as jumps.
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM balance_checkpoints')
+            cursor.execute(FILL_LOCAL_BALANCE_CHECKPOINTS_SQL, (BALANCE_CHECKPOINT_INTERVAL, BALANCE_CHECKPOINT_INTERVAL))
+            cursor.execute('UPDATE accounts SET checkpoint_txns = 0')
+            return cursor.execute('SELECT COUNT(*) FROM balance_checkpoints').fetchone()[0]
+
+    def verify_balances(self) -> List[Dict]:
+        """Accounts whose balance disagrees with their latest checkpoint less the ledger since it.
+
+        Every write that moves a balance also moves the checkpoints after the
+        rows it touched, so any difference means one of them was skipped.
+        """
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT a.account_name, a.balance, c.date, c.balance - (
+                    SELECT COALESCE(SUM(t.amount), 0) FROM transactions t
+                    WHERE t.account_id = a.id AND t.date >= c.date
+                )
+                FROM accounts a
+                JOIN balance_checkpoints c ON c.account_id = a.id
+                 AND c.date = (SELECT MAX(date) FROM balance_checkpoints WHERE account_id = a.id)
+                ORDER BY a.account_name
+            ''').fetchall()
+        return [
+            {"account": name, "checkpoint": format_epoch(date),
+             "balance": from_cents(balance), "ledgerBalance": from_cents(expected)}
+            for name, balance, date, expected in rows if balance != expected
+        ]
 
 #   LISTING CATEGORIES
     def list_categories(self):
         """List all existing categories with current month spending"""
         month = self.financial_month()
-        with sqlite3.connect(self.db_path) as conn:
+        return self._cached(("categories", month), lambda: self._compute_categories(month))
+
+    def _compute_categories(self, month: str):
+        with self._connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT category_name, monthly_limit FROM categories')
+            cursor.execute('SELECT id, category_name, monthly_limit FROM categories')
             categories = cursor.fetchall()
             cursor.execute('''
-                SELECT category, SUM(amount) as spent
-                FROM transactions
+                SELECT category_id, spent
+                FROM monthly_category_totals
                 WHERE month = ?
-                GROUP BY category
             ''', (month,))
             spending = dict(cursor.fetchall())
-        return [{"name": cat[0], "limit": cat[1], "spent": spending.get(cat[0], 0)} for cat in categories]
+        return [
+            {"name": cat[1], "limit": from_cents(cat[2]), "spent": from_cents(spending.get(cat[0], 0))}
+            for cat in categories
+        ]
 
 #   ADDING CATEGORIES
     def add_category(self, category_name: str, category_limit: float):
         """Add a budget category with spending limit"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT category_name FROM categories WHERE category_name = ?",
@@ -290,71 +835,661 @@ class BudgetTracker:
 
                 cursor.execute(
                     "INSERT INTO categories (category_name, monthly_limit) VALUES (?, ?)",
-                    (category_name, category_limit)
+                    (category_name, to_cents(category_limit))
                 )
-                conn.commit()
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
 #   DELETING CATEGORIES 
     def delete_category(self, category_name: str):
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT 1 FROM categories WHERE category_name = ?', (category_name,))
-                if not cursor.fetchone():
+                cursor.execute('SELECT id FROM categories WHERE category_name = ?', (category_name,))
+                row = cursor.fetchone()
+                if not row:
                     raise ValueError("Category does not exist")
 
-                cursor.execute('SELECT COUNT(*) FROM transactions WHERE category = ?', (category_name,))
+                cursor.execute('SELECT COUNT(*) FROM transactions WHERE category_id = ?', (row[0],))
                 count = cursor.fetchone()[0]
                 if count > 0:
                     raise ValueError("Category has transactions")
 
                 cursor.execute('DELETE FROM categories WHERE category_name = ?', (category_name,))
-                conn.commit()
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
 #   UPDATING CATEGORIES
+    def _update_category_op(self, cursor: sqlite3.Cursor, cat_name: str, new_limit: float):
+        # An upsert keeps the row's id; REPLACE would delete it out from under its transactions
+        cursor.execute('''
+            INSERT INTO categories (category_name, monthly_limit) VALUES (?, ?)
+            ON CONFLICT (category_name) DO UPDATE SET monthly_limit = excluded.monthly_limit
+        ''', (cat_name, to_cents(new_limit)))
+
     def update_category(self, cat_name: str, new_limit: float):
         """Update an existing category limit"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT OR REPLACE INTO categories (category_name, monthly_limit) VALUES (?, ?)",
-                    (cat_name, new_limit)
-                )
-                conn.commit()
+            self._write(self._update_category_op, cat_name, new_limit)
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
 #   RECORDING TRANSACTIONS
+    def _insert_transactions(self, cursor: sqlite3.Cursor, rows: List[tuple]):
+        """Insert (date, month, account_id, category_id, amount, description) rows in the caller's transaction.
+
+        Balances and the rollups get one aggregated write per account, per
+        (month, category) and per (day, category), however many rows there are.
+        """
+        cursor.executemany('''
+            INSERT INTO transactions (date, month, account_id, category_id, amount, description)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+        account_rows: Dict[int, List[tuple]] = {}
+        rollup_deltas: Dict[tuple, List] = {}
+        daily_deltas: Dict[tuple, List] = {}
+        for date, month, account_id, category_id, amount, _ in rows:
+            account_rows.setdefault(account_id, []).append((date, amount, month))
+            for totals in (rollup_deltas.setdefault((month, category_id), [0, 0]),
+                           daily_deltas.setdefault((date // 86400, category_id), [0, 0])):
+                totals[0] += amount
+                totals[1] += 1
+
+        self._apply_balance_changes(cursor, account_rows)
+        self._apply_monthly_totals(
+            cursor, [(month, category_id, spent, count) for (month, category_id), (spent, count) in rollup_deltas.items()]
+        )
+        self._apply_daily_totals(
+            cursor, [(day, category_id, spent, count) for (day, category_id), (spent, count) in daily_deltas.items()]
+        )
+
+#   BALANCE CHECKPOINTS
+    def _apply_balance_changes(self, cursor: sqlite3.Cursor, account_rows: Dict[int, List[tuple]]):
+        """Apply newly inserted (date, amount, month) rows per account to balances and checkpoints.
+
+        Checkpoints dated after a back-dated row absorb it. A checkpoint is
+        added at the start of a financial month the account has none in yet,
+        and after every BALANCE_CHECKPOINT_INTERVAL transactions.
+        """
+        start_day = int(cursor.execute(
+            "SELECT value FROM settings WHERE key = 'financial_month_start_day'"
+        ).fetchone()[0])
+        for account_id, changes in account_rows.items():
+            changes.sort()
+            dates = [date for date, _, _ in changes]
+            spent_before = [0]
+            for _, amount, _ in changes:
+                spent_before.append(spent_before[-1] + amount)
+
+            later = cursor.execute('''
+                SELECT date FROM balance_checkpoints WHERE account_id = ? AND date > ?
+            ''', (account_id, dates[0])).fetchall()
+            cursor.executemany('''
+                UPDATE balance_checkpoints SET balance = balance - ? WHERE account_id = ? AND date = ?
+            ''', [(spent_before[bisect_left(dates, date)], account_id, date) for (date,) in later])
+
+            cursor.execute('''
+                UPDATE accounts SET balance = balance - ?, checkpoint_txns = checkpoint_txns + ?
+                WHERE id = ?
+                RETURNING checkpoint_txns
+            ''', (spent_before[-1], len(changes), account_id))
+            pending = cursor.fetchone()[0]
+            last = cursor.execute(
+                'SELECT MAX(date) FROM balance_checkpoints WHERE account_id = ?', (account_id,)
+            ).fetchone()[0]
+            month_start = to_epoch(financial_month_bounds(changes[-1][2], start_day)[0])
+            if last is None or last < month_start:
+                self._checkpoint_balance_at(cursor, account_id, month_start)
+            elif pending >= BALANCE_CHECKPOINT_INTERVAL:
+                self._checkpoint_current_balance(cursor, account_id, last)
+
+    def _checkpoint_balance_at(self, cursor: sqlite3.Cursor, account_id: int, date: int):
+        """Checkpoint the balance before `date`: the current one plus everything spent since"""
+        cursor.execute('''
+            INSERT OR REPLACE INTO balance_checkpoints (account_id, date, balance)
+            SELECT id, ?, balance + (
+                SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE account_id = ? AND date >= ?
+            )
+            FROM accounts WHERE id = ?
+        ''', (date, account_id, date, account_id))
+        cursor.execute('UPDATE accounts SET checkpoint_txns = 0 WHERE id = ?', (account_id,))
+
+    def _checkpoint_current_balance(self, cursor: sqlite3.Cursor, account_id: int, not_before: int):
+        """Checkpoint the current balance just after the account's latest transaction.
+
+        Never earlier than not_before, so a later checkpoint (a balance set by
+        hand) is replaced rather than contradicted.
+        """
+        latest = cursor.execute(
+            'SELECT MAX(date) FROM transactions WHERE account_id = ?', (account_id,)
+        ).fetchone()[0]
+        date = max(not_before, latest + 1) if latest is not None else not_before
+        cursor.execute('''
+            INSERT OR REPLACE INTO balance_checkpoints (account_id, date, balance)
+            SELECT id, ?, balance FROM accounts WHERE id = ?
+        ''', (date, account_id))
+        cursor.execute('UPDATE accounts SET checkpoint_txns = 0 WHERE id = ?', (account_id,))
+
+    def _record_transaction_op(self, cursor: sqlite3.Cursor, date: int, month_str: str,
+                               account_name: str, category: str, amount: int, description: str):
+        cursor.execute('SELECT id FROM accounts WHERE account_name = ?', (account_name,))
+        account = cursor.fetchone()
+        if not account:
+            raise ValueError(f"Account '{account_name}' does not exist")
+        cursor.execute('SELECT id FROM categories WHERE category_name = ?', (category,))
+        category_row = cursor.fetchone()
+        if not category_row:
+            raise ValueError(f"Category '{category}' does not exist")
+        self._insert_transactions(cursor, [(date, month_str, account[0], category_row[0], amount, description)])
+
     def record_transaction(self, account_name: str, category: str, amount: float, description: str):
         """Record a transaction and update account balance"""
+        now = datetime.now()
+        month_str = self.financial_month(now)  # Use financial month
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            self._write(
+                self._record_transaction_op, to_epoch(now), month_str, account_name, category,
+                to_cents(amount), description
+            )
+        except sqlite3.Error as e:
+            raise ValueError(f"Database error: {e}")
+
+    def record_transactions(self, transactions: Iterable[Dict]) -> int:
+        """Validate and record a batch of transactions in a single commit.
+
+        Each item needs account_name, category, amount and description keys,
+        plus an optional datetime under date (defaults to now) that also picks
+        the financial month. If any row is invalid nothing is written and
+        BatchValidationError lists the problems by row index. Returns the
+        number of rows recorded.
+        """
+        now = datetime.now()
+        start_day = self.get_financial_month_start_day()
+        transactions = list(transactions)
+        if not transactions:
+            return 0
+
+        try:
+            with self._connection() as conn:
                 cursor = conn.cursor()
-                now = datetime.now()
-                date_str = now.strftime('%Y-%m-%d %H:%M:%S')
-                month_str = self.financial_month(now)  # Use financial month
-        
-                cursor.execute('''
-                    INSERT INTO transactions (date, month, account_name, category, amount, description)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (date_str, month_str, account_name, category, amount, description))
-        
-                cursor.execute('''
-                    UPDATE accounts SET balance = balance - ? WHERE account_name = ?
-                ''', (amount, account_name))
+                # Hold the write lock while validating so accounts and categories
+                # cannot disappear between the checks and the inserts
+                cursor.execute('BEGIN IMMEDIATE')
+                accounts = dict(cursor.execute('SELECT account_name, id FROM accounts').fetchall())
+                categories = dict(cursor.execute('SELECT category_name, id FROM categories').fetchall())
+
+                rows, errors = [], []
+                for index, txn in enumerate(transactions):
+                    try:
+                        account_name = txn["account_name"]
+                        category = txn["category"]
+                        amount = to_cents(float(txn["amount"]))
+                        description = txn.get("description", "")
+                        date = txn.get("date") or now
+                        timestamp = to_epoch(date)
+                    except (AttributeError, KeyError, TypeError, ValueError) as e:
+                        errors.append({"index": index, "error": f"Invalid transaction: {e}"})
+                        continue
+                    if account_name not in accounts:
+                        errors.append({"index": index, "error": f"Account '{account_name}' does not exist"})
+                    elif category not in categories:
+                        errors.append({"index": index, "error": f"Category '{category}' does not exist"})
+                    else:
+                        rows.append((timestamp, financial_month_for(date, start_day),
+                                     accounts[account_name], categories[category], amount, description))
 
-                conn.commit()
+                if errors:
+                    raise BatchValidationError(errors)
+
+                self._insert_transactions(cursor, rows)
+                return len(rows)
+        except sqlite3.Error as e:
+            raise ValueError(f"Database error: {e}")
+
+#   READING TRANSACTIONS
+    def _transaction_filters(self, start_month: Optional[str] = None, end_month: Optional[str] = None,
+                             account_name: Optional[str] = None, category: Optional[str] = None):
+        """Build a WHERE clause and parameters for the common transaction filters"""
+        clauses, params = [], []
+        if start_month and start_month == end_month:
+            # Equality lets the (month, date) index also provide the ordering
+            clauses.append('t.month = ?')
+            params.append(start_month)
+            start_month = end_month = None
+        if start_month:
+            clauses.append('t.month >= ?')
+            params.append(start_month)
+        if end_month:
+            clauses.append('t.month <= ?')
+            params.append(end_month)
+        if account_name:
+            clauses.append('t.account_id = (SELECT id FROM accounts WHERE account_name = ?)')
+            params.append(account_name)
+        if category:
+            clauses.append('t.category_id = (SELECT id FROM categories WHERE category_name = ?)')
+            params.append(category)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def iter_transactions(self, start_month: Optional[str] = None, end_month: Optional[str] = None,
+                          account_name: Optional[str] = None, category: Optional[str] = None,
+                          batch_size: int = 1000) -> Iterator[Dict]:
+        """Yield matching transactions oldest first, fetching batch_size rows at a time.
+
+        Rows come in (date, id) order so each filter walks the (month, date),
+        (account_id, date), (category_id, date) or, for a month range bounded
+        by dates, (date) index without sorting. Memory use stays flat however
+        many rows match. Rows come from a connection of their own, outside the
+        pool, held until the generator is exhausted or closed; a client
+        reading slowly ties up only that one.
+        """
+        where, params = self._transaction_filters(start_month, end_month, account_name, category)
+        if start_month != end_month:
+            # A month range cannot give date order from the (month, date) index;
+            # bounding the dates lets the (date) index supply both
+            first = _month_span(start_month) if start_month else None
+            last = _month_span(end_month) if end_month else None
+            if first:
+                where += ' AND t.date >= ?'
+                params.append(first[0])
+            if last:
+                where += ' AND t.date < ?'
+                params.append(last[1])
+        with self._pool.dedicated() as conn:
+            cursor = conn.execute(f'''
+                SELECT t.id, t.date, t.month, a.account_name, c.category_name, t.amount, t.description
+                FROM transactions t
+                JOIN accounts a ON a.id = t.account_id
+                JOIN categories c ON c.id = t.category_id{where}
+                ORDER BY t.date, t.id
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _transaction_dict(row)
+
+    def list_transactions(self, month: Optional[str] = None, account_name: Optional[str] = None,
+                          category: Optional[str] = None, limit: int = 50,
+                          cursor: Optional[str] = None) -> Dict:
+        """Return one page of transactions, newest first, using keyset pagination on (date, id).
+
+        cursor is the nextCursor of the previous page. Every page is an index
+        range scan starting where the last one stopped, so deep pages cost the
+        same as the first.
+        """
+        where, params = self._transaction_filters(month, month, account_name, category)
+        if cursor:
+            after_date, after_id = _decode_cursor(cursor)
+            where += ' AND ' if where else ' WHERE '
+            where += '(t.date, t.id) < (?, ?)'
+            params += [after_date, after_id]
+
+        with self._connection() as conn:
+            rows = conn.execute(f'''
+                SELECT t.id, t.date, t.month, a.account_name, c.category_name, t.amount, t.description
+                FROM transactions t
+                JOIN accounts a ON a.id = t.account_id
+                JOIN categories c ON c.id = t.category_id{where}
+                ORDER BY t.date DESC, t.id DESC
+                LIMIT ?
+            ''', params + [limit + 1]).fetchall()
+
+        next_cursor = _encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return {
+            "transactions": [_transaction_dict(row) for row in rows[:limit]],
+            "nextCursor": next_cursor,
+        }
+
+    def search_transactions(self, text: str, month: Optional[str] = None, account_name: Optional[str] = None,
+                            category: Optional[str] = None, limit: int = 50) -> Dict:
+        """Transactions whose description has every word of text as a word prefix, best match first.
+
+        Every match that passes the filters is ranked by bm25, ties newest
+        first, and the best `limit` are returned; truncated says whether more
+        matched. Ranking the whole match set keeps strong older matches that
+        a back-dated import put at high row ids from being dropped.
+        """
+        where, params = self._transaction_filters(month, month, account_name, category)
+        with self._connection() as conn:
+            rows = conn.execute(f'''
+                SELECT t.id, t.date, t.month, a.account_name, c.category_name, t.amount, t.description, f.rank
+                FROM transactions_fts f
+                JOIN transactions t ON t.id = f.rowid
+                JOIN accounts a ON a.id = t.account_id
+                JOIN categories c ON c.id = t.category_id
+                WHERE transactions_fts MATCH ?{where.replace(' WHERE ', ' AND ', 1)}
+                ORDER BY f.rank, t.date DESC, t.id DESC
+                LIMIT ?
+            ''', [_match_expression(text)] + params + [limit + 1]).fetchall()
+        return {
+            "transactions": [{**_transaction_dict(row), "score": round(-row[7], 4)} for row in rows[:limit]],
+            "truncated": len(rows) > limit,
+        }
+
+#   BULK EDITS
+    def _select_transactions(self, cursor: sqlite3.Cursor, ids: Optional[Iterable[int]], month: Optional[str],
+                             account_name: Optional[str], category: Optional[str], exclude_category_id=None):
+        """Copy the transactions to edit into temp.selected_transactions; returns how many there are.
+
+        Rows are picked by id, by the listing filters, or both. Each row
+        carries the running total of its account's selected amounts in
+        (date, id) order, so checkpoints can be corrected by lookup rather
+        than by summing.
+        """
+        where, params = self._transaction_filters(month, month, account_name, category)
+        if ids is not None:
+            where += ' AND ' if where else ' WHERE '
+            where += 't.id IN (SELECT value FROM json_each(?))'
+            params.append(json.dumps([int(i) for i in ids]))
+        if not where:
+            raise ValueError("Select transactions by id or by at least one filter")
+        if exclude_category_id is not None:
+            where += ' AND t.category_id != ?'
+            params.append(exclude_category_id)
+
+        cursor.execute('DROP TABLE IF EXISTS temp.selected_transactions')
+        # The unary + keeps the planner from walking idx_transactions_account_date
+        # end to end for the window's order instead of using the filters' index
+        cursor.execute(f'''
+            CREATE TEMP TABLE selected_transactions AS
+            SELECT t.id, t.date, t.month, t.account_id, t.category_id, t.amount,
+                   SUM(t.amount) OVER (PARTITION BY +t.account_id ORDER BY t.date, t.id) AS running
+            FROM transactions t{where}
+        ''', params)
+        cursor.execute('CREATE INDEX temp.selected_account_date ON selected_transactions (account_id, date, id)')
+        return cursor.execute('SELECT COUNT(*) FROM temp.selected_transactions').fetchone()[0]
+
+    def _shift_selected_totals(self, cursor: sqlite3.Cursor, sign: int, category_id: Optional[int] = None):
+        """Add (sign 1) or remove (sign -1) the selected rows in both rollups, one grouped write each.
+
+        With category_id the rows count under that category instead of their
+        own. Rollup rows left with no transactions are dropped so they cannot
+        keep a category from being deleted.
+        """
+        for table, period in (("monthly_category_totals", "month"), ("daily_category_totals", "day")):
+            source = "month" if period == "month" else "date / 86400"
+            cursor.execute(f'''
+                INSERT INTO {table} ({period}, category_id, spent, txn_count)
+                SELECT {source}, COALESCE(?, category_id), ? * SUM(amount), ? * COUNT(*)
+                FROM temp.selected_transactions
+                WHERE true
+                GROUP BY 1, 2
+                ON CONFLICT ({period}, category_id) DO UPDATE SET
+                    spent = spent + excluded.spent,
+                    txn_count = txn_count + excluded.txn_count
+            ''', (category_id, sign, sign))
+            cursor.execute(f'''
+                DELETE FROM {table}
+                WHERE txn_count = 0
+                  AND ({period}, category_id) IN (
+                      SELECT {source}, COALESCE(?, category_id) FROM temp.selected_transactions
+                  )
+            ''', (category_id,))
+
+    def delete_transactions(self, ids: Optional[Iterable[int]] = None, month: Optional[str] = None,
+                            account_name: Optional[str] = None, category: Optional[str] = None) -> int:
+        """Delete transactions by id and/or filter in one commit, refunding their amounts; returns how many.
+
+        Balances get one grouped UPDATE, the rollups one grouped write per
+        table, and balance checkpoints after each deleted row give its amount
+        back. The search index follows through its delete trigger.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                count = self._select_transactions(cursor, ids, month, account_name, category)
+                if count:
+                    cursor.execute('''
+                        UPDATE accounts SET balance = balance + s.spent
+                        FROM (
+                            SELECT account_id, SUM(amount) AS spent
+                            FROM temp.selected_transactions
+                            GROUP BY account_id
+                        ) s
+                        WHERE accounts.id = s.account_id
+                    ''')
+                    # A checkpoint holds the balance before its date, so it gets back
+                    # every selected amount dated before it: the running total there
+                    cursor.execute('''
+                        UPDATE balance_checkpoints SET balance = balance + (
+                            SELECT s.running FROM temp.selected_transactions s
+                            WHERE s.account_id = balance_checkpoints.account_id
+                              AND s.date < balance_checkpoints.date
+                            ORDER BY s.date DESC, s.id DESC
+                            LIMIT 1
+                        )
+                        WHERE account_id IN (SELECT DISTINCT account_id FROM temp.selected_transactions)
+                          AND date > (
+                              SELECT MIN(s.date) FROM temp.selected_transactions s
+                              WHERE s.account_id = balance_checkpoints.account_id
+                          )
+                    ''')
+                    self._shift_selected_totals(cursor, -1)
+                    cursor.execute('DELETE FROM transactions WHERE id IN (SELECT id FROM temp.selected_transactions)')
+                cursor.execute('DROP TABLE temp.selected_transactions')
+                return count
+        except sqlite3.Error as e:
+            raise ValueError(f"Database error: {e}")
+
+    def recategorize_transactions(self, new_category: str, ids: Optional[Iterable[int]] = None,
+                                  month: Optional[str] = None, account_name: Optional[str] = None,
+                                  category: Optional[str] = None) -> int:
+        """Move transactions picked by id and/or filter to new_category in one commit; returns how many moved.
+
+        Balances and checkpoints are unchanged; the rollups move each
+        (period, category) group with one grouped write per side.
+        """
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                row = cursor.execute('SELECT id FROM categories WHERE category_name = ?', (new_category,)).fetchone()
+                if not row:
+                    raise ValueError(f"Category '{new_category}' does not exist")
+                count = self._select_transactions(cursor, ids, month, account_name, category,
+                                                  exclude_category_id=row[0])
+                if count:
+                    self._shift_selected_totals(cursor, -1)
+                    self._shift_selected_totals(cursor, 1, category_id=row[0])
+                    cursor.execute('''
+                        UPDATE transactions SET category_id = ?
+                        WHERE id IN (SELECT id FROM temp.selected_transactions)
+                    ''', (row[0],))
+                cursor.execute('DROP TABLE temp.selected_transactions')
+                return count
         except sqlite3.Error as e:
             raise ValueError(f"Database error: {e}")
 
+#   MONTHLY CATEGORY ROLLUP
+    def _apply_monthly_totals(self, cursor: sqlite3.Cursor, deltas):
+        """Add (month, category_id, spent, txn_count) deltas to the rollup in the caller's transaction"""
+        cursor.executemany('''
+            INSERT INTO monthly_category_totals (month, category_id, spent, txn_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (month, category_id) DO UPDATE SET
+                spent = spent + excluded.spent,
+                txn_count = txn_count + excluded.txn_count
+        ''', deltas)
+
+    def rebuild_monthly_totals(self) -> int:
+        """Recompute the monthly category rollup from the ledger; returns the number of rows"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM monthly_category_totals')
+            cursor.execute('''
+                INSERT INTO monthly_category_totals (month, category_id, spent, txn_count)
+                SELECT month, category_id, SUM(amount), COUNT(*)
+                FROM transactions
+                GROUP BY month, category_id
+            ''')
+            return cursor.rowcount
+
+    def verify_monthly_totals(self) -> List[Dict]:
+        """Compare the rollup against the ledger and return every (month, category) that differs"""
+        return self._diff_rollup('''
+            SELECT month, category_id, SUM(amount), COUNT(*)
+            FROM transactions
+            GROUP BY month, category_id
+        ''', 'SELECT month, category_id, spent, txn_count FROM monthly_category_totals', "month", str)
+
+    def _diff_rollup(self, ledger_sql: str, rollup_sql: str, period: str, format_period) -> List[Dict]:
+        """Mismatches between (period, category_id, spent, count) rows of the ledger and of a rollup"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ledger_sql)
+            ledger = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+            cursor.execute(rollup_sql)
+            rollup = {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+            names = dict(cursor.execute('SELECT id, category_name FROM categories').fetchall())
+
+        mismatches = []
+        for key in sorted(set(ledger) | set(rollup)):
+            expected = ledger.get(key, (0, 0))
+            actual = rollup.get(key, (0, 0))
+            # Integer cents sum exactly, so any difference is a real mismatch
+            if expected != actual:
+                mismatches.append({
+                    period: format_period(key[0]),
+                    "category": names.get(key[1], key[1]),
+                    "ledgerSpent": from_cents(expected[0]),
+                    "ledgerCount": expected[1],
+                    "rollupSpent": from_cents(actual[0]),
+                    "rollupCount": actual[1],
+                })
+        return mismatches
+
+#   DAILY CATEGORY ROLLUP
+    def _apply_daily_totals(self, cursor: sqlite3.Cursor, deltas):
+        """Add (day, category_id, spent, txn_count) deltas to the daily rollup in the caller's transaction"""
+        cursor.executemany('''
+            INSERT INTO daily_category_totals (day, category_id, spent, txn_count)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (day, category_id) DO UPDATE SET
+                spent = spent + excluded.spent,
+                txn_count = txn_count + excluded.txn_count
+        ''', deltas)
+
+    def rebuild_daily_totals(self) -> int:
+        """Recompute the daily category rollup from the ledger; returns the number of rows"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM daily_category_totals')
+            cursor.execute('''
+                INSERT INTO daily_category_totals (day, category_id, spent, txn_count)
+                SELECT date / 86400, category_id, SUM(amount), COUNT(*)
+                FROM transactions
+                GROUP BY date / 86400, category_id
+            ''')
+            return cursor.rowcount
+
+    def verify_daily_totals(self) -> List[Dict]:
+        """Compare the daily rollup against the ledger and return every (day, category) that differs"""
+        return self._diff_rollup('''
+            SELECT date / 86400, category_id, SUM(amount), COUNT(*)
+            FROM transactions
+            GROUP BY date / 86400, category_id
+        ''', 'SELECT day, category_id, spent, txn_count FROM daily_category_totals', "day", format_day)
+
+#   SPENDING TRENDS
+    def get_trends(self, months: int = 12, end_month: Optional[str] = None, window: int = 3) -> Dict:
+        """Dense month x category spending matrix with rolling averages and month-over-month deltas.
+
+        Read from the monthly rollup in one range scan, so the cost depends on
+        months x categories rather than on the size of the ledger. end_month
+        defaults to the current financial month; limits are the current ones.
+        """
+        if not 1 <= months <= 120:
+            raise ValueError("Months must be between 1 and 120")
+        if not 1 <= window <= 12:
+            raise ValueError("Window must be between 1 and 12")
+        end_month = end_month or self.financial_month()
+        month_list = month_range(end_month, months)
+        return self._cached(("trends", end_month, months, window), lambda: self._compute_trends(month_list, window))
+
+    def _compute_trends(self, month_list: List[str], window: int) -> Dict:
+        with self._connection() as conn:
+            categories = conn.execute(
+                'SELECT id, category_name, monthly_limit FROM categories ORDER BY category_name'
+            ).fetchall()
+            cells = conn.execute('''
+                SELECT month, category_id, spent
+                FROM monthly_category_totals
+                WHERE month BETWEEN ? AND ?
+            ''', (month_list[0], month_list[-1])).fetchall()
+
+        column = {month: i for i, month in enumerate(month_list)}
+        matrix = {cat[0]: [0] * len(month_list) for cat in categories}
+        for month, category_id, spent in cells:
+            matrix[category_id][column[month]] = spent
+        totals = [sum(cents) for cents in zip(*matrix.values())] or [0] * len(month_list)
+
+        return {
+            "months": month_list,
+            "window": window,
+            "categories": [
+                {"name": name, **series([from_cents(c) for c in matrix[category_id]], from_cents(limit), window)}
+                for category_id, name, limit in categories
+            ],
+            "total": series([from_cents(c) for c in totals], from_cents(sum(cat[2] for cat in categories)), window),
+        }
+
+#   RE-BUCKETING TRANSACTIONS
+    def rebucket_transactions(self, chunk_size: int = 50_000, progress=None) -> Dict:
+        """Recompute every transaction's financial month for the current start day, then rebuild the rollup.
+
+        Months are computed in SQL and applied in id-range chunks of chunk_size,
+        each in its own short transaction so other writers are only briefly
+        blocked. Each chunk re-reads the start day, so a change made while the
+        job runs is picked up. progress, if given, is called with a dict of
+        counters after every chunk. Returns the final counters.
+        """
+        with self._connection() as conn:
+            # Separate subqueries: each is a single rowid lookup, MIN and MAX together are a scan
+            min_id, max_id = conn.execute('''
+                SELECT (SELECT MIN(id) FROM transactions), (SELECT MAX(id) FROM transactions)
+            ''').fetchone()
+        counters = {"rowsUpdated": 0, "chunksCommitted": 0, "lastId": 0, "maxId": max_id or 0}
+        if progress:
+            progress(dict(counters))
+
+        low = (min_id or 1) - 1
+        while max_id is not None and low < max_id:
+            high = min(low + chunk_size, max_id)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute("SELECT value FROM settings WHERE key = 'financial_month_start_day'")
+                row = cursor.fetchone()
+                start_day = int(row[0]) if row else 25
+                shift = f'-{start_day - 1} days'
+                cursor.execute(f'''
+                    UPDATE transactions SET month = {_FINANCIAL_MONTH_SQL}
+                    WHERE id > ? AND id <= ? AND month != {_FINANCIAL_MONTH_SQL}
+                ''', (shift, low, high, shift))
+                counters["rowsUpdated"] += cursor.rowcount
+            counters["chunksCommitted"] += 1
+            counters["lastId"] = low = high
+            counters["startDay"] = start_day
+            if progress:
+                progress(dict(counters))
+
+        counters["rollupRows"] = self.rebuild_monthly_totals()
+        if progress:
+            progress(dict(counters))
+        return counters
+
     def close(self):
-        """Close database connection (if persistent connections are used)"""
-        pass
+        """Flush coalesced writes, then close all pooled database connections"""
+        coalescer = getattr(self, '_coalescer', None)
+        if coalescer is not None:
+            coalescer.close()
+        pool = getattr(self, '_pool', None)
+        if pool is not None:
+            pool.close()
 
     def __del__(self):
-        self.close()
\ No newline at end of file
+        self.close()
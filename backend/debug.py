@@ -1,129 +1,59 @@
-import sqlite3
 import os
-from datetime import datetime
-from typing import Dict, List, Tuple
+from collections import defaultdict
+from typing import Optional
+
+from db import BudgetTracker, from_cents
 
 def clear_screen():
     os.system('clear' if os.name != 'nt' else 'cls')
 
-class BudgetTracker:
+class ConsoleTracker:
+    """Menu actions over db.BudgetTracker, so the console and the web app share one schema"""
+
     def __init__(self, db_path='budget.db'):
-        self.db_path = db_path
-        self.conn = None
-        self.setup_database()
-    
-    def setup_database(self):
-        """Initialize database with required tables"""
-        self.conn = sqlite3.connect(self.db_path)
-        cursor = self.conn.cursor()
-        
-        # Bank accounts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS accounts (
-                account_name TEXT PRIMARY KEY,
-                balance REAL NOT NULL
-            )
-        ''')
-        
-        # Budget categories table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                category_name TEXT PRIMARY KEY,
-                monthly_limit REAL NOT NULL
-            )
-        ''')
-        
-        # Transactions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                month TEXT NOT NULL,
-                account_name TEXT NOT NULL,
-                category TEXT NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                FOREIGN KEY (account_name) REFERENCES accounts(account_name),
-                FOREIGN KEY (category) REFERENCES categories(category_name)
-            )
-        ''')
-        
-        self.conn.commit()
+        self.tracker = BudgetTracker(db_path)
     
     def list_accounts(self):
-        """List all existing accounts"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT account_name, balance FROM accounts')
-        accounts = cursor.fetchall()
-        return accounts
+        """List all existing accounts as (name, balance)"""
+        return [(acc["name"], acc["amount"]) for acc in self.tracker.list_accounts()]
     
     def add_account(self, account_name: str, initial_balance: float):
         """Add or update a bank account"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO accounts (account_name, balance)
-            VALUES (?, ?)
-        ''', (account_name, initial_balance))
-        self.conn.commit()
+        try:
+            if account_name in dict(self.list_accounts()):
+                self.tracker.update_account(account_name, account_name, initial_balance)
+            else:
+                self.tracker.add_account(account_name, initial_balance)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return
         print(f"Account '{account_name}' set with balance: R{initial_balance:.2f}")
     
     def list_categories(self):
-        """List all existing categories"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT category_name, monthly_limit FROM categories')
-        categories = cursor.fetchall()
-        return categories
+        """List all existing categories as (name, monthly limit)"""
+        return [(cat["name"], cat["limit"]) for cat in self.tracker.list_categories()]
     
     def add_category(self, category_name: str, monthly_limit: float):
         """Add or update a budget category with spending limit"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT OR REPLACE INTO categories (category_name, monthly_limit)
-            VALUES (?, ?)
-        ''', (category_name, monthly_limit))
-        self.conn.commit()
+        try:
+            self.tracker.update_category(category_name, monthly_limit)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return
         print(f"Category '{category_name}' set with monthly limit: R{monthly_limit:.2f}")
     
     def add_expense(self, account_name: str, category: str, amount: float, description: str = ""):
         """Record a new expense"""
-        cursor = self.conn.cursor()
-        
-        # Check if account exists
-        cursor.execute('SELECT balance FROM accounts WHERE account_name = ?', (account_name,))
-        account = cursor.fetchone()
-        if not account:
-            print(f"Account '{account_name}' not found. Please add it first.")
+        try:
+            self.tracker.record_transaction(account_name, category, amount, description)
+        except ValueError as e:
+            print(f"✗ {e}")
             return
-        
-        # Check if category exists
-        cursor.execute('SELECT category_name FROM categories WHERE category_name = ?', (category,))
-        if not cursor.fetchone():
-            print(f"Category '{category}' not found. Please add it first.")
-            return
-        
-        # Add transaction
-        now = datetime.now()
-        date_str = now.strftime('%Y-%m-%d %H:%M:%S')
-        month_str = now.strftime('%Y-%m')
-        
-        cursor.execute('''
-            INSERT INTO transactions (date, month, account_name, category, amount, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (date_str, month_str, account_name, category, amount, description))
-        
-        # Update account balance
-        cursor.execute('''
-            UPDATE accounts SET balance = balance - ? WHERE account_name = ?
-        ''', (amount, account_name))
-        
-        self.conn.commit()
         print(f"Expense recorded: R{amount:.2f} from {account_name} for {category}")
     
     def view_accounts(self):
         """Display all bank accounts and their balances"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT account_name, balance FROM accounts')
-        accounts = cursor.fetchall()
+        accounts = self.list_accounts()
         
         if not accounts:
             print("No accounts found.")
@@ -140,25 +70,28 @@ class BudgetTracker:
         print(f"{'TOTAL':20s} R{total:10.2f}")
         print("="*50 + "\n")
     
+    def _transactions(self, month: str, category: Optional[str] = None):
+        """Every transaction of a financial month, newest first"""
+        transactions, cursor = [], None
+        while True:
+            page = self.tracker.list_transactions(month=month, category=category, limit=500, cursor=cursor)
+            transactions += page["transactions"]
+            cursor = page["nextCursor"]
+            if cursor is None:
+                return transactions
+    
     def monthly_overview(self, month: str = None):
         """Display comprehensive monthly budget overview"""
         if month is None:
-            month = datetime.now().strftime('%Y-%m')
-        
-        cursor = self.conn.cursor()
+            month = self.tracker.financial_month()
         
         # Get category spending
-        cursor.execute('''
-            SELECT category, SUM(amount) as spent
-            FROM transactions
-            WHERE month = ?
-            GROUP BY category
-        ''', (month,))
-        spending = dict(cursor.fetchall())
+        spending = defaultdict(float)
+        for txn in self.tracker.iter_transactions(month, month):
+            spending[txn["category"]] += txn["amount"]
         
         # Get all categories with limits
-        cursor.execute('SELECT category_name, monthly_limit FROM categories')
-        categories = cursor.fetchall()
+        categories = self.list_categories()
         
         if not categories:
             print("No categories set up yet.")
@@ -190,185 +123,134 @@ class BudgetTracker:
         # Account balances
         self.view_accounts()
     
+    def _print_log(self, title: str, transactions):
+        print("\n" + "="*90)
+        print(title)
+        print("="*90)
+        print(f"{'ID':<5} {'Date':<20} {'Account':<12} {'Category':<12} {'Amount':>10} {'Description':<15}")
+        print("-"*90)
+        
+        for txn in transactions:
+            print(f"{txn['id']:<5} {txn['date']:<20} {txn['account_name']:<12} {txn['category']:<12} "
+                  f"R{txn['amount']:>9.2f} {txn['description'] or '':<15}")
+        
+        print("="*90 + "\n")
+    
     def view_monthly_log(self, month: str = None):
         """View all transactions for a specific month"""
         if month is None:
-            month = datetime.now().strftime('%Y-%m')
+            month = self.tracker.financial_month()
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT id, date, account_name, category, amount, description
-            FROM transactions
-            WHERE month = ?
-            ORDER BY date DESC
-        ''', (month,))
-        transactions = cursor.fetchall()
+        transactions = self._transactions(month)
         
         if not transactions:
             print(f"No transactions found for {month}")
             return
         
-        print("\n" + "="*90)
-        print(f"TRANSACTION LOG - {month}")
-        print("="*90)
-        print(f"{'ID':<5} {'Date':<20} {'Account':<12} {'Category':<12} {'Amount':>10} {'Description':<15}")
-        print("-"*90)
-        
-        for tid, date, account, category, amount, desc in transactions:
-            print(f"{tid:<5} {date:<20} {account:<12} {category:<12} R{amount:>9.2f} {desc:<15}")
-        
-        print("="*90 + "\n")
+        self._print_log(f"TRANSACTION LOG - {month}", transactions)
     
     def category_analysis(self, category: str, month: str = None):
         """Analyze spending in a specific category"""
         if month is None:
-            month = datetime.now().strftime('%Y-%m')
+            month = self.tracker.financial_month()
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT id, date, account_name, amount, description
-            FROM transactions
-            WHERE category = ? AND month = ?
-            ORDER BY date DESC
-        ''', (category, month))
-        transactions = cursor.fetchall()
+        transactions = self._transactions(month, category)
         
         if not transactions:
             print(f"No transactions in '{category}' for {month}")
             return
         
-        cursor.execute('SELECT monthly_limit FROM categories WHERE category_name = ?', (category,))
-        limit = cursor.fetchone()
+        limit = dict(self.list_categories()).get(category)
         
-        total = sum(t[3] for t in transactions)
+        total = sum(t["amount"] for t in transactions)
         
         print("\n" + "="*80)
         print(f"CATEGORY ANALYSIS: {category} - {month}")
         print("="*80)
         if limit:
-            print(f"Monthly Limit: R{limit[0]:.2f}")
+            print(f"Monthly Limit: R{limit:.2f}")
             print(f"Total Spent: R{total:.2f}")
-            print(f"Remaining: R{limit[0] - total:.2f}")
-            print(f"Percentage Used: {(total/limit[0]*100):.1f}%")
+            print(f"Remaining: R{limit - total:.2f}")
+            print(f"Percentage Used: {(total/limit*100):.1f}%")
         else:
             print(f"Total Spent: R{total:.2f}")
         print("-"*80)
         print(f"{'ID':<5} {'Date':<20} {'Account':<15} {'Amount':>10} {'Description'}")
         print("-"*80)
         
-        for tid, date, account, amount, desc in transactions:
-            print(f"{tid:<5} {date:<20} {account:<15} R{amount:>9.2f} {desc}")
+        for txn in transactions:
+            print(f"{txn['id']:<5} {txn['date']:<20} {txn['account_name']:<15} R{txn['amount']:>9.2f} "
+                  f"{txn['description'] or ''}")
         
         print("="*80 + "\n")
     
     def delete_transaction(self, transaction_id: int):
         """Delete a transaction and restore the account balance"""
-        cursor = self.conn.cursor()
-        
-        # Get transaction details before deleting
-        cursor.execute('''
-            SELECT account_name, amount FROM transactions WHERE id = ?
-        ''', (transaction_id,))
-        transaction = cursor.fetchone()
-        
-        if not transaction:
+        # Looked up first only for the confirmation message
+        with self.tracker._connection() as conn:
+            transaction = conn.execute('''
+                SELECT a.account_name, t.amount FROM transactions t
+                JOIN accounts a ON a.id = t.account_id
+                WHERE t.id = ?
+            ''', (transaction_id,)).fetchone()
+        
+        if not transaction or not self.tracker.delete_transactions([transaction_id]):
             print(f"✗ Transaction ID {transaction_id} not found.")
             return False
         
-        account_name, amount = transaction
-        
-        # Delete the transaction
-        cursor.execute('DELETE FROM transactions WHERE id = ?', (transaction_id,))
-        
-        # Restore the amount to the account
-        cursor.execute('''
-            UPDATE accounts SET balance = balance + ? WHERE account_name = ?
-        ''', (amount, account_name))
-        
-        self.conn.commit()
+        account_name, amount = transaction[0], from_cents(transaction[1])
         print(f"✓ Transaction ID {transaction_id} deleted and R{amount:.2f} restored to {account_name}")
         return True
     
     def delete_account(self, account_name: str):
         """Delete a bank account"""
-        cursor = self.conn.cursor()
-        
-        # Check if account has transactions
-        cursor.execute('SELECT COUNT(*) FROM transactions WHERE account_name = ?', (account_name,))
-        count = cursor.fetchone()[0]
+        if account_name not in dict(self.list_accounts()):
+            print(f"✗ Account '{account_name}' not found.")
+            return False
         
-        if count > 0:
-            print(f"✗ Cannot delete '{account_name}'. It has {count} transaction(s).")
+        try:
+            self.tracker.delete_account(account_name)
+        except ValueError as e:
+            print(f"✗ Cannot delete '{account_name}': {e}.")
             print("  Delete the transactions first or keep the account.")
             return False
         
-        cursor.execute('DELETE FROM accounts WHERE account_name = ?', (account_name,))
-        self.conn.commit()
-        
-        if cursor.rowcount > 0:
-            print(f"✓ Account '{account_name}' deleted successfully.")
-            return True
-        else:
-            print(f"✗ Account '{account_name}' not found.")
-            return False
+        print(f"✓ Account '{account_name}' deleted successfully.")
+        return True
     
     def delete_category(self, category_name: str):
         """Delete a category"""
-        cursor = self.conn.cursor()
-        
-        # Check if category has transactions
-        cursor.execute('SELECT COUNT(*) FROM transactions WHERE category = ?', (category_name,))
-        count = cursor.fetchone()[0]
+        if category_name not in dict(self.list_categories()):
+            print(f"✗ Category '{category_name}' not found.")
+            return False
         
-        if count > 0:
-            print(f"✗ Cannot delete '{category_name}'. It has {count} transaction(s).")
+        try:
+            self.tracker.delete_category(category_name)
+        except ValueError as e:
+            print(f"✗ Cannot delete '{category_name}': {e}.")
             print("  Delete the transactions first or keep the category.")
             return False
         
-        cursor.execute('DELETE FROM categories WHERE category_name = ?', (category_name,))
-        self.conn.commit()
-        
-        if cursor.rowcount > 0:
-            print(f"✓ Category '{category_name}' deleted successfully.")
-            return True
-        else:
-            print(f"✗ Category '{category_name}' not found.")
-            return False
+        print(f"✓ Category '{category_name}' deleted successfully.")
+        return True
     
     def view_recent_transactions(self, limit: int = 20):
         """View recent transactions with IDs"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT id, date, account_name, category, amount, description
-            FROM transactions
-            ORDER BY date DESC
-            LIMIT ?
-        ''', (limit,))
-        transactions = cursor.fetchall()
+        transactions = self.tracker.list_transactions(limit=limit)["transactions"]
         
         if not transactions:
             print("No transactions found.")
             return
         
-        print("\n" + "="*90)
-        print("RECENT TRANSACTIONS")
-        print("="*90)
-        print(f"{'ID':<5} {'Date':<20} {'Account':<12} {'Category':<12} {'Amount':>10} {'Description':<15}")
-        print("-"*90)
-        
-        for tid, date, account, category, amount, desc in transactions:
-            print(f"{tid:<5} {date:<20} {account:<12} {category:<12} R{amount:>9.2f} {desc:<15}")
-        
-        print("="*90 + "\n")
+        self._print_log("RECENT TRANSACTIONS", transactions)
     
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        """Close database connections"""
+        self.tracker.close()
 
 
 def main():
-    tracker = BudgetTracker()
+    tracker = ConsoleTracker()
     
     while True:
         clear_screen()
@@ -494,14 +376,14 @@ def main():
         
         elif choice == '5':
             clear_screen()
-            month = input("Month (YYYY-MM, or press Enter for current month): ").strip()
+            month = input("Financial month (YYYY-MM, or press Enter for current month): ").strip()
     
             tracker.monthly_overview(month if month else None)
             input("\nPress Enter to continue")
         
         elif choice == '6':
             clear_screen()
-            month = input("Month (YYYY-MM, or press Enter for current month): ").strip()
+            month = input("Financial month (YYYY-MM, or press Enter for current month): ").strip()
          
             tracker.view_monthly_log(month if month else None)
             input("\nPress Enter to continue")
@@ -509,7 +391,7 @@ def main():
         elif choice == '7':
             clear_screen()
             category = input("Category name: ").strip()
-            month = input("Month (YYYY-MM, or press Enter for current month): ").strip()
+            month = input("Financial month (YYYY-MM, or press Enter for current month): ").strip()
            
             tracker.category_analysis(category, month if month else None)
             input("\nPress Enter to continue")
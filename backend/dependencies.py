@@ -0,0 +1,34 @@
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from async_tracker import AsyncBudgetTracker
+from jobs import JobRegistry
+from tenants import Lease
+
+
+def get_tracker(request: Request) -> AsyncBudgetTracker:
+    """Return the tenant's tracker leased by TenantMiddleware, or the application-scoped one"""
+    lease: Optional[Lease] = getattr(request.state, "tenant", None)
+    if lease is not None:
+        return lease.db
+    if request.app.state.tracker is None:
+        raise HTTPException(status_code=400, detail="The X-Tenant-ID header is required")
+    return request.app.state.tracker
+
+
+def hold_tracker(request: Request) -> Optional[Lease]:
+    """Keep the request's tenant open for a background job; the job releases it when done"""
+    lease: Optional[Lease] = getattr(request.state, "tenant", None)
+    return lease.extend() if lease is not None else None
+
+
+def get_tenant(request: Request) -> Optional[str]:
+    """The request's tenant id, or None when the app serves a single database"""
+    lease: Optional[Lease] = getattr(request.state, "tenant", None)
+    return lease.tenant if lease is not None else None
+
+
+def get_jobs(request: Request) -> JobRegistry:
+    """Return the application-scoped background job registry"""
+    return request.app.state.jobs
@@ -0,0 +1,30 @@
+from typing import List
+
+
+def expected_remaining(history: List[List[int]], elapsed: int, days: int) -> float:
+    """Average spend past months had left after the same point of the month.
+
+    Each history entry is one past month's daily spend. Months of a different
+    length are cut at the same fraction of the month rather than the same day.
+    """
+    remaining = 0
+    for month in history:
+        remaining += sum(month[round(elapsed * len(month) / days):])
+    return remaining / len(history)
+
+
+def project_month_end(current: List[int], history: List[List[int]], elapsed: int) -> float:
+    """Projected month-end spend from the current month's daily spend after elapsed days.
+
+    With history the projection follows the intra-month spend curve of past
+    months: spend so far plus what they typically spent in the rest of the
+    month. Without it the burn rate so far is extended linearly. Spending
+    already recorded against later days is a floor either way.
+    """
+    so_far = sum(current[:elapsed])
+    scheduled = sum(current[elapsed:])
+    if history:
+        ahead = expected_remaining(history, elapsed, len(current))
+    else:
+        ahead = so_far * (len(current) - elapsed) / elapsed
+    return so_far + max(ahead, scheduled)
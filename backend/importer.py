@@ -0,0 +1,211 @@
+"""Streaming bank statement import.
+
+Statements are parsed as generators so only one chunk of rows is ever held
+in memory. Each chunk is written with BudgetTracker.record_transactions, so
+balances and the monthly rollup are adjusted exactly as for single writes,
+and every row is bucketed into the financial month of its own date.
+"""
+import csv
+import io
+import re
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from db import BatchValidationError, BudgetTracker
+
+# Rows that fail to parse or validate are counted; only the first few are kept
+MAX_REPORTED_ERRORS = 100
+
+# (row number, transaction dict or None, error message or None)
+ParsedRow = Tuple[int, Optional[Dict], Optional[str]]
+
+
+class StatementMapping:
+    """How statement fields map onto BudgetTracker transactions.
+
+    account / category are fixed values used when the statement has no
+    matching column (or the column is empty). Bank statements record
+    debits as negative amounts while the tracker treats spending as
+    positive, so amounts are negated unless invert_amounts is False.
+    """
+
+    def __init__(self, account: Optional[str] = None, category: Optional[str] = None,
+                 date_column: str = "Date", amount_column: str = "Amount",
+                 description_column: str = "Description", account_column: Optional[str] = None,
+                 category_column: Optional[str] = None, date_format: str = "%Y-%m-%d",
+                 invert_amounts: bool = True):
+        self.account = account
+        self.category = category
+        self.date_column = date_column
+        self.amount_column = amount_column
+        self.description_column = description_column
+        self.account_column = account_column
+        self.category_column = category_column
+        self.date_format = date_format
+        self.invert_amounts = invert_amounts
+
+    def transaction(self, date: datetime, amount: float, description: str,
+                    account: Optional[str] = None, category: Optional[str] = None) -> Dict:
+        account = account or self.account
+        category = category or self.category
+        if not account:
+            raise ValueError("No account for row")
+        if not category:
+            raise ValueError("No category for row")
+        return {
+            "date": date,
+            "account_name": account,
+            "category": category,
+            "amount": -amount if self.invert_amounts else amount,
+            "description": description,
+        }
+
+
+#   CSV
+def parse_csv(stream: TextIO, mapping: StatementMapping) -> Iterator[ParsedRow]:
+    """Yield one parsed row per CSV record, reading the stream lazily"""
+    reader = csv.DictReader(stream)
+    for row_number, record in enumerate(reader, start=1):
+        try:
+            date = datetime.strptime(record[mapping.date_column].strip(), mapping.date_format)
+            amount = float(record[mapping.amount_column].replace(",", "").strip())
+            description = (record.get(mapping.description_column) or "").strip()
+            account = record.get(mapping.account_column, "").strip() if mapping.account_column else None
+            category = record.get(mapping.category_column, "").strip() if mapping.category_column else None
+            yield row_number, mapping.transaction(date, amount, description, account, category), None
+        except (KeyError, AttributeError, ValueError) as e:
+            yield row_number, None, f"Could not parse row: {e}"
+
+
+#   OFX
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_tokens(stream: TextIO, read_size: int = 65536) -> Iterator[Tuple[bool, str, str]]:
+    """Yield (is_closing, TAG, text) for every tag, for both SGML and XML flavoured OFX"""
+    buffer = ""
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        buffer += chunk
+        # Only tokenise up to the last '<' so a tag split across reads stays whole
+        cut = buffer.rfind("<")
+        if cut <= 0:
+            if cut < 0:
+                buffer = ""
+            continue
+        text, buffer = buffer[:cut], buffer[cut:]
+        for match in _OFX_TAG.finditer(text):
+            yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+    for match in _OFX_TAG.finditer(buffer):
+        yield match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+
+
+def _ofx_date(value: str) -> datetime:
+    """Parse an OFX date such as 20240131, 20240131120000 or 20240131120000.000[-5:EST]"""
+    digits = value[:14]
+    return datetime.strptime(digits, "%Y%m%d%H%M%S" if len(digits) == 14 else "%Y%m%d")
+
+
+def parse_ofx(stream: TextIO, mapping: StatementMapping) -> Iterator[ParsedRow]:
+    """Yield one parsed row per STMTTRN block; ACCTID names the account unless mapped"""
+    statement_account = None
+    current: Optional[Dict[str, str]] = None
+    row_number = 0
+    for closing, tag, text in _ofx_tokens(stream):
+        if tag == "ACCTID" and not closing:
+            statement_account = text
+        elif tag == "STMTTRN":
+            if not closing:
+                current = {}
+                continue
+            if current is None:
+                continue
+            row_number += 1
+            try:
+                description = current.get("NAME") or current.get("MEMO") or ""
+                if current.get("NAME") and current.get("MEMO"):
+                    description = f"{current['NAME']} {current['MEMO']}"
+                yield row_number, mapping.transaction(
+                    _ofx_date(current["DTPOSTED"]),
+                    float(current["TRNAMT"]),
+                    description,
+                    account=mapping.account or statement_account,
+                ), None
+            except (KeyError, ValueError) as e:
+                yield row_number, None, f"Could not parse transaction: {e}"
+            current = None
+        elif current is not None and not closing:
+            current[tag] = text
+
+
+PARSERS: Dict[str, Callable[[TextIO, StatementMapping], Iterator[ParsedRow]]] = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+}
+
+
+#   IMPORTING
+def import_rows(tracker: BudgetTracker, rows: Iterator[ParsedRow], chunk_size: int = 1000,
+                progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Record parsed rows in chunks of chunk_size, one commit per chunk.
+
+    Invalid rows are skipped and reported by row number; they never block
+    the valid rows of the same chunk.
+    """
+    stats = {"rowsRead": 0, "rowsImported": 0, "rowsFailed": 0, "chunksCommitted": 0}
+    errors: List[Dict] = []
+
+    def fail(row_number: int, message: str):
+        stats["rowsFailed"] += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "error": message})
+
+    def flush(chunk: List[Tuple[int, Dict]]):
+        while chunk:
+            try:
+                stats["rowsImported"] += tracker.record_transactions(txn for _, txn in chunk)
+                stats["chunksCommitted"] += 1
+                break
+            except BatchValidationError as e:
+                rejected = {err["index"] for err in e.errors}
+                for err in e.errors:
+                    fail(chunk[err["index"]][0], err["error"])
+                chunk = [item for index, item in enumerate(chunk) if index not in rejected]
+        if progress:
+            progress(dict(stats))
+
+    chunk: List[Tuple[int, Dict]] = []
+    for row_number, txn, error in rows:
+        stats["rowsRead"] += 1
+        if error:
+            fail(row_number, error)
+            continue
+        chunk.append((row_number, txn))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+
+    return dict(stats, errors=errors)
+
+
+def import_statement(tracker: BudgetTracker, raw: BinaryIO, file_format: str, mapping: StatementMapping,
+                     chunk_size: int = 1000, encoding: str = "utf-8-sig",
+                     progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Stream a CSV or OFX statement from a binary file into the tracker"""
+    if file_format not in PARSERS:
+        raise ValueError(f"Unsupported statement format '{file_format}'")
+
+    stream = io.TextIOWrapper(raw, encoding=encoding, errors="replace", newline="")
+
+    def report(stats: Dict):
+        if progress:
+            progress(dict(stats, bytesRead=raw.tell()))
+
+    try:
+        return import_rows(tracker, PARSERS[file_format](stream, mapping), chunk_size, report)
+    finally:
+        # Leave closing the underlying file to the caller
+        stream.detach()
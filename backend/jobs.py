@@ -0,0 +1,87 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+class Job:
+    """Status and progress of one background job"""
+
+    def __init__(self, kind: str, owner: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        # The tenant that started the job; only its requests can see it
+        self.owner = owner
+        self.status = "pending"
+        self.progress: Dict = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, **progress):
+        """Merge progress counters; safe to call from the job's worker thread"""
+        with self._lock:
+            self.progress.update(progress)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created": self.created,
+                "finished": self.finished,
+            }
+
+
+class JobRegistry:
+    """Runs jobs on background threads and remembers the most recent ones for polling"""
+
+    def __init__(self, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, kind: str, fn: Callable[..., Optional[Dict]], *args, hold=None, **kwargs) -> Job:
+        """Run fn(job, *args, **kwargs) in a new thread; its return value becomes the job result.
+
+        `hold` is a tenant lease kept until the job finishes, so the tenant's
+        tracker is not closed under it.
+        """
+        job = Job(kind, hold.tenant if hold is not None else None)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        def run():
+            job.status = "running"
+            try:
+                job.result = fn(job, *args, **kwargs)
+                job.status = "completed"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished = time.time()
+                if hold is not None:
+                    hold.release()
+
+        threading.Thread(target=run, name=f"job-{kind}-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None and job.owner == owner else None
+
+    def _evict(self):
+        """Drop the oldest finished jobs once more than max_jobs are remembered"""
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [j.id for j in self._jobs.values() if j.finished is not None][:max(0, excess)]:
+            del self._jobs[job_id]
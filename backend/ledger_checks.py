@@ -0,0 +1,51 @@
+"""Oracles that check a ledger's derived structures the slow, obvious way.
+
+Shared by the tests and the benchmarks that reconcile after every edit; none
+of this is used by the app.
+"""
+from datetime import datetime, timedelta
+
+from db import BudgetTracker, from_cents, parse_day, to_epoch
+
+
+def balances(tracker: BudgetTracker):
+    with tracker._connection() as conn:
+        return dict(conn.execute('SELECT id, balance FROM accounts').fetchall())
+
+
+def selected_spend(tracker: BudgetTracker, where: str, params):
+    with tracker._connection() as conn:
+        return dict(conn.execute(f'''
+            SELECT account_id, SUM(amount) FROM transactions t WHERE {where} GROUP BY account_id
+        ''', params).fetchall())
+
+
+def replay_history(tracker: BudgetTracker, account_name: str, days):
+    """End-of-day balances without checkpoints"""
+    with tracker._connection() as conn:
+        account_id, balance = conn.execute(
+            'SELECT id, balance FROM accounts WHERE account_name = ?', (account_name,)).fetchone()
+        return [
+            from_cents(balance + conn.execute(
+                'SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE account_id = ? AND date > ?',
+                (account_id, to_epoch(parse_day(day)) + 86399)).fetchone()[0])
+            for day in days
+        ]
+
+
+def reconcile(tracker: BudgetTracker, before, refunds):
+    """Raise AssertionError unless every derived structure still agrees with the ledger"""
+    after = balances(tracker)
+    expected = {account: balance + refunds.get(account, 0) for account, balance in before.items()}
+    assert after == expected, f"balances {after} != {expected}"
+    assert not tracker.verify_monthly_totals(), "monthly rollup differs from the ledger"
+    assert not tracker.verify_daily_totals(), "daily rollup differs from the ledger"
+    assert not tracker.verify_balances(), "balance checkpoints differ from the ledger"
+    with tracker._connection() as conn:
+        conn.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('integrity-check')")
+    start = (datetime.now() - timedelta(days=800)).strftime("%Y-%m-%d")
+    for account in ("account-0", "account-1"):
+        history = tracker.get_balance_history(account, start, None, "month")
+        days = [p["date"] for p in history["points"]]
+        assert [p["balance"] for p in history["points"]] == replay_history(tracker, account, days), \
+            f"{account} history differs from a replay"
@@ -1,21 +1,99 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from routes import accounts, categories, settings  # Add settings
+from routes import accounts, categories, imports, metrics, settings, transactions  # Add settings
 from fastapi.middleware.cors import CORSMiddleware
+from async_tracker import AsyncBudgetTracker
 from db import BudgetTracker
+from jobs import JobRegistry
+from metrics import MetricsMiddleware, request_histogram
+from profiling import ProfileRing, ProfilingMiddleware
+from tenants import TenantMiddleware, TenantRegistry
+
+# Setting BUDGET_METRICS=1 times every query and request for /metrics; when
+# unset neither the tracker nor the app carries any timing code
+METRICS_ENABLED = os.environ.get('BUDGET_METRICS', '0') != '0'
+
+# Setting BUDGET_PROFILE_DIR keeps profiles of selected requests there: those
+# sent with an X-Profile header (equal to BUDGET_PROFILE_TOKEN when set), a
+# BUDGET_PROFILE_SAMPLE_RATE fraction, and any slower than BUDGET_PROFILE_SLOW_MS
+PROFILE_DIR = os.environ.get('BUDGET_PROFILE_DIR')
+
+# Setting BUDGET_TENANT_DIR hosts one database per tenant there, picked by the
+# X-Tenant-ID header, instead of BUDGET_DB_PATH. BUDGET_TENANT_MAX_FILES caps
+# the descriptors held by open tenants and BUDGET_TENANT_MAX_EXPORTS of them
+# stream exports at once; BUDGET_TENANT_CREATE=1 creates a
+# database for an unknown tenant instead of answering 404
+TENANT_DIR = os.environ.get('BUDGET_TENANT_DIR')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One tracker (and one connection pool) per worker, shared by every router;
+    # routes reach it through the async facade so queries never block the loop
+    # Setting BUDGET_COALESCE_WINDOW_MS turns on group commits for bursty writes
+    coalesce_window = os.environ.get('BUDGET_COALESCE_WINDOW_MS')
+    options = dict(
+        coalesce_writes=coalesce_window is not None,
+        coalesce_window_ms=float(coalesce_window or 2.0),
+        cache_results=os.environ.get('BUDGET_RESULT_CACHE', '1') != '0',
+        instrument=METRICS_ENABLED,
+    )
+    if TENANT_DIR:
+        # Each tenant's tracker is opened on demand by the middleware below
+        app.state.tenants = TenantRegistry(
+            TENANT_DIR,
+            max_files=int(os.environ.get('BUDGET_TENANT_MAX_FILES', '1024')),
+            pool_size=int(os.environ.get('BUDGET_TENANT_POOL_SIZE', '2')),
+            workers=int(os.environ.get('BUDGET_TENANT_WORKERS', '16')),
+            max_exports=int(os.environ.get('BUDGET_TENANT_MAX_EXPORTS', '8')),
+            create=os.environ.get('BUDGET_TENANT_CREATE', '0') != '0',
+            **options,
+        )
+        app.state.tracker = None
+    else:
+        app.state.tenants = None
+        app.state.tracker = AsyncBudgetTracker(BudgetTracker(os.environ.get('BUDGET_DB_PATH', 'budget.db'), **options))
+    app.state.jobs = JobRegistry()
+    yield
+    if app.state.tenants:
+        app.state.tenants.close()
+    else:
+        app.state.tracker.close()
 
-app = FastAPI()
 
-# Initialize the database when the app starts
-budget_tracker = BudgetTracker('budget.db')
+app = FastAPI(lifespan=lifespan)
+app.state.http_metrics = request_histogram() if METRICS_ENABLED else None
+# Statement uploads larger than BUDGET_IMPORT_MAX_BYTES are refused with 413
+app.state.import_max_bytes = int(os.environ.get('BUDGET_IMPORT_MAX_BYTES', str(imports.DEFAULT_MAX_UPLOAD_BYTES)))
 
+if TENANT_DIR:
+    # Innermost, so request timings and profiles include opening the tenant
+    app.add_middleware(TenantMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+if PROFILE_DIR:
+    app.add_middleware(
+        ProfilingMiddleware,
+        ring=ProfileRing(PROFILE_DIR, keep=int(os.environ.get('BUDGET_PROFILE_KEEP', '50'))),
+        token=os.environ.get('BUDGET_PROFILE_TOKEN'),
+        sample_rate=float(os.environ.get('BUDGET_PROFILE_SAMPLE_RATE', '0')),
+        slow_ms=float(os.environ.get('BUDGET_PROFILE_SLOW_MS', '0')) or None,
+    )
+if METRICS_ENABLED:
+    # Added last so it is outermost and times the whole middleware stack
+    app.add_middleware(MetricsMiddleware, histogram=app.state.http_metrics)
 
 app.include_router(accounts.router)
 app.include_router(categories.router)
-app.include_router(settings.router)  # Add this
\ No newline at end of file
+app.include_router(settings.router)  # Add this
+app.include_router(imports.router)
+app.include_router(transactions.router)
+app.include_router(metrics.router)
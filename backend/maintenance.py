@@ -0,0 +1,88 @@
+"""Offline maintenance commands for a budget database.
+
+    python maintenance.py rollup verify [--db budget.db]
+    python maintenance.py rollup rebuild [--db budget.db]
+    python maintenance.py rebucket [--chunk-size 50000] [--db budget.db]
+    python maintenance.py checkpoints verify [--db budget.db]
+    python maintenance.py checkpoints rebuild [--db budget.db]
+"""
+import argparse
+import sys
+
+from db import BudgetTracker
+
+
+def rollup(tracker: BudgetTracker, action: str) -> int:
+    if action == "rebuild":
+        rows = tracker.rebuild_monthly_totals()
+        print(f"Rebuilt monthly_category_totals: {rows} (month, category) rows")
+        rows = tracker.rebuild_daily_totals()
+        print(f"Rebuilt daily_category_totals: {rows} (day, category) rows")
+        return 0
+
+    failed = False
+    checks = (("month", "Monthly", tracker.verify_monthly_totals()), ("day", "Daily", tracker.verify_daily_totals()))
+    for period, name, mismatches in checks:
+        for m in mismatches:
+            print(f"{m[period]} {m['category']}: ledger {m['ledgerSpent']} ({m['ledgerCount']} txns), "
+                  f"rollup {m['rollupSpent']} ({m['rollupCount']} txns)")
+        print(f"{len(mismatches)} mismatched ({period}, category) rows" if mismatches
+              else f"{name} rollup matches the ledger")
+        failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+
+def rebucket(tracker: BudgetTracker, chunk_size: int) -> int:
+    def report(p):
+        print(f"\r{p['lastId']}/{p['maxId']} ids scanned, {p['rowsUpdated']} rows moved", end="", flush=True)
+
+    result = tracker.rebucket_transactions(chunk_size, progress=report)
+    print(f"\nRe-bucketed for start day {result.get('startDay', tracker.get_financial_month_start_day())}; "
+          f"rebuilt {result['rollupRows']} rollup rows")
+    return 0
+
+
+def checkpoints(tracker: BudgetTracker, action: str) -> int:
+    if action == "rebuild":
+        rows = tracker.rebuild_balance_checkpoints()
+        print(f"Rebuilt balance_checkpoints: {rows} rows")
+        return 0
+
+    mismatches = tracker.verify_balances()
+    for m in mismatches:
+        print(f"{m['account']}: balance {m['balance']}, checkpoint at {m['checkpoint']} less the ledger "
+              f"{m['ledgerBalance']}")
+    print(f"{len(mismatches)} mismatched accounts" if mismatches else "Balances match the ledger")
+    return 1 if mismatches else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Budget database maintenance")
+    parser.add_argument("--db", default="budget.db", help="path to the SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollup_parser = commands.add_parser("rollup", help="monthly category rollup")
+    rollup_parser.add_argument("action", choices=["verify", "rebuild"])
+
+    rebucket_parser = commands.add_parser("rebucket", help="recompute financial months for the current start day")
+    rebucket_parser.add_argument("--chunk-size", type=int, default=50_000)
+
+    checkpoints_parser = commands.add_parser("checkpoints", help="per-account balance checkpoints")
+    checkpoints_parser.add_argument("action", choices=["verify", "rebuild"])
+
+    args = parser.parse_args()
+    tracker = BudgetTracker(args.db)
+    try:
+        if args.command == "rollup":
+            return rollup(tracker, args.action)
+        if args.command == "rebucket":
+            return rebucket(tracker, args.chunk_size)
+        if args.command == "checkpoints":
+            return checkpoints(tracker, args.action)
+    finally:
+        tracker.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
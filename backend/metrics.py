@@ -0,0 +1,268 @@
+import functools
+import inspect
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds in seconds; most statements finish well under a
+# millisecond, most requests within a few
+QUERY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Outermost BudgetTracker method running in this thread or task; queries are
+# tagged with it, so a statement issued by a helper counts against its caller
+current_method: ContextVar[Optional[str]] = ContextVar("budget_method", default=None)
+
+
+class Histogram:
+    """Latency histograms with fixed buckets, one series per tuple of label values"""
+
+    def __init__(self, buckets: Sequence[float], label_names: Sequence[str]):
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        # labels -> [per-bucket counts with a final +Inf bucket, sum of seconds]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self, name: str, help_text: str) -> List[str]:
+        """Prometheus text exposition lines for every series, with cumulative buckets"""
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, counts, total in sorted(snapshot):
+            base = list(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(base)} {total}")
+            lines.append(f"{name}_count{_labels(base)} {cumulative}")
+        return lines
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(name: str, kind: str, help_text: str, value, pairs=()) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name}{_labels(list(pairs))} {value}"]
+
+
+#   QUERY TIMING
+class TrackerMetrics:
+    """Per-method and per-statement timings of one BudgetTracker"""
+
+    def __init__(self):
+        self.methods = Histogram(QUERY_BUCKETS, ("method",))
+        self.queries = Histogram(QUERY_BUCKETS, ("method", "statement"))
+
+    def observe_query(self, sql: str, seconds: float):
+        words = sql.split(None, 1)
+        self.queries.observe((current_method.get() or "other", words[0].upper() if words else ""), seconds)
+
+    def connection_factory(self):
+        """sqlite3.connect(factory=...) value for connections whose statements are timed"""
+        return functools.partial(InstrumentedConnection, metrics=self)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor timing each execute() into its connection's TrackerMetrics.
+
+    SQLite steps a statement lazily, so the timing covers it up to the first
+    row: the whole statement for writes and aggregates. Fetching the rest of a
+    result set is counted in the calling method's time.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.metrics.observe_query(sql, time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # sqlite3.Connection.execute() does not go through cursor(), so both paths are covered
+    def __init__(self, *args, metrics: TrackerMetrics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def instrument_methods(tracker, metrics: TrackerMetrics, exclude=("close",)):
+    """Shadow the tracker's public methods with timed ones that tag their queries.
+
+    Generator methods are timed per item so the tag never leaks to the
+    consumer between items.
+    """
+    for name, method in inspect.getmembers(tracker, inspect.ismethod):
+        if name.startswith("_") or name in exclude:
+            continue
+        if inspect.isgeneratorfunction(method):
+            setattr(tracker, name, _timed_generator(name, method, metrics))
+        else:
+            setattr(tracker, name, _timed(name, method, metrics))
+
+
+def _timed(name: str, method, metrics: TrackerMetrics):
+    @functools.wraps(method)
+    def call(*args, **kwargs):
+        token = current_method.set(name) if current_method.get() is None else None
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.methods.observe((name,), time.perf_counter() - start)
+            if token is not None:
+                current_method.reset(token)
+    return call
+
+
+def _timed_generator(name: str, method, metrics: TrackerMetrics):
+    @functools.wraps(method)
+    def call(*args, **kwargs):
+        items = method(*args, **kwargs)
+        elapsed = 0.0
+        try:
+            while True:
+                token = current_method.set(name) if current_method.get() is None else None
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                    if token is not None:
+                        current_method.reset(token)
+                yield item
+        finally:
+            metrics.methods.observe((name,), elapsed)
+    return call
+
+
+#   HTTP TIMING
+class MetricsMiddleware:
+    """ASGI middleware timing each request, streamed bodies included, per route template"""
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route in the scope; templates keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.histogram.observe((scope["method"], route, str(status)), time.perf_counter() - start)
+
+
+def request_histogram() -> Histogram:
+    return Histogram(REQUEST_BUCKETS, ("method", "route", "status"))
+
+
+#   EXPOSITION
+def _tracker_samples(tracker) -> List[str]:
+    """Pool, cache and timing series of one tracker"""
+    lines: List[str] = []
+    pool = tracker.pool_stats()
+    lines += _sample("budget_db_connections", "gauge", "Open pooled connections, idle or borrowed.", pool["size"])
+    lines += _sample("budget_db_connections_idle", "gauge", "Idle pooled connections.", pool["idle"])
+    lines += _sample("budget_db_connections_max", "gauge", "Connection pool capacity.", pool["maxSize"])
+    lines += _sample("budget_db_connections_opened_total", "counter", "Connections opened by the pool.",
+                     pool["opened"])
+    lines += _sample("budget_db_connection_waits_total", "counter",
+                     "Acquisitions that waited because the pool was exhausted.", pool["waits"])
+    lines += _sample("budget_db_connection_timeouts_total", "counter",
+                     "Acquisitions that timed out waiting for a connection.", pool["timeouts"])
+    lines += _sample("budget_store_version", "gauge", "Counter bumped by every committed write.",
+                     tracker.store_version())
+
+    cache = tracker.cache_stats()
+    if cache["enabled"]:
+        lines += _sample("budget_result_cache_entries", "gauge", "Cached read results.", cache["entries"])
+        for counter in ("hits", "misses", "evictions", "invalidations"):
+            lines += _sample(f"budget_result_cache_{counter}_total", "counter", f"Result cache {counter}.",
+                             cache[counter])
+
+    metrics: Optional[TrackerMetrics] = getattr(tracker, "metrics", None)
+    if metrics is not None:
+        lines += metrics.methods.render("budget_method_duration_seconds",
+                                        "Wall time of BudgetTracker method calls.")
+        lines += metrics.queries.render("budget_query_duration_seconds",
+                                        "SQLite statement execution time by calling method and statement kind.")
+    return lines
+
+
+def render(tracker=None, http: Optional[Histogram] = None, tenants=None) -> str:
+    """Prometheus text format: pool and cache counters, plus timings when instrumentation is on.
+
+    With a TenantRegistry pass no tracker: a scrape would otherwise report
+    whichever tenant it happened to name under the same series, so only the
+    registry's own counters are rendered.
+    """
+    lines: List[str] = []
+    if tracker is not None:
+        lines += _tracker_samples(tracker)
+    if http is not None:
+        lines += http.render("budget_http_request_duration_seconds", "HTTP request latency by route template.")
+    if tenants is not None:
+        stats = tenants.stats()
+        lines += _sample("budget_tenants_open", "gauge", "Tenants with an open tracker.", stats["open"])
+        lines += _sample("budget_tenants_open_max", "gauge", "Open tenant capacity.", stats["maxOpen"])
+        lines += _sample("budget_tenants_leased", "gauge", "Open tenants in use by a request or job.", stats["leased"])
+        for counter, help_text in (("hits", "Requests served by an already open tenant."),
+                                   ("opens", "Tenant trackers opened."),
+                                   ("evictions", "Idle tenants closed to make room."),
+                                   ("waits", "Acquisitions that waited for a tenant slot.")):
+            lines += _sample(f"budget_tenant_{counter}_total", "counter", help_text, stats[counter])
+    return "\n".join(lines) + "\n"
+
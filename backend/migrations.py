@@ -0,0 +1,479 @@
+import sqlite3
+from typing import Callable, List
+
+# Each migration upgrades the schema by exactly one version. The index in this
+# list plus one is the PRAGMA user_version a database has once it has been
+# applied, so migrations must only ever be appended, never edited or reordered.
+
+
+#   VERSION 1: INITIAL SCHEMA
+def _initial_schema(cursor: sqlite3.Cursor):
+    """Create the original tables; IF NOT EXISTS adopts databases created before migrations"""
+    # Settings table for user preferences
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+
+    # Set default financial month start day if not exists
+    cursor.execute('''
+        INSERT OR IGNORE INTO settings (key, value) VALUES ('financial_month_start_day', '25')
+    ''')
+
+    # Bank accounts table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS accounts (
+            account_name TEXT PRIMARY KEY,
+            balance REAL NOT NULL
+        )
+    ''')
+
+    # Budget categories table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            category_name TEXT PRIMARY KEY,
+            monthly_limit REAL NOT NULL
+        )
+    ''')
+
+    # Transactions table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            month TEXT NOT NULL,
+            account_name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            FOREIGN KEY (account_name) REFERENCES accounts(account_name),
+            FOREIGN KEY (category) REFERENCES categories(category_name)
+        )
+    ''')
+
+
+#   VERSION 2: TRANSACTION INDEXES
+def _transaction_indexes(cursor: sqlite3.Cursor):
+    """Index the transactions access paths used by BudgetTracker"""
+    # Covers the per-month spending aggregates (WHERE month = ? GROUP BY category)
+    # without touching the table rows
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_month_category
+        ON transactions (month, category, amount)
+    ''')
+    # Existence checks before deleting an account or a category
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_account
+        ON transactions (account_name)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_category
+        ON transactions (category)
+    ''')
+
+
+#   VERSION 3: MONTHLY CATEGORY ROLLUP
+def _monthly_category_totals(cursor: sqlite3.Cursor):
+    """Create the per-month, per-category spending rollup and fill it from the ledger"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            spent REAL NOT NULL,
+            txn_count INTEGER NOT NULL,
+            PRIMARY KEY (month, category)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO monthly_category_totals (month, category, spent, txn_count)
+        SELECT month, category, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY month, category
+    ''')
+
+
+#   VERSION 4: KEYSET PAGINATION INDEXES
+def _date_ordered_indexes(cursor: sqlite3.Cursor):
+    """Index transactions by date within each filter so listings page without sorting"""
+    # Every index entry ends with the rowid, so (x, date) is ordered by (x, date, id)
+    # and the (account_name) / (category) existence checks are still served
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_account')
+    cursor.execute('DROP INDEX IF EXISTS idx_transactions_category')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_date
+        ON transactions (date)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_month_date
+        ON transactions (month, date)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_account_date
+        ON transactions (account_name, date)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+        ON transactions (category, date)
+    ''')
+
+
+#   VERSION 5: STORE VERSION
+def _store_version(cursor: sqlite3.Cursor):
+    """Counter bumped by every write, used to validate caches and HTTP ETags across processes"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO store_meta (key, value) VALUES ('store_version', 0)
+    ''')
+
+
+#   VERSION 6: INTEGER SURROGATE KEYS
+def _integer_keys(cursor: sqlite3.Cursor):
+    """Rebuild accounts, categories and the ledger around integer ids so a rename touches one row"""
+    cursor.execute('''
+        CREATE TABLE accounts_new (
+            id INTEGER PRIMARY KEY,
+            account_name TEXT NOT NULL UNIQUE,
+            balance REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE categories_new (
+            id INTEGER PRIMARY KEY,
+            category_name TEXT NOT NULL UNIQUE,
+            monthly_limit REAL NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            month TEXT NOT NULL,
+            account_id INTEGER NOT NULL REFERENCES accounts_new (id),
+            category_id INTEGER NOT NULL REFERENCES categories_new (id),
+            amount REAL NOT NULL,
+            description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE monthly_category_totals_new (
+            month TEXT NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories_new (id),
+            spent REAL NOT NULL,
+            txn_count INTEGER NOT NULL,
+            PRIMARY KEY (month, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Foreign keys were never enforced, so names the ledger uses but the
+    # parent tables lack get a placeholder row with a zero balance / limit
+    cursor.execute('''
+        INSERT INTO accounts_new (account_name, balance)
+        SELECT account_name, balance FROM accounts
+        UNION ALL
+        SELECT DISTINCT account_name, 0 FROM transactions
+        WHERE account_name NOT IN (SELECT account_name FROM accounts)
+    ''')
+    cursor.execute('''
+        INSERT INTO categories_new (category_name, monthly_limit)
+        SELECT category_name, monthly_limit FROM categories
+        UNION ALL
+        SELECT DISTINCT category, 0 FROM transactions
+        WHERE category NOT IN (SELECT category_name FROM categories)
+    ''')
+    cursor.execute('''
+        INSERT INTO transactions_new (id, date, month, account_id, category_id, amount, description)
+        SELECT t.id, t.date, t.month, a.id, c.id, t.amount, t.description
+        FROM transactions t
+        JOIN accounts_new a ON a.account_name = t.account_name
+        JOIN categories_new c ON c.category_name = t.category
+    ''')
+    cursor.execute('''
+        INSERT INTO monthly_category_totals_new (month, category_id, spent, txn_count)
+        SELECT month, category_id, SUM(amount), COUNT(*)
+        FROM transactions_new
+        GROUP BY month, category_id
+    ''')
+
+    # Children first, so dropping the old parents never trips a foreign key
+    cursor.execute('DROP TABLE monthly_category_totals')
+    cursor.execute('DROP TABLE transactions')
+    cursor.execute('DROP TABLE accounts')
+    cursor.execute('DROP TABLE categories')
+    # Renaming a parent also rewrites the REFERENCES clauses that point at it
+    cursor.execute('ALTER TABLE accounts_new RENAME TO accounts')
+    cursor.execute('ALTER TABLE categories_new RENAME TO categories')
+    cursor.execute('ALTER TABLE transactions_new RENAME TO transactions')
+    cursor.execute('ALTER TABLE monthly_category_totals_new RENAME TO monthly_category_totals')
+
+    cursor.execute('''
+        CREATE INDEX idx_transactions_month_category
+        ON transactions (month, category_id, amount)
+    ''')
+    cursor.execute('CREATE INDEX idx_transactions_date ON transactions (date)')
+    cursor.execute('CREATE INDEX idx_transactions_month_date ON transactions (month, date)')
+    cursor.execute('CREATE INDEX idx_transactions_account_date ON transactions (account_id, date)')
+    cursor.execute('CREATE INDEX idx_transactions_category_date ON transactions (category_id, date)')
+
+
+#   VERSION 7: INTEGER CENTS AND EPOCH TIMESTAMPS
+def _typed_storage(cursor: sqlite3.Cursor):
+    """Store money as INTEGER cents and transaction dates as INTEGER UTC epoch seconds"""
+    # Column affinity cannot be altered in place, so every money-bearing table is rebuilt
+    cursor.execute('''
+        CREATE TABLE accounts_new (
+            id INTEGER PRIMARY KEY,
+            account_name TEXT NOT NULL UNIQUE,
+            balance INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE categories_new (
+            id INTEGER PRIMARY KEY,
+            category_name TEXT NOT NULL UNIQUE,
+            monthly_limit INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE transactions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            account_id INTEGER NOT NULL REFERENCES accounts_new (id),
+            category_id INTEGER NOT NULL REFERENCES categories_new (id),
+            amount INTEGER NOT NULL,
+            description TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE monthly_category_totals_new (
+            month TEXT NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories_new (id),
+            spent INTEGER NOT NULL,
+            txn_count INTEGER NOT NULL,
+            PRIMARY KEY (month, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        INSERT INTO accounts_new (id, account_name, balance)
+        SELECT id, account_name, CAST(ROUND(balance * 100) AS INTEGER) FROM accounts
+    ''')
+    cursor.execute('''
+        INSERT INTO categories_new (id, category_name, monthly_limit)
+        SELECT id, category_name, CAST(ROUND(monthly_limit * 100) AS INTEGER) FROM categories
+    ''')
+    # Stored dates are naive '%Y-%m-%d %H:%M:%S' strings; strftime('%s') reads them as UTC,
+    # which is also how the application converts naive datetimes
+    cursor.execute('''
+        INSERT INTO transactions_new (id, date, month, account_id, category_id, amount, description)
+        SELECT id, CAST(strftime('%s', date) AS INTEGER), month, account_id, category_id,
+               CAST(ROUND(amount * 100) AS INTEGER), description
+        FROM transactions
+    ''')
+    # Re-summed from the converted ledger so the rollup matches it to the cent
+    cursor.execute('''
+        INSERT INTO monthly_category_totals_new (month, category_id, spent, txn_count)
+        SELECT month, category_id, SUM(amount), COUNT(*)
+        FROM transactions_new
+        GROUP BY month, category_id
+    ''')
+
+    cursor.execute('DROP TABLE monthly_category_totals')
+    cursor.execute('DROP TABLE transactions')
+    cursor.execute('DROP TABLE accounts')
+    cursor.execute('DROP TABLE categories')
+    cursor.execute('ALTER TABLE accounts_new RENAME TO accounts')
+    cursor.execute('ALTER TABLE categories_new RENAME TO categories')
+    cursor.execute('ALTER TABLE transactions_new RENAME TO transactions')
+    cursor.execute('ALTER TABLE monthly_category_totals_new RENAME TO monthly_category_totals')
+
+    cursor.execute('''
+        CREATE INDEX idx_transactions_month_category
+        ON transactions (month, category_id, amount)
+    ''')
+    cursor.execute('CREATE INDEX idx_transactions_date ON transactions (date)')
+    cursor.execute('CREATE INDEX idx_transactions_month_date ON transactions (month, date)')
+    cursor.execute('CREATE INDEX idx_transactions_account_date ON transactions (account_id, date)')
+    cursor.execute('CREATE INDEX idx_transactions_category_date ON transactions (category_id, date)')
+
+
+#   VERSION 8: DAILY CATEGORY ROLLUP
+def _daily_category_totals(cursor: sqlite3.Cursor):
+    """Create the per-day, per-category spending rollup and fill it from the ledger"""
+    # Days are UTC epoch days (date / 86400), so financial months of any start
+    # day map onto contiguous day ranges and re-bucketing never touches this table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_category_totals (
+            day INTEGER NOT NULL,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            spent INTEGER NOT NULL,
+            txn_count INTEGER NOT NULL,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO daily_category_totals (day, category_id, spent, txn_count)
+        SELECT date / 86400, category_id, SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY date / 86400, category_id
+    ''')
+
+
+#   VERSION 9: DESCRIPTION SEARCH
+def _description_search(cursor: sqlite3.Cursor):
+    """Create the FTS5 index over transaction descriptions and the triggers that keep it in sync"""
+    # External content: the index stores only tokens and reads descriptions
+    # back from transactions by rowid, so the text is not kept twice
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+            description,
+            content = 'transactions',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    # Re-bucketing updates month only, which UPDATE OF description does not fire on
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts (rowid, description) VALUES (new.id, new.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description)
+            VALUES ('delete', old.id, old.description);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+            INSERT INTO transactions_fts (transactions_fts, rowid, description)
+            VALUES ('delete', old.id, old.description);
+            INSERT INTO transactions_fts (rowid, description) VALUES (new.id, new.description);
+        END
+    ''')
+    cursor.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+#   VERSION 10: BALANCE CHECKPOINTS
+# A checkpoint is an account's balance including every transaction dated
+# before its date. This fills them from current balances and the ledger:
+# one at the start of every financial month with transactions, one after
+# every ? transactions, and one after the latest transaction. Month starts
+# come from the stored months and the start day, so the ledger must be
+# bucketed for the current start day
+FILL_BALANCE_CHECKPOINTS_SQL = '''
+    WITH
+        per_second AS (
+            SELECT account_id, date, month, SUM(amount) AS total, COUNT(*) AS n
+            FROM transactions
+            GROUP BY account_id, date
+        ),
+        running AS (
+            SELECT account_id, date, month, total, n,
+                   SUM(n) OVER (PARTITION BY account_id ORDER BY date) AS seen,
+                   SUM(total) OVER (PARTITION BY account_id ORDER BY date DESC) AS from_here,
+                   MIN(date) OVER (PARTITION BY account_id, month) AS month_first
+            FROM per_second
+        ),
+        start_day AS (
+            SELECT CAST(value AS INTEGER) AS day FROM settings WHERE key = 'financial_month_start_day'
+        )
+    INSERT OR REPLACE INTO balance_checkpoints (account_id, date, balance)
+    SELECT r.account_id, unixepoch(r.month || '-01', '-1 month', '+' || (s.day - 1) || ' days'),
+           a.balance + r.from_here
+    FROM running r JOIN accounts a ON a.id = r.account_id, start_day s
+    WHERE r.date = r.month_first
+    UNION ALL
+    SELECT r.account_id, r.date + 1, a.balance + r.from_here - r.total
+    FROM running r JOIN accounts a ON a.id = r.account_id
+    WHERE r.seen / ? > (r.seen - r.n) / ?
+    UNION ALL
+    SELECT a.id, COALESCE(MAX(t.date) + 1, unixepoch('now')), a.balance
+    FROM accounts a LEFT JOIN transactions t ON t.account_id = a.id
+    GROUP BY a.id
+'''
+
+# Transactions between checkpoints taken by FILL_BALANCE_CHECKPOINTS_SQL and as they are recorded
+BALANCE_CHECKPOINT_INTERVAL = 1000
+
+
+def _balance_checkpoints(cursor: sqlite3.Cursor):
+    """Create per-account balance checkpoints for historical balances and fill them from the ledger"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS balance_checkpoints (
+            account_id INTEGER NOT NULL REFERENCES accounts (id),
+            date INTEGER NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY (account_id, date)
+        ) WITHOUT ROWID
+    ''')
+    # Transactions recorded since the account's last checkpoint
+    cursor.execute('ALTER TABLE accounts ADD COLUMN checkpoint_txns INTEGER NOT NULL DEFAULT 0')
+    cursor.execute(FILL_BALANCE_CHECKPOINTS_SQL, (BALANCE_CHECKPOINT_INTERVAL, BALANCE_CHECKPOINT_INTERVAL))
+
+
+#   VERSION 11: BALANCE CHECKPOINTS ON THE STORED CLOCK
+# Version 10 dated the checkpoint of an account without transactions by the
+# UTC clock. Like every stored date, "now" is the local wall-clock time read
+# as UTC, as add_account and rebuild_balance_checkpoints write it
+FILL_LOCAL_BALANCE_CHECKPOINTS_SQL = FILL_BALANCE_CHECKPOINTS_SQL.replace(
+    "unixepoch('now')", "unixepoch('now', 'localtime')")
+
+
+def _balance_checkpoints_local_clock(cursor: sqlite3.Cursor):
+    """Refill balance checkpoints with the current time on the clock transactions are dated by"""
+    cursor.execute('DELETE FROM balance_checkpoints')
+    cursor.execute(FILL_LOCAL_BALANCE_CHECKPOINTS_SQL, (BALANCE_CHECKPOINT_INTERVAL, BALANCE_CHECKPOINT_INTERVAL))
+    cursor.execute('UPDATE accounts SET checkpoint_txns = 0')
+
+
+MIGRATIONS: List[Callable[[sqlite3.Cursor], None]] = [
+    _initial_schema,
+    _transaction_indexes,
+    _monthly_category_totals,
+    _date_ordered_indexes,
+    _store_version,
+    _integer_keys,
+    _typed_storage,
+    _daily_category_totals,
+    _description_search,
+    _balance_checkpoints,
+    _balance_checkpoints_local_clock,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in the database header"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply any pending migrations and return the resulting schema version"""
+    # Fast path: a current database never takes a write lock or runs DDL
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return schema_version(conn)
+
+    # Take the write lock first, then re-check, so concurrent workers starting
+    # against the same file apply each migration exactly once
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = schema_version(conn)
+        cursor = conn.cursor()
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            MIGRATIONS[version - 1](cursor)
+            cursor.execute(f'PRAGMA user_version = {version}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return schema_version(conn)
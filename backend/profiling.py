@@ -0,0 +1,281 @@
+import abc
+import asyncio
+import cProfile
+import itertools
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Capture of the request being handled in this task; AsyncBudgetTracker.run
+# extends it to the worker thread that runs each database call
+current_capture: ContextVar[Optional["Capture"]] = ContextVar("budget_profile", default=None)
+
+
+# From Python 3.12 cProfile is built on sys.monitoring: only one profiler can
+# be active per process, and while it is active it sees every thread
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+class Capture(abc.ABC):
+    suffix = ""
+
+    @abc.abstractmethod
+    def start(self):
+        ...
+
+    @abc.abstractmethod
+    def stop(self):
+        ...
+
+    @abc.abstractmethod
+    def run_in_worker(self, call: Callable[[], T]) -> T:
+        ...
+
+    @abc.abstractmethod
+    def write(self, path: str):
+        ...
+
+
+class CProfileCapture(Capture):
+    """Deterministic profile of one request, written as a pstats file.
+
+    The event loop thread is profiled from the first ASGI message to the
+    last, so coroutines of concurrent requests that run while this one awaits
+    show up too. Before Python 3.12 each database call gets its own profiler
+    on its worker thread, merged when the file is written; from 3.12 the
+    request's one profiler already covers the workers, and a second would
+    fail to start.
+    """
+
+    suffix = ".pstats"
+
+    def __init__(self):
+        self._loop_profile = cProfile.Profile()
+        self._worker_profiles: List[cProfile.Profile] = []
+
+    def start(self):
+        self._loop_profile.enable()
+
+    def stop(self):
+        self._loop_profile.disable()
+
+    def run_in_worker(self, call: Callable[[], T]) -> T:
+        if PROCESS_WIDE_PROFILER:
+            return call()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return call()
+        finally:
+            profile.disable()
+            self._worker_profiles.append(profile)
+
+    def write(self, path: str):
+        stats = pstats.Stats(self._loop_profile)
+        for profile in self._worker_profiles:
+            stats.add(profile)
+        stats.dump_stats(path)
+
+
+class SampleCapture(Capture):
+    """Periodic stack samples of the threads working on one request, written as collapsed stacks.
+
+    The output is one 'root;caller;callee count' line per distinct stack, the
+    input format of flamegraph.pl and speedscope. The event loop thread is
+    shared, so its samples can include concurrent requests.
+    """
+
+    suffix = ".collapsed"
+
+    def __init__(self, sampler: "Sampler"):
+        self.sampler = sampler
+        self.stacks: Counter = Counter()
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _enter(self, ident: int):
+        with self._lock:
+            self._threads[ident] += 1
+
+    def _leave(self, ident: int):
+        with self._lock:
+            self._threads[ident] -= 1
+            if not self._threads[ident]:
+                del self._threads[ident]
+
+    def start(self):
+        self._enter(threading.get_ident())
+        self.sampler.add(self)
+
+    def stop(self):
+        self.sampler.remove(self)
+        self._leave(threading.get_ident())
+
+    def run_in_worker(self, call: Callable[[], T]) -> T:
+        ident = threading.get_ident()
+        self._enter(ident)
+        try:
+            return call()
+        finally:
+            self._leave(ident)
+
+    def record(self, frames: Dict[int, object]):
+        """Count the current stack of every registered thread; called from the sampler thread"""
+        with self._lock:
+            idents = list(self._threads)
+        for ident in idents:
+            frame = frames.get(ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Sampler:
+    """One daemon thread sampling the threads of every in-flight SampleCapture.
+
+    It starts with the first capture and sleeps while none are registered.
+    """
+
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = interval_ms / 1000
+        self._captures: Dict[int, SampleCapture] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, capture: SampleCapture):
+        with self._lock:
+            self._captures[id(capture)] = capture
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="budget-profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def remove(self, capture: SampleCapture):
+        with self._lock:
+            self._captures.pop(id(capture), None)
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            with self._lock:
+                captures = list(self._captures.values())
+            if not captures:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for capture in captures:
+                capture.record(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileRing:
+    """Directory holding the newest `keep` profiles; older ones are deleted as new ones arrive"""
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def next_id(self) -> str:
+        """Sortable id of the next profile: timestamp then a per-process sequence number"""
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self._sequence) % 10000:04d}"
+
+    def save(self, capture: Capture, profile_id: str, label: str) -> str:
+        name = f"{profile_id}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_')}{capture.suffix}"
+        path = os.path.join(self.directory, name)
+        capture.write(path)
+        with self._lock:
+            profiles = sorted(f for f in os.listdir(self.directory) if f.endswith((".pstats", ".collapsed")))
+            for old in profiles[:-self.keep]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except FileNotFoundError:
+                    pass
+        return path
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests into a ProfileRing.
+
+    A request is profiled with cProfile when it carries `header` (with the
+    value of `token`, if one is set) or is picked at `sample_rate`; the
+    profile id is returned in the same header. With `slow_ms` set, every
+    other request is stack-sampled and kept only if it took at least that
+    long, since whether a request will be slow is known only afterwards.
+    """
+
+    def __init__(self, app, ring: ProfileRing, header: str = "X-Profile", token: Optional[str] = None,
+                 sample_rate: float = 0.0, slow_ms: Optional[float] = None, interval_ms: float = 5.0):
+        self.app = app
+        self.ring = ring
+        self.header = header.lower().encode()
+        self.token = token
+        self.sample_rate = sample_rate
+        self.slow = slow_ms / 1000 if slow_ms else None
+        self.sampler = Sampler(interval_ms) if slow_ms else None
+        # cProfile can only run one profiler per thread, and requests share the loop thread
+        self._cprofile_busy = False
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return self.token is None or value.decode() == self.token
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        capture: Optional[Capture] = None
+        profile_id = None
+        if not self._cprofile_busy and self._requested(scope):
+            capture, profile_id = CProfileCapture(), self.ring.next_id()
+            self._cprofile_busy = True
+        elif self.sampler is not None:
+            capture = SampleCapture(self.sampler)
+        if capture is None:
+            return await self.app(scope, receive, send)
+
+        async def send_with_id(message):
+            if profile_id and message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (self.header, profile_id.encode())]}
+            await send(message)
+
+        token = current_capture.set(capture)
+        start = time.perf_counter()
+        capture.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            capture.stop()
+            elapsed = time.perf_counter() - start
+            current_capture.reset(token)
+            if isinstance(capture, CProfileCapture):
+                self._cprofile_busy = False
+            if profile_id or elapsed >= self.slow:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                label = f"{scope['method']}-{route}-{elapsed * 1000:.0f}ms"
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.ring.save, capture, profile_id or self.ring.next_id(), label
+                )
@@ -1,29 +1,48 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi import HTTPException
 from pydantic import BaseModel
-from db import BudgetTracker
+from async_tracker import AsyncBudgetTracker
+from dependencies import get_tracker
+from http_cache import conditional
 
 router = APIRouter(
     prefix="/accounts",
     tags=["Accounts"]
 )
 
-# Instantiate database manager
-db = BudgetTracker()
-
 #Listing accounts
 @router.get("/")
-def get_all_accounts():
-    return db.list_accounts()
+async def get_all_accounts(request: Request, response: Response, db: AsyncBudgetTracker = Depends(get_tracker)):
+    not_modified = conditional(request, response, f'W/"accounts-{await db.store_version()}"')
+    if not_modified:
+        return not_modified
+    return await db.list_accounts()
+
+#Balance history
+# One point per day, week or financial month, each from the nearest balance checkpoint
+@router.get("/balance-history")
+async def get_balance_history(
+    account: str,
+    start: Optional[str] = Query(None, description="First day, YYYY-MM-DD"),
+    end: Optional[str] = Query(None, description="Last day, YYYY-MM-DD"),
+    interval: str = Query("day", pattern="^(day|week|month)$"),
+    db: AsyncBudgetTracker = Depends(get_tracker),
+):
+    try:
+        return await db.get_balance_history(account, start, end, interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 #Adding accountss
 class AddAccountData(BaseModel):
     account_name: str
     account_balance: float
 @router.put ("/addAccount")
-def add_account(account: AddAccountData):
+async def add_account(account: AddAccountData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.add_account(account.account_name, account.account_balance)
+        await db.add_account(account.account_name, account.account_balance)
         return{"message": "Account added succesfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -34,9 +53,9 @@ class UpdateAccountData(BaseModel):
     new_name: str
     amount: float
 @router.put("/update")
-def update_account(account: UpdateAccountData):
+async def update_account(account: UpdateAccountData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.update_account(account.old_name, account.new_name, account.amount)
+        await db.update_account(account.old_name, account.new_name, account.amount)
         return {"message": "Account updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,9 +64,9 @@ def update_account(account: UpdateAccountData):
 class DelAccountData(BaseModel):
     account_name: str
 @router.put("/deleteAccount")
-def delete_account(account: DelAccountData):
+async def delete_account(account: DelAccountData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.delete_account(account.account_name)
+        await db.delete_account(account.account_name)
         return {"message": "Account deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
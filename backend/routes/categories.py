@@ -1,29 +1,56 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi import HTTPException
 from pydantic import BaseModel
-from db import BudgetTracker
+from typing import List, Optional
+from async_tracker import AsyncBudgetTracker
+from db import BatchValidationError
+from dependencies import get_tracker
+from http_cache import conditional
 
 router = APIRouter(
     prefix="/categories",
     tags=["Categories"]
 )
 
-# Instantiate database manager
-db = BudgetTracker()
-
 #Listing categories
 @router.get("/")
-def get_all_catgoires():
-    return db.list_categories()
+async def get_all_catgoires(request: Request, response: Response, db: AsyncBudgetTracker = Depends(get_tracker)):
+    # Spending is per financial month, so a new month must change the tag too
+    etag = f'W/"categories-{await db.store_version()}-{await db.financial_month()}"'
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    return await db.list_categories()
+
+#Spending trends
+# One range read of the monthly rollup for every month and category at once
+@router.get("/trends")
+async def get_trends(
+    request: Request,
+    response: Response,
+    months: int = Query(12, ge=1, le=120),
+    end: Optional[str] = Query(None, description="Last month of the range, YYYY-MM"),
+    window: int = Query(3, ge=1, le=12),
+    db: AsyncBudgetTracker = Depends(get_tracker),
+):
+    end_month = end or await db.financial_month()
+    etag = f'W/"trends-{await db.store_version()}-{end_month}-{months}-{window}"'
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    try:
+        return await db.get_trends(months, end_month, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 #Updating category
 class UpdateCategoryData(BaseModel):
     cat_name: str
     limit: float
 @router.put("/updateCategory")
-def updateCategory(category: UpdateCategoryData):
+async def updateCategory(category: UpdateCategoryData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.update_category(category.cat_name, category.limit)
+        await db.update_category(category.cat_name, category.limit)
         return {"message": "Category updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -32,9 +59,9 @@ def updateCategory(category: UpdateCategoryData):
 class DeleteCategoryData(BaseModel):
     category_name: str
 @router.put("/deleteCategory")
-def deleteCategory(category: DeleteCategoryData):
+async def deleteCategory(category: DeleteCategoryData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.delete_category(category.category_name)
+        await db.delete_category(category.category_name)
         return {"message": "Category deleted successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -44,9 +71,9 @@ class AddCategoryData(BaseModel):
     category_name: str
     category_limit: float
 @router.put("/addCategory")
-def adddCategory(category: AddCategoryData):
+async def adddCategory(category: AddCategoryData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.add_category(category.category_name, category.category_limit)
+        await db.add_category(category.category_name, category.category_limit)
         return {"message": "Category added successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -58,9 +85,9 @@ class AddTransactionData(BaseModel):
     amount: float
     description: str
 @router.put("/recordTransaction")
-def recordTransaction(transaction: AddTransactionData):
+async def recordTransaction(transaction: AddTransactionData, db: AsyncBudgetTracker = Depends(get_tracker)):
     try:
-        db.record_transaction(
+        await db.record_transaction(
             transaction.account_name,
             transaction.category,
             float(transaction.amount),
@@ -69,3 +96,16 @@ def recordTransaction(transaction: AddTransactionData):
         return {"message": "Transaction recorded successfully"}
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+#Adding a batch of transactions in one commit
+class AddTransactionBatchData(BaseModel):
+    transactions: List[AddTransactionData]
+@router.put("/recordTransactions")
+async def recordTransactions(batch: AddTransactionBatchData, db: AsyncBudgetTracker = Depends(get_tracker)):
+    try:
+        recorded = await db.record_transactions(txn.model_dump() for txn in batch.transactions)
+        return {"message": "Transactions recorded successfully", "recorded": recorded}
+    except BatchValidationError as e:
+        raise HTTPException(status_code=400, detail={"message": str(e), "errors": e.errors})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
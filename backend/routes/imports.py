@@ -0,0 +1,118 @@
+import tempfile
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from async_tracker import AsyncBudgetTracker
+from db import BudgetTracker
+from dependencies import get_jobs, get_tenant, get_tracker, hold_tracker
+from importer import PARSERS, StatementMapping, import_statement
+from jobs import Job, JobRegistry
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["Imports"]
+)
+
+# Largest statement accepted when the app does not set app.state.import_max_bytes
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+
+# Received chunks are gathered up to this size before each write to the spool
+SPOOL_WRITE_BYTES = 1024 * 1024
+
+
+def too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Statements are limited to {limit:,} bytes")
+
+
+async def spool_body(request: Request, limit: int):
+    """Copy the request body to a temporary file without blocking the event loop; returns (file, size).
+
+    Writes run on the thread pool, gathered into SPOOL_WRITE_BYTES batches.
+    A body over limit bytes is refused with 413, before reading when its
+    Content-Length says so and otherwise as soon as it goes over.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise too_large(limit)
+
+    spool = await run_in_threadpool(tempfile.TemporaryFile)
+    size, written, pending = 0, 0, []
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > limit:
+                raise too_large(limit)
+            pending.append(chunk)
+            if size - written >= SPOOL_WRITE_BYTES:
+                await run_in_threadpool(spool.write, b"".join(pending))
+                written, pending = size, []
+        if pending:
+            await run_in_threadpool(spool.write, b"".join(pending))
+        await run_in_threadpool(spool.seek, 0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+
+def run_import(job: Job, db: BudgetTracker, spool, file_format: str, mapping: StatementMapping,
+               chunk_size: int):
+    """Background job body: stream the spooled upload into the tracker"""
+    try:
+        return import_statement(db, spool, file_format, mapping, chunk_size, progress=lambda p: job.update(**p))
+    finally:
+        spool.close()
+
+
+#Importing a bank statement
+# The raw file is the request body, so uploads stream to a temporary file
+# without multipart parsing; the import itself runs as a background job.
+# Bodies over the app's import_max_bytes get 413.
+@router.post("/", status_code=202)
+async def import_bank_statement(
+    request: Request,
+    file_format: str = Query("csv", alias="format"),
+    account: Optional[str] = None,
+    category: Optional[str] = None,
+    date_column: str = "Date",
+    amount_column: str = "Amount",
+    description_column: str = "Description",
+    account_column: Optional[str] = None,
+    category_column: Optional[str] = None,
+    date_format: str = "%Y-%m-%d",
+    invert_amounts: bool = True,
+    chunk_size: int = Query(1000, ge=1, le=50000),
+    db: AsyncBudgetTracker = Depends(get_tracker),
+    jobs: JobRegistry = Depends(get_jobs),
+):
+    file_format = file_format.lower()
+    if file_format not in PARSERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported statement format '{file_format}'")
+    if file_format == "csv" and not (account or account_column):
+        raise HTTPException(status_code=400, detail="Provide account or account_column")
+    if not (category or category_column):
+        raise HTTPException(status_code=400, detail="Provide category or category_column")
+
+    spool, size = await spool_body(request, getattr(request.app.state, "import_max_bytes", DEFAULT_MAX_UPLOAD_BYTES))
+
+    mapping = StatementMapping(
+        account=account, category=category, date_column=date_column, amount_column=amount_column,
+        description_column=description_column, account_column=account_column,
+        category_column=category_column, date_format=date_format, invert_amounts=invert_amounts,
+    )
+    job = jobs.start("import", run_import, db.tracker, spool, file_format, mapping, chunk_size,
+                     hold=hold_tracker(request))
+    job.update(bytesTotal=size)
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+
+#Import progress
+@router.get("/{job_id}")
+async def get_import(job_id: str, jobs: JobRegistry = Depends(get_jobs),
+                     tenant: Optional[str] = Depends(get_tenant)):
+    job = jobs.get(job_id, tenant)
+    if job is None or job.kind != "import":
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job.to_dict()
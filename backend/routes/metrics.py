@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+#Prometheus scrape target
+# Pool and cache counters are always present; query and request timings only
+# when the app runs with BUDGET_METRICS=1. With one database per tenant the
+# registry's counters stand in for the per-tracker ones, so no X-Tenant-ID
+# header is needed
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    state = request.app.state
+    tenants = getattr(state, "tenants", None)
+    if tenants is not None:
+        body = metrics.render(None, state.http_metrics, tenants)
+    else:
+        body = await state.tracker.run(metrics.render, state.tracker.tracker, state.http_metrics)
+    return PlainTextResponse(body, media_type=metrics.CONTENT_TYPE)
@@ -1,32 +1,76 @@
 # Add these to your routes or create a new settings.py router
 
-from fastapi import APIRouter, HTTPException
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from async_tracker import AsyncBudgetTracker
 from db import BudgetTracker
+from dependencies import get_jobs, get_tenant, get_tracker, hold_tracker
+from http_cache import conditional
+from jobs import Job, JobRegistry
 
 router = APIRouter(prefix="/settings", tags=["settings"])
-tracker = BudgetTracker('budget.db')
+
+def run_rebucket(job: Job, db: BudgetTracker):
+    """Background job body: move transactions into the financial months of the current start day"""
+    return db.rebucket_transactions(progress=lambda p: job.update(**p))
 
 class FinancialMonthSetting(BaseModel):
     start_day: int
 
 @router.get("/financial-month-start")
-async def get_financial_month_start():
+async def get_financial_month_start(tracker: AsyncBudgetTracker = Depends(get_tracker)):
     """Get the current financial month start day"""
     return {
-        "start_day": tracker.get_financial_month_start_day()
+        "start_day": await tracker.get_financial_month_start_day()
     }
 
 @router.put("/financial-month-start")
-async def set_financial_month_start(setting: FinancialMonthSetting):
-    """Set the financial month start day (1-28)"""
+async def set_financial_month_start(request: Request, setting: FinancialMonthSetting,
+                                    tracker: AsyncBudgetTracker = Depends(get_tracker),
+                                    jobs: JobRegistry = Depends(get_jobs)):
+    """Set the financial month start day (1-28) and re-bucket existing transactions if it changed"""
     try:
-        tracker.set_financial_month_start_day(setting.start_day)
-        return {"message": "Financial month start day updated successfully"}
+        previous = await tracker.get_financial_month_start_day()
+        await tracker.set_financial_month_start_day(setting.start_day)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    result = {"message": "Financial month start day updated successfully"}
+    if setting.start_day != previous:
+        # Existing transactions still carry months computed with the old start day
+        result["job"] = jobs.start("rebucket", run_rebucket, tracker.tracker, hold=hold_tracker(request)).to_dict()
+    return result
+
+@router.post("/rebucket", status_code=202)
+async def start_rebucket(request: Request, tracker: AsyncBudgetTracker = Depends(get_tracker),
+                         jobs: JobRegistry = Depends(get_jobs)):
+    """Recompute every transaction's financial month for the current start day"""
+    job = jobs.start("rebucket", run_rebucket, tracker.tracker, hold=hold_tracker(request))
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+@router.get("/rebucket/{job_id}")
+async def get_rebucket(job_id: str, jobs: JobRegistry = Depends(get_jobs),
+                       tenant: Optional[str] = Depends(get_tenant)):
+    """Progress of a re-bucketing job"""
+    job = jobs.get(job_id, tenant)
+    if job is None or job.kind != "rebucket":
+        raise HTTPException(status_code=404, detail="Re-bucketing job not found")
+    return job.to_dict()
 
 @router.get("/performance")
-async def get_performance():
+async def get_performance(request: Request, response: Response, tracker: AsyncBudgetTracker = Depends(get_tracker)):
     """Get comprehensive performance data for the current financial month"""
-    return tracker.get_performance_data()
\ No newline at end of file
+    # daysRemaining and the month boundaries move daily even without writes
+    etag = f'W/"performance-{await tracker.store_version()}-{date.today().isoformat()}"'
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+    return await tracker.get_performance_data()
+
+@router.get("/cache")
+async def get_cache_stats(tracker: AsyncBudgetTracker = Depends(get_tracker)):
+    """Hit/miss counters of the dashboard result cache"""
+    return await tracker.cache_stats()
@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from async_tracker import AsyncBudgetTracker
+from dependencies import get_tracker
+
+router = APIRouter(
+    prefix="/transactions",
+    tags=["Transactions"]
+)
+
+EXPORT_FIELDS = ["id", "date", "month", "account_name", "category", "amount", "description"]
+
+# Rows are serialised in groups so each chunk sent is a few dozen KB
+EXPORT_CHUNK_ROWS = 500
+
+
+def csv_chunks(rows: Iterable[Dict]) -> Iterator[str]:
+    """Serialise rows as CSV, one header line then one string per group of rows"""
+    rows = iter(rows)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    while True:
+        group = list(islice(rows, EXPORT_CHUNK_ROWS))
+        if group:
+            writer.writerows(group)
+        chunk = buffer.getvalue()
+        if chunk:
+            yield chunk
+        if not group:
+            break
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def ndjson_chunks(rows: Iterable[Dict]) -> Iterator[str]:
+    """Serialise rows as newline-delimited JSON, one string per group of rows"""
+    rows = iter(rows)
+    while True:
+        group = list(islice(rows, EXPORT_CHUNK_ROWS))
+        if not group:
+            break
+        yield "".join(json.dumps(row) + "\n" for row in group)
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_chunks, "text/csv"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+}
+
+
+#Listing transactions, one keyset page at a time
+@router.get("/")
+async def list_transactions(
+    month: Optional[str] = None,
+    account: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncBudgetTracker = Depends(get_tracker),
+):
+    try:
+        return await db.list_transactions(month, account, category, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+#Searching transaction descriptions
+# Every word of q matches as a word prefix ("ube" finds "Uber"). Every match is
+# ranked, best first; the response holds the best `limit` and truncated is
+# true when more matched, so narrow q or the filters rather than paging
+@router.get("/search")
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    month: Optional[str] = None,
+    account: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500, description="Most matches returned; truncated is true when more matched"),
+    db: AsyncBudgetTracker = Depends(get_tracker),
+):
+    try:
+        return await db.search_transactions(q, month, account, category, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+#Deleting transactions in bulk
+# Pick rows by ids, by filters, or both; all of them go in one commit
+class TransactionSelection(BaseModel):
+    ids: Optional[List[int]] = None
+    month: Optional[str] = None
+    account: Optional[str] = None
+    category: Optional[str] = None
+@router.put("/delete")
+async def delete_transactions(selection: TransactionSelection, db: AsyncBudgetTracker = Depends(get_tracker)):
+    try:
+        deleted = await db.delete_transactions(selection.ids, selection.month, selection.account, selection.category)
+        return {"message": "Transactions deleted successfully", "deleted": deleted}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+#Re-categorizing transactions in bulk
+class RecategorizeData(TransactionSelection):
+    new_category: str
+@router.put("/recategorize")
+async def recategorize_transactions(data: RecategorizeData, db: AsyncBudgetTracker = Depends(get_tracker)):
+    try:
+        moved = await db.recategorize_transactions(
+            data.new_category, data.ids, data.month, data.account, data.category
+        )
+        return {"message": "Transactions re-categorized successfully", "recategorized": moved}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+#Exporting transactions
+@router.get("/export")
+async def export_transactions(
+    file_format: str = Query("csv", alias="format"),
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None,
+    account: Optional[str] = None,
+    category: Optional[str] = None,
+    db: AsyncBudgetTracker = Depends(get_tracker),
+):
+    if file_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{file_format}'")
+    serialise, media_type = EXPORT_FORMATS[file_format]
+    rows = db.tracker.iter_transactions(start_month, end_month, account, category)
+    return StreamingResponse(
+        db.iterate(serialise(rows)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{file_format}"'},
+    )
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from starlette.responses import JSONResponse
+
+from async_tracker import AsyncBudgetTracker
+from db import BudgetTracker
+
+TENANT_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$')
+
+# Descriptors one connection can hold: the database file and its WAL (the
+# shared-memory index is opened once per file, counted per tenant). Each
+# tenant holds its pooled connections plus the data_version watcher; export
+# connections, opened outside the pools, draw on a reserve shared by all
+FILES_PER_CONNECTION = 2
+
+
+class UnknownTenant(LookupError):
+    pass
+
+
+class TenantsBusy(RuntimeError):
+    pass
+
+
+class _Tenant:
+    def __init__(self, name: str, db: AsyncBudgetTracker):
+        self.name = name
+        self.db = db
+        self.leases = 0
+
+
+class Lease:
+    """One holder's claim on an open tenant; the tenant cannot be closed until every lease is released"""
+
+    def __init__(self, registry: "TenantRegistry", tenant: _Tenant):
+        self._registry = registry
+        self._tenant = tenant
+        self.tenant = tenant.name
+        self.db = tenant.db
+        self._released = False
+
+    def extend(self) -> "Lease":
+        """A second lease on the same tenant, for work that outlives the request (a background job)"""
+        return self._registry._retain(self._tenant)
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._registry._release(self._tenant)
+
+
+class TenantRegistry:
+    """One BudgetTracker per tenant, each in its own SQLite file under `directory`.
+
+    Trackers stay open in least-recently-used order so hot tenants keep their
+    pooled connections and result caches. At most `max_files` descriptors are
+    held: `max_exports` dedicated export connections, across all tenants,
+    share a reserved part, and opening a tenant beyond what is left closes
+    the least recently used one no request or job holds a lease on, or waits
+    up to `timeout` for one to be released. All tenants share one executor so
+    the thread count does not grow with the number of open tenants.
+    """
+
+    def __init__(self, directory: str, max_files: int = 1024, pool_size: int = 2, workers: int = 16,
+                 create: bool = False, timeout: float = 30.0, max_exports: int = 8, **tracker_options):
+        self.directory = directory
+        self.pool_size = pool_size
+        self.max_exports = max_exports
+        per_tenant = (pool_size + 1) * FILES_PER_CONNECTION + 1
+        self.max_open = max(1, (max_files - max_exports * FILES_PER_CONNECTION) // per_tenant)
+        self._exports = threading.BoundedSemaphore(max_exports)
+        self.create = create
+        self.timeout = timeout
+        self.tracker_options = tracker_options
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="budget-db")
+        self._open: "OrderedDict[str, _Tenant]" = OrderedDict()
+        self._opening: Set[str] = set()
+        self._changed = threading.Condition()
+        self._hits = 0
+        self._opens = 0
+        self._evictions = 0
+        self._waits = 0
+        self._closed = False
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, tenant: str) -> str:
+        if not TENANT_ID.match(tenant):
+            raise ValueError("Tenant ids are 1-64 letters, digits, '-' or '_'")
+        return os.path.join(self.directory, f"{tenant}.db")
+
+    def try_acquire(self, tenant: str) -> Optional[Lease]:
+        """A lease on an already open tenant, or None; never blocks, so it is safe on the event loop"""
+        with self._changed:
+            entry = self._open.get(tenant)
+            if entry is None:
+                return None
+            self._open.move_to_end(tenant)
+            self._hits += 1
+            return self._lease(entry)
+
+    def acquire(self, tenant: str) -> Lease:
+        """A lease on the tenant, opening it (and closing an idle one) if needed; blocks"""
+        path = self.path(tenant)
+        if not self.create and not os.path.exists(path):
+            raise UnknownTenant(tenant)
+        victim: Optional[_Tenant] = None
+        with self._changed:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Tenant registry is closed")
+                entry = self._open.get(tenant)
+                if entry is not None:
+                    self._open.move_to_end(tenant)
+                    self._hits += 1
+                    return self._lease(entry)
+                if tenant not in self._opening:
+                    if len(self._open) + len(self._opening) < self.max_open:
+                        break
+                    victim = next((e for e in self._open.values() if e.leases == 0), None)
+                    if victim is not None:
+                        del self._open[victim.name]
+                        self._evictions += 1
+                        break
+                # Another thread is opening this tenant, or every open one is leased
+                self._waits += 1
+                if not self._changed.wait(self.timeout):
+                    raise TenantsBusy("Timed out waiting for an open tenant slot")
+            self._opening.add(tenant)
+
+        try:
+            if victim is not None:
+                victim.db.close()
+            tracker = BudgetTracker(path, pool_size=self.pool_size, dedicated_slots=self._exports,
+                                    **self.tracker_options)
+        except BaseException:
+            with self._changed:
+                self._opening.discard(tenant)
+                self._changed.notify_all()
+            raise
+
+        entry = _Tenant(tenant, AsyncBudgetTracker(tracker, self._executor))
+        with self._changed:
+            self._opening.discard(tenant)
+            self._open[tenant] = entry
+            self._opens += 1
+            self._changed.notify_all()
+            return self._lease(entry)
+
+    def _lease(self, entry: _Tenant) -> Lease:
+        entry.leases += 1
+        return Lease(self, entry)
+
+    def _retain(self, entry: _Tenant) -> Lease:
+        with self._changed:
+            return self._lease(entry)
+
+    def _release(self, entry: _Tenant):
+        with self._changed:
+            entry.leases -= 1
+            if entry.leases == 0:
+                self._changed.notify_all()
+
+    def stats(self) -> Dict:
+        with self._changed:
+            return {
+                "open": len(self._open),
+                "maxOpen": self.max_open,
+                "leased": sum(1 for e in self._open.values() if e.leases),
+                "hits": self._hits,
+                "opens": self._opens,
+                "evictions": self._evictions,
+                "waits": self._waits,
+            }
+
+    def close(self):
+        """Close every open tenant once queued database calls have finished"""
+        with self._changed:
+            self._closed = True
+            entries = list(self._open.values())
+            self._open.clear()
+            self._changed.notify_all()
+        self._executor.shutdown(wait=True)
+        for entry in entries:
+            entry.db.close()
+
+
+class TenantMiddleware:
+    """ASGI middleware leasing the tenant named in `header` for the whole request, streamed bodies included.
+
+    The lease is left in the request state for get_tracker. Requests without
+    the header pass through untouched, so routes that need no database (docs,
+    CORS preflights) work without one. Without `registry` the one the
+    lifespan put in app.state.tenants is used.
+    """
+
+    def __init__(self, app, registry: Optional[TenantRegistry] = None, header: str = "X-Tenant-ID"):
+        self.app = app
+        self.registry = registry
+        self.header = header.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        tenant = next((value.decode() for name, value in scope["headers"] if name == self.header), None)
+        if tenant is None:
+            return await self.app(scope, receive, send)
+
+        registry = self.registry or scope["app"].state.tenants
+        try:
+            lease = registry.try_acquire(tenant)
+            if lease is None:
+                # Opening a tenant runs migrations and may wait for a free slot
+                lease = await asyncio.get_running_loop().run_in_executor(None, registry.acquire, tenant)
+        except ValueError as e:
+            return await JSONResponse({"detail": str(e)}, status_code=400)(scope, receive, send)
+        except UnknownTenant:
+            return await JSONResponse({"detail": f"Unknown tenant '{tenant}'"}, status_code=404)(scope, receive, send)
+        except TenantsBusy as e:
+            return await JSONResponse({"detail": str(e)}, status_code=503)(scope, receive, send)
+
+        async def send_with_vary(message):
+            # ETags come from the tenant's store version, so a cached response
+            # must never be revalidated against another tenant
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"vary", self.header)]}
+            await send(message)
+
+        scope.setdefault("state", {})["tenant"] = lease
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            lease.release()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way the app does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import BudgetTracker  # noqa: E402
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = BudgetTracker(str(tmp_path / "budget.db"))
+    yield tracker
+    tracker.close()
@@ -0,0 +1,22 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from benchmarks.asgi_client import request
+
+
+def test_streamed_body_arrives_whole():
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                await asyncio.sleep(0)
+                yield f"{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    status, _, body = asyncio.run(request(app, "GET", "/stream"))
+    assert status == 200
+    assert body == b"0\n1\n2\n3\n4\n"
@@ -0,0 +1,63 @@
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from db import BudgetTracker, format_epoch, to_epoch
+from migrations import MIGRATIONS
+
+
+@pytest.fixture
+def far_timezone(monkeypatch):
+    """Twelve hours off UTC, on whichever side puts the local date on another day than UTC's"""
+    # POSIX zone names invert the sign: Etc/GMT+12 is UTC-12
+    monkeypatch.setenv("TZ", "Etc/GMT+12" if datetime.now(timezone.utc).hour < 12 else "Etc/GMT-12")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def checkpoint_dates(tracker):
+    with tracker._connection() as conn:
+        return [date for (date,) in conn.execute('SELECT date FROM balance_checkpoints ORDER BY account_id')]
+
+
+def test_rebuilt_checkpoint_of_an_idle_account_matches_add_account(far_timezone, tracker):
+    tracker.add_account("savings", 100.0)
+    [created] = checkpoint_dates(tracker)
+
+    tracker.rebuild_balance_checkpoints()
+
+    [rebuilt] = checkpoint_dates(tracker)
+    assert abs(rebuilt - created) < 60, f"{format_epoch(rebuilt)} vs {format_epoch(created)}"
+    assert not tracker.verify_balances()
+
+
+def test_history_ends_today_on_the_stored_clock(far_timezone, tracker):
+    tracker.add_account("savings", 100.0)
+    points = tracker.get_balance_history("savings")["points"]
+    assert points[-1]["date"] == datetime.now().strftime("%Y-%m-%d")
+    assert points[-1]["balance"] == 100.0
+
+
+def test_migration_moves_idle_checkpoints_to_the_stored_clock(far_timezone, tmp_path):
+    # A ledger migrated to version 10, whose checkpoints were filled on the UTC clock
+    path = str(tmp_path / "budget.db")
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    for version, migration in enumerate(MIGRATIONS[:10], 1):
+        if version == 10:
+            cursor.execute("INSERT INTO accounts (account_name, balance) VALUES ('savings', 10000)")
+        migration(cursor)
+        cursor.execute(f'PRAGMA user_version = {version}')
+    conn.commit()
+    conn.close()
+
+    tracker = BudgetTracker(path)
+    [migrated] = checkpoint_dates(tracker)
+    now = to_epoch(datetime.now())
+    assert abs(migrated - now) < 60, f"{format_epoch(migrated)} vs {format_epoch(now)}"
+    assert not tracker.verify_balances()
+    tracker.close()
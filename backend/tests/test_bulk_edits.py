@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from ledger_checks import balances, reconcile, selected_spend
+
+
+@pytest.fixture
+def ledger(tracker):
+    """Two accounts and three categories with six months of back-dated spending, checkpointed monthly"""
+    for account in ("account-0", "account-1"):
+        tracker.add_account(account, 5_000.0)
+    for category in ("category-0", "category-1", "category-2"):
+        tracker.add_category(category, 1_000.0)
+    now = datetime.now()
+    tracker.record_transactions(
+        {"account_name": f"account-{i % 2}", "category": f"category-{i % 3}", "amount": 1.0 + i % 7,
+         "description": f"row {i}", "date": now - timedelta(days=180 - i)}
+        for i in range(180)
+    )
+    tracker.rebuild_balance_checkpoints()
+    return tracker
+
+
+def edit_and_reconcile(tracker, edit, where, params=()):
+    """Run the edit and check it against the ledger; returns the edit's row count"""
+    before = balances(tracker)
+    refunds = selected_spend(tracker, where, list(params))
+    count = edit()
+    reconcile(tracker, before, refunds)
+    return count
+
+
+def test_delete_by_ids(ledger):
+    ids = [3, 40, 41, 90, 177]
+    count = edit_and_reconcile(ledger, lambda: ledger.delete_transactions(ids),
+                               f"t.id IN ({','.join(map(str, ids))})")
+    assert count == len(ids)
+
+
+def test_delete_by_filter(ledger):
+    month = ledger.financial_month(datetime.now() - timedelta(days=90))
+    count = edit_and_reconcile(
+        ledger, lambda: ledger.delete_transactions(month=month, account_name="account-1"),
+        "t.month = ? AND t.account_id = (SELECT id FROM accounts WHERE account_name = 'account-1')", [month])
+    assert count > 0
+    with ledger._connection() as conn:
+        assert conn.execute('''
+            SELECT COUNT(*) FROM transactions t JOIN accounts a ON a.id = t.account_id
+            WHERE t.month = ? AND a.account_name = 'account-1'
+        ''', (month,)).fetchone()[0] == 0
+
+
+def test_recategorize(ledger):
+    month = ledger.financial_month(datetime.now() - timedelta(days=60))
+    with ledger._connection() as conn:
+        expected = conn.execute('''
+            SELECT COUNT(*) FROM transactions t JOIN categories c ON c.id = t.category_id
+            WHERE t.month = ? AND c.category_name = 'category-1'
+        ''', (month,)).fetchone()[0]
+    # Balances must not move at all, so nothing is refunded
+    count = edit_and_reconcile(
+        ledger, lambda: ledger.recategorize_transactions("category-2", month=month, category="category-1"), "false")
+    assert count == expected > 0
+    assert edit_and_reconcile(
+        ledger, lambda: ledger.recategorize_transactions("category-0", ids=[1, 2, 3]), "false") == 2
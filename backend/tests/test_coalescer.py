@@ -0,0 +1,28 @@
+import pytest
+
+from db import BudgetTracker
+
+
+def test_pool_timeout_fails_the_group_not_the_writer(tmp_path):
+    tracker = BudgetTracker(str(tmp_path / "budget.db"), pool_size=1, coalesce_writes=True)
+    tracker._pool.timeout = 0.2
+    borrowed = tracker._pool.acquire()
+    with pytest.raises(RuntimeError, match="Timed out"):
+        tracker.add_account("starved", 1.0)
+    tracker._pool.release(borrowed)
+
+    # The writer thread survived and serves later writes
+    tracker.add_account("later", 2.0)
+    assert tracker.list_accounts() == [{"name": "later", "amount": 2.0}]
+    tracker.close()
+
+
+def test_submit_fails_fast_once_the_writer_is_gone(tmp_path):
+    tracker = BudgetTracker(str(tmp_path / "budget.db"), coalesce_writes=True)
+    coalescer = tracker._coalescer
+    coalescer._queue.put(None)
+    coalescer._thread.join()
+    with pytest.raises(RuntimeError, match="stopped"):
+        coalescer.submit(lambda cursor: None)
+    tracker._coalescer = None
+    tracker.close()
@@ -0,0 +1,56 @@
+import asyncio
+import csv
+import io
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+
+from async_tracker import AsyncBudgetTracker
+from benchmarks.asgi_client import request
+from db import BudgetTracker
+from routes import transactions
+
+
+def seed(tracker, rows):
+    tracker.add_account("checking", 1_000.0)
+    tracker.add_category("food", 500.0)
+    tracker.record_transactions(
+        {"account_name": "checking", "category": "food", "amount": 1.0, "description": f"row {i}"}
+        for i in range(rows)
+    )
+
+
+def test_open_exports_leave_the_pool_free(tmp_path):
+    tracker = BudgetTracker(str(tmp_path / "budget.db"), pool_size=2)
+    seed(tracker, 50)
+    idle = tracker.pool_stats()["size"]
+
+    # More half-read exports than the pool has connections, like slow downloads
+    exports = [tracker.iter_transactions(batch_size=10) for _ in range(4)]
+    assert [next(rows)["description"] for rows in exports] == ["row 0"] * 4
+    assert tracker.pool_stats()["size"] == idle
+    assert len(tracker.list_accounts()) == 1
+
+    assert all(sum(1 for _ in rows) == 49 for rows in exports)
+    tracker.close()
+
+
+def test_export_streams_every_row_oldest_first(tmp_path):
+    tracker = BudgetTracker(str(tmp_path / "budget.db"), pool_size=2)
+    # More rows than one serialised chunk, plus a back-dated one recorded last
+    seed(tracker, 1_200)
+    tracker.record_transactions([{"account_name": "checking", "category": "food", "amount": 2.0,
+                                  "description": "back-dated", "date": datetime.now() - timedelta(days=90)}])
+    app = FastAPI()
+    app.state.tracker = AsyncBudgetTracker(tracker)
+    app.include_router(transactions.router)
+
+    status, headers, body = asyncio.run(request(app, "GET", "/transactions/export?format=csv&account=checking"))
+    app.state.tracker.close()
+
+    assert status == 200
+    assert headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(rows) == 1_201
+    assert rows[0]["description"] == "back-dated"
+    assert [row["date"] for row in rows] == sorted(row["date"] for row in rows)
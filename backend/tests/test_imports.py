@@ -0,0 +1,50 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from async_tracker import AsyncBudgetTracker
+from benchmarks.asgi_client import request
+from jobs import JobRegistry
+from routes import imports
+
+STATEMENT = b"Date,Amount,Description\n2024-01-05,-12.50,Coffee\n2024-01-06,-40.00,Fuel\n"
+URL = "/imports/?account=checking&category=food"
+
+
+def import_app(tracker, max_bytes):
+    tracker.add_account("checking", 100.0)
+    tracker.add_category("food", 100.0)
+    app = FastAPI()
+    app.state.tracker = AsyncBudgetTracker(tracker)
+    app.state.jobs = JobRegistry()
+    app.state.import_max_bytes = max_bytes
+    app.include_router(imports.router)
+    return app
+
+
+def test_statement_within_the_limit_is_imported(tracker):
+    app = import_app(tracker, max_bytes=len(STATEMENT))
+
+    status, _, body = asyncio.run(request(app, "POST", URL, STATEMENT))
+    assert status == 202
+    job = app.state.jobs.get(json.loads(body)["id"])
+    deadline = time.monotonic() + 10
+    while job.status in ("pending", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert job.status == "completed", job.error
+    assert job.progress["bytesTotal"] == len(STATEMENT)
+    assert {acc["name"]: acc["amount"] for acc in tracker.list_accounts()} == {"checking": 47.5}
+
+
+def test_oversized_statement_gets_413(tracker):
+    app = import_app(tracker, max_bytes=len(STATEMENT) - 1)
+
+    streamed = asyncio.run(request(app, "POST", URL, STATEMENT))
+    declared = asyncio.run(request(app, "POST", URL, STATEMENT,
+                                   headers={"Content-Length": str(len(STATEMENT))}))
+
+    assert streamed[0] == declared[0] == 413
+    assert tracker.list_accounts() == [{"name": "checking", "amount": 100.0}]
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import pstats
+import sys
+
+import pytest
+from fastapi import Depends, FastAPI
+
+import profiling
+from async_tracker import AsyncBudgetTracker
+from benchmarks.asgi_client import request
+from dependencies import get_tracker
+from profiling import Capture, ProfileRing, ProfilingMiddleware
+
+
+def profiled_app(tracker, ring):
+    app = FastAPI()
+    app.state.tracker = AsyncBudgetTracker(tracker)
+
+    @app.get("/accounts")
+    async def accounts(db: AsyncBudgetTracker = Depends(get_tracker)):
+        return await db.list_accounts()
+
+    return app, ProfilingMiddleware(app, ring)
+
+
+@pytest.mark.parametrize("process_wide", [False, True])
+def test_profiled_request_covers_database_calls(tracker, tmp_path, monkeypatch, process_wide):
+    # Forcing the 3.12+ path on an older interpreter checks it never starts a second profiler
+    monkeypatch.setattr(profiling, "PROCESS_WIDE_PROFILER", process_wide)
+    tracker.add_account("checking", 10.0)
+    ring = ProfileRing(str(tmp_path / "profiles"))
+    app, wrapped = profiled_app(tracker, ring)
+
+    status, headers, _ = asyncio.run(request(wrapped, "GET", "/accounts", headers={"X-Profile": "1"}))
+    app.state.tracker._executor.shutdown()
+
+    assert status == 200
+    [name] = os.listdir(ring.directory)
+    assert name.startswith(headers["x-profile"])
+    if process_wide and sys.version_info < (3, 12):
+        return  # this interpreter's profiler cannot see the worker thread
+    functions = {func for _, _, func in pstats.Stats(os.path.join(ring.directory, name)).stats}
+    assert "list_accounts" in functions
+
+
+def test_capture_is_abstract():
+    with pytest.raises(TypeError):
+        Capture()
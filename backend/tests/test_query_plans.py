@@ -0,0 +1,25 @@
+from collections import Counter
+
+import pytest
+
+from benchmarks import query_plans
+
+# Planned once at collection so each statement is its own test case
+CHECKED, MISSING = query_plans.check_plans()
+
+
+def statement_ids():
+    seen = Counter()
+    for statement in CHECKED:
+        seen[statement.method] += 1
+        yield f"{statement.method}[{seen[statement.method]}]"
+
+
+@pytest.mark.parametrize("statement", CHECKED, ids=list(statement_ids()))
+def test_statement_reads_an_index(statement):
+    assert not statement.bad, f"{' '.join(statement.sql.split())}\n" + "\n".join(statement.details)
+
+
+@pytest.mark.parametrize("method", sorted(query_plans.EXPECTED_METHODS))
+def test_method_statements_were_captured(method):
+    assert method not in MISSING, f"{method} issued no statement the trace could see"
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+
+def test_back_dated_import_does_not_hide_the_best_match(tracker):
+    tracker.add_account("checking", 10_000.0)
+    tracker.add_category("travel", 5_000.0)
+    tracker.record_transaction("checking", "travel", 30.0, "Uber")
+    # An import of older, wordier matches takes every row id after the best match
+    old = datetime.now() - timedelta(days=400)
+    tracker.record_transactions(
+        {"account_name": "checking", "category": "travel", "amount": 1.0,
+         "description": f"Uber trip {i} to the airport and back", "date": old + timedelta(minutes=i)}
+        for i in range(1_200)
+    )
+
+    result = tracker.search_transactions("uber", limit=10)
+
+    assert result["transactions"][0]["description"] == "Uber"
+    assert len(result["transactions"]) == 10
+    assert result["truncated"]
+
+
+def test_ties_come_newest_first_and_nothing_is_truncated(tracker):
+    tracker.add_account("checking", 100.0)
+    tracker.add_category("food", 100.0)
+    now = datetime.now()
+    tracker.record_transactions(
+        {"account_name": "checking", "category": "food", "amount": 1.0, "description": "Tesco",
+         "date": now - timedelta(days=days)}
+        for days in (30, 1, 90)
+    )
+
+    result = tracker.search_transactions("tesco")
+
+    dates = [txn["date"] for txn in result["transactions"]]
+    assert dates == sorted(dates, reverse=True) and len(dates) == 3
+    assert not result["truncated"]
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from fastapi import FastAPI
+
+from benchmarks.asgi_client import request
+from routes import metrics as metrics_routes
+from tenants import FILES_PER_CONNECTION, TenantMiddleware, TenantRegistry
+
+
+def tenant_app(registry):
+    app = FastAPI()
+    app.state.tenants = registry
+    app.state.tracker = None
+    app.state.http_metrics = None
+    app.include_router(metrics_routes.router)
+    return app, TenantMiddleware(app, registry)
+
+
+def test_max_open_counts_the_watcher_connection(tmp_path):
+    registry = TenantRegistry(str(tmp_path), max_files=1024, pool_size=2, max_exports=8)
+    # Two pooled connections and the data_version watcher, plus the shared-memory
+    # index, after the export connections' reserve
+    assert registry.max_open == (1024 - 8 * FILES_PER_CONNECTION) // (3 * FILES_PER_CONNECTION + 1)
+    registry.close()
+
+
+def test_export_connections_share_the_registry_budget(tmp_path):
+    registry = TenantRegistry(str(tmp_path), create=True, max_exports=1)
+    alpha, beta = registry.acquire("alpha"), registry.acquire("beta")
+    for lease in (alpha, beta):
+        lease.db.tracker.add_account("checking", 0.0)
+        lease.db.tracker.add_category("food", 100.0)
+        lease.db.tracker.record_transaction("checking", "food", 1.0, "coffee")
+
+    first = alpha.db.tracker.iter_transactions()
+    next(first)
+    second_started = threading.Event()
+
+    def export_beta():
+        # Waits for alpha's export connection to close before opening its own
+        rows = beta.db.tracker.iter_transactions()
+        next(rows)
+        second_started.set()
+        rows.close()
+
+    worker = threading.Thread(target=export_beta)
+    worker.start()
+    assert not second_started.wait(0.2)
+    first.close()
+    assert second_started.wait(5)
+    worker.join()
+
+    alpha.release()
+    beta.release()
+    registry.close()
+
+
+def test_metrics_need_no_tenant(tmp_path):
+    registry = TenantRegistry(str(tmp_path), create=True)
+    app, wrapped = tenant_app(registry)
+    registry.acquire("alpha").release()
+
+    status, _, body = asyncio.run(request(wrapped, "GET", "/metrics"))
+    tenant_status, _, tenant_body = asyncio.run(request(wrapped, "GET", "/metrics", headers={"X-Tenant-ID": "alpha"}))
+    registry.close()
+
+    assert status == tenant_status == 200
+    assert b"budget_tenants_open 1\n" in body
+    assert b"budget_db_connections" not in body
+    assert b"budget_db_connections" not in tenant_body
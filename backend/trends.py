@@ -0,0 +1,49 @@
+from typing import List, Optional
+
+
+def month_range(end_month: str, count: int) -> List[str]:
+    """The count YYYY-MM months ending with end_month, oldest first"""
+    try:
+        year, month = map(int, end_month.split("-"))
+        if not 1 <= month <= 12 or len(end_month) != 7:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Invalid month '{end_month}', expected YYYY-MM")
+    index = year * 12 + month - 1
+    return [f"{i // 12:04d}-{i % 12 + 1:02d}" for i in range(index - count + 1, index + 1)]
+
+
+def rolling_average(values: List[float], window: int) -> List[float]:
+    """Trailing mean over up to window values, from one running sum.
+
+    The first window - 1 points average over however many months exist so far.
+    """
+    averages, total = [], 0.0
+    for i, value in enumerate(values):
+        total += value
+        if i >= window:
+            total -= values[i - window]
+        averages.append(round(total / min(i + 1, window), 2))
+    return averages
+
+
+def month_over_month(values: List[float]) -> List[Optional[float]]:
+    """Change from the previous month; None for the first month"""
+    return [None] + [round(current - previous, 2) for previous, current in zip(values, values[1:])]
+
+
+def utilisation(values: List[float], limit: float) -> List[Optional[float]]:
+    """Spend as a fraction of the monthly limit; None when there is no limit"""
+    if not limit:
+        return [None] * len(values)
+    return [round(value / limit, 4) for value in values]
+
+
+def series(values: List[float], limit: float, window: int) -> dict:
+    return {
+        "limit": limit,
+        "spent": values,
+        "utilisation": utilisation(values, limit),
+        "rollingAverage": rolling_average(values, window),
+        "monthOverMonth": month_over_month(values),
+    }